@@ -1,8 +1,33 @@
 import requests
+import requests.adapters
 import configparser
+import hashlib
+import json
+import os
+import re
+import threading
+import time
 import typing
 from typing import TextIO
 from typing import Optional
+from urllib.parse import urlparse
+
+from .disk_cache import DiskCache
+from .retry_policy import RetryPolicy
+
+
+# Sessions are shared by every Api object, one per (process, host). Keying on
+# the pid means a forked worker never reuses the parent's sockets: it builds
+# its own pool on first use while the inherited sessions are left untouched.
+_sessions: dict[tuple[int, str], requests.Session] = {}
+_sessions_lock: threading.Lock = threading.Lock()
+
+def _reset_sessions_lock() :
+    global _sessions_lock
+    _sessions_lock = threading.Lock()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_sessions_lock)
 
 
 class Api :
@@ -12,6 +37,11 @@ class Api :
     Constants
     ---------
         _TIMEOUT: The timeout period in seconds for an https request
+        DOWNLOAD_CHUNK_SIZE: The number of bytes written to disk at a time by download()
+        POOL_CONNECTIONS: The number of per-host connection pools each session caches
+        POOL_MAXSIZE: The number of keep-alive connections kept open per host
+        CACHE_DEFAULT_TTL: Seconds a cached GET response is served without revalidation when the server gives no max-age
+        RETRY_POLICY: The RetryPolicy applied to GETs and to POSTs marked idempotent
 
     Attributes
     -----------
@@ -26,16 +56,40 @@ class Api :
         sets the bearer token
     set_bearer_token_from_file(filepath:str,sections:str,key:str)
         sets the bearer token read from an external file
+    configure_pool(pool_connections:int, pool_maxsize:int)
+        sets the pool sizes used for sessions created from now on
+    session_for(url:str)
+        returns this process's shared keep-alive session for the host of url
+    pool_stats()
+        returns request and connection counts per host for this process
+    enable_cache(path:str, max_bytes:int, default_ttl:float)
+        turns on the persistent GET response cache shared by every Api object
+    disable_cache()
+        turns the GET response cache off
+    configure_retries(policy:RetryPolicy)
+        replaces the retry policy shared by every Api object
+    retry_stats()
+        returns retry counts per endpoint for this process
+    download(endpoint:str, dest_path:str, chunk_size:int, expected_size:Optional[int], expected_sha256:Optional[str], resume:bool, part_path:Optional[str], progress)
+        Streams the response body for endpoint to dest_path in fixed-size chunks through a .part file, resuming a partial download with an HTTP Range request
+        and checking the size and sha256 before the file is moved into place. Returns the number of bytes in the file.
     build_url(endpoint:str)
         Constructs a full URL by combining the base URL with the specified endpoint.
     get(endpoint:str, payload:Optional[dict[str, typing.Any]])
         Sends a GET request to the specified endpoint with optional query parameters. Returns the response as JSON if possible, otherwise as text.
-    post(endpoint:str, payload:dict[str, str])
+    post(endpoint:str, payload:dict[str, str], idempotent:bool)
         Sends a POST request to the specified endpoint with a JSON payload. Returns the response as JSON.
+        The request is only retried when idempotent is True, and never after it timed out waiting for the reply.
 
     """
 
     _TIMEOUT : float = 15.0
+    DOWNLOAD_CHUNK_SIZE : int = 1024 * 1024
+    POOL_CONNECTIONS : int = 10
+    POOL_MAXSIZE : int = 10
+    CACHE_DEFAULT_TTL : float = 0.0
+    _cache : Optional[DiskCache] = None
+    RETRY_POLICY : RetryPolicy = RetryPolicy()
 
     def __init__(self, _base_url: str) :
         self.base_url = _base_url
@@ -66,9 +120,129 @@ class Api :
         self.set_bearer_token(token)
     
     
+    @classmethod
+    def configure_pool(cls, pool_connections: Optional[int] = None, pool_maxsize: Optional[int] = None) :
+        if pool_connections is not None:
+            Api.POOL_CONNECTIONS = pool_connections
+        if pool_maxsize is not None:
+            Api.POOL_MAXSIZE = pool_maxsize
+
+    @staticmethod
+    def session_for(url: str) -> requests.Session :
+        key: tuple[int, str] = (os.getpid(), urlparse(url).netloc)
+        session: Optional[requests.Session] = _sessions.get(key)
+        if session is not None:
+            return session
+
+        with _sessions_lock:
+            session = _sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(
+                    pool_connections=Api.POOL_CONNECTIONS,
+                    pool_maxsize=Api.POOL_MAXSIZE
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers["Connection"] = "keep-alive"
+                _sessions[key] = session
+        return session
+
+    @property
+    def session(self) -> requests.Session :
+        return self.session_for(self.base_url)
+
+    @staticmethod
+    def pool_stats() -> dict[str, dict[str, int]] :
+        stats: dict[str, dict[str, int]] = {}
+        pid: int = os.getpid()
+        for (session_pid, host), session in list(_sessions.items()):
+            if session_pid != pid:
+                continue
+            host_stats = stats.setdefault(host, {"requests": 0, "connections": 0, "reused": 0})
+            for adapter in set(session.adapters.values()):
+                pools = adapter.poolmanager.pools
+                for pool_key in pools.keys():
+                    pool = pools.get(pool_key)
+                    if pool is None:
+                        continue
+                    host_stats["requests"] += pool.num_requests
+                    host_stats["connections"] += pool.num_connections
+            host_stats["reused"] = max(host_stats["requests"] - host_stats["connections"], 0)
+        return stats
+
+    @classmethod
+    def enable_cache(cls, path: str, max_bytes: int = 256 * 1024 * 1024, default_ttl: float = 0.0) :
+        Api._cache = DiskCache(path, max_bytes=max_bytes)
+        Api.CACHE_DEFAULT_TTL = default_ttl
+
+    @classmethod
+    def disable_cache(cls) :
+        Api._cache = None
+
+    @classmethod
+    def configure_retries(cls, policy: RetryPolicy) :
+        Api.RETRY_POLICY = policy
+
+    @staticmethod
+    def retry_stats() -> dict[str, dict[str, int]] :
+        return Api.RETRY_POLICY.stats()
+
+    def _send(self, method: str, url: str, retry: bool = True, **kwargs: typing.Any) -> requests.Response :
+        policy: RetryPolicy = Api.RETRY_POLICY
+        parsed = urlparse(url)
+        endpoint: str = f"{method} {parsed.netloc}{parsed.path}"
+        retries: int = 0
+        while True:
+            resp: Optional[requests.Response] = None
+            error: Optional[Exception] = None
+            try:
+                resp = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            status_code: Optional[int] = resp.status_code if resp is not None else None
+
+            transient: bool = retry and policy.should_retry(status_code)
+            if method == "POST" and isinstance(error, requests.ReadTimeout):
+                # The server may still be working on it; another full timeout per attempt would outlast the caller's deadline
+                transient = False
+            if not transient or retries + 1 >= policy.max_attempts or not policy.take_budget(parsed.netloc):
+                policy.record(endpoint, retries, gave_up=transient)
+                if error is not None:
+                    raise error
+                assert resp is not None
+                return resp
+
+            retry_after: Optional[str] = resp.headers.get("Retry-After") if resp is not None else None
+            if resp is not None:
+                resp.close()
+            time.sleep(policy.delay(retries, retry_after))
+            retries += 1
+
     def build_url(self, endpoint: str = "") -> str :
         return f"{self.base_url.rstrip('/')}/{endpoint.lstrip('/')}"
 
+    def cache_key(self, url: str, payload: Optional[dict[str, typing.Any]] = None) -> str :
+        # Responses fetched with different tokens may differ, so the token's fingerprint is part of the key
+        full_url: str = requests.Request("GET", url, params=payload).prepare().url or url
+        token_fingerprint: str = hashlib.sha256(self.__bearer_token.encode()).hexdigest()[:16] if self.__bearer_token else ""
+        return f"GET {full_url} {token_fingerprint}"
+
+    @classmethod
+    def expires_at(cls, resp: requests.Response) -> float :
+        cache_control: str = resp.headers.get("Cache-Control", "").lower()
+        if "no-cache" in cache_control:
+            return time.time()
+        match = re.search(r"max-age=(\d+)", cache_control)
+        ttl: float = float(match.group(1)) if match else cls.CACHE_DEFAULT_TTL
+        return time.time() + ttl
+
+    @staticmethod
+    def decode_body(body: bytes, encoding: Optional[str] = None) -> typing.Any :
+        try:
+            return json.loads(body)
+        except ValueError:
+            return body.decode(encoding or "utf-8", errors="replace")
 
     def get(self, endpoint: str = "", payload: Optional[dict[str, typing.Any]] = {}) -> typing.Any :
         url : str = self.build_url(endpoint)
@@ -77,23 +251,108 @@ class Api :
         if self.__bearer_token:
             headers["Authorization"] = f"Bearer {self.__bearer_token}"
 
-        resp: requests.Response = requests.get(
-            url=url,
+        cache: Optional[DiskCache] = Api._cache
+        key: str = self.cache_key(url, payload) if cache is not None else ""
+        entry = cache.get(key) if cache is not None else None
+        if entry is not None:
+            if entry.is_fresh():
+                return self.decode_body(entry.body, entry.meta.get("encoding"))
+            if entry.meta.get("etag"):
+                headers["If-None-Match"] = entry.meta["etag"]
+            if entry.meta.get("last_modified"):
+                headers["If-Modified-Since"] = entry.meta["last_modified"]
+
+        resp: requests.Response = self._send(
+            "GET",
+            url,
             params=payload,
             headers=headers,
             timeout=self._TIMEOUT
         )
         
         status_code: int = resp.status_code
+        if status_code == 304 and entry is not None and cache is not None:
+            cache.touch(key, self.expires_at(resp))
+            return self.decode_body(entry.body, entry.meta.get("encoding"))
+
         if status_code != 200 :
             raise Exception(f"GET request failed with status code {status_code} from {url}: {resp.text}")
 
+        if cache is not None and "no-store" not in resp.headers.get("Cache-Control", "").lower():
+            meta: dict[str, typing.Any] = {
+                "etag": resp.headers.get("ETag"),
+                "last_modified": resp.headers.get("Last-Modified"),
+                "encoding": resp.encoding,
+            }
+            expires: float = self.expires_at(resp)
+            if meta["etag"] or meta["last_modified"] or expires > time.time():
+                cache.put(key, resp.content, meta, expires)
+
         try:
             return resp.json()
         except requests.exceptions.JSONDecodeError:
             return resp.text
 
-    def post(self, endpoint: str = "", payload: dict[str, str] = {}) -> dict[str, str] :
+    def download(self, endpoint: str, dest_path: str, chunk_size: Optional[int] = None, expected_size: Optional[int] = None,
+                 expected_sha256: Optional[str] = None, resume: bool = True, part_path: Optional[str] = None,
+                 progress: Optional[typing.Callable[[int, Optional[int]], None]] = None) -> int :
+        url : str = self.build_url(endpoint)
+        part_path = part_path or dest_path + ".part"
+        chunk_size = chunk_size or self.DOWNLOAD_CHUNK_SIZE
+
+        # Ask for the bytes exactly as stored so sizes, hashes and ranges line up
+        headers: dict[str, str] = {"Accept-Encoding": "identity"}
+        if self.__bearer_token:
+            headers["Authorization"] = f"Bearer {self.__bearer_token}"
+
+        offset: int = os.path.getsize(part_path) if resume and os.path.exists(part_path) else 0
+        if expected_size is not None and offset > expected_size:
+            offset = 0
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+
+        with self._send("GET", url, headers=headers, stream=True, timeout=self._TIMEOUT) as resp:
+            status_code: int = resp.status_code
+            if status_code == 200:
+                # The server ignored the range (or there was none); start over
+                offset = 0
+            elif status_code == 416 and offset:
+                # The partial file already holds the whole body
+                pass
+            elif status_code != 206 or not offset:
+                raise Exception(f"GET request failed with status code {status_code} from {url}: {resp.text}")
+
+            digest = hashlib.sha256()
+            if offset:
+                with open(part_path, "rb") as existing:
+                    for block in iter(lambda: existing.read(chunk_size), b""):
+                        digest.update(block)
+
+            written: int = offset
+            total: Optional[int] = expected_size
+            if total is None and status_code != 416 and "Content-Length" in resp.headers:
+                total = offset + int(resp.headers["Content-Length"])
+
+            if status_code != 416:
+                with open(part_path, "ab" if offset else "wb") as f:
+                    for chunk in resp.iter_content(chunk_size=chunk_size):
+                        f.write(chunk)
+                        digest.update(chunk)
+                        written += len(chunk)
+                        if progress is not None:
+                            progress(written, total)
+
+        if total is not None and written != total:
+            os.remove(part_path)
+            raise Exception(f"Download of {url} is {written} bytes, expected {total}")
+        if expected_sha256 is not None and digest.hexdigest() != expected_sha256.lower():
+            os.remove(part_path)
+            raise Exception(f"Download of {url} failed sha256 verification")
+
+        os.replace(part_path, dest_path)
+        return written
+
+    def post(self, endpoint: str = "", payload: dict[str, str] = {}, idempotent: bool = False) -> dict[str, str] :
         url : str = self.build_url(endpoint)
         
         # <-- YOU WERE MISSING THIS SECTION IN post()
@@ -102,8 +361,10 @@ class Api :
             headers["Authorization"] = f"Bearer {self.__bearer_token}"
         # -->
 
-        resp: requests.Response = requests.post(
-            url=url,
+        resp: requests.Response = self._send(
+            "POST",
+            url,
+            retry=idempotent,
             json=payload,
             headers=headers, # <-- AND YOU WERE MISSING THIS ARGUMENT
             timeout=self._TIMEOUT
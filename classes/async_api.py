@@ -0,0 +1,187 @@
+import aiohttp
+import asyncio
+import hashlib
+import json
+import os
+import typing
+import weakref
+from typing import Optional
+
+from .api import Api
+from .retry_policy import RetryPolicy
+from urllib.parse import urlparse
+
+
+# One aiohttp session per event loop, shared by every AsyncApi object running on it.
+_client_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = weakref.WeakKeyDictionary()
+
+
+class AsyncApi(Api) :
+    """
+    An asyncio counterpart of Api built on aiohttp. Token handling and URL
+    construction are inherited from Api; get() and post() are coroutines.
+
+    All AsyncApi objects on the same event loop share one aiohttp session, so
+    hundreds of concurrent requests from a single process reuse a bounded set
+    of keep-alive connections. Requests are retried under Api.RETRY_POLICY,
+    sleeping on the event loop between attempts.
+
+    Constants
+    ---------
+        CONNECTION_LIMIT: The maximum number of open connections per event loop
+        CONNECTION_LIMIT_PER_HOST: The maximum number of open connections per host
+
+    Methods
+    -------
+    client_session
+        returns the aiohttp session for the running event loop
+    close_sessions()
+        closes the aiohttp session of the running event loop
+    get(endpoint:str, payload:Optional[dict[str, typing.Any]])
+        Sends a GET request to the specified endpoint with optional query parameters. Returns the response as JSON if possible, otherwise as text.
+    get_bytes(endpoint:str)
+        Sends a GET request to the specified endpoint and returns the raw response body.
+    download(endpoint:str, dest_path:str, chunk_size:Optional[int], expected_size:Optional[int], expected_sha256:Optional[str])
+        Streams the response body to dest_path in fixed-size chunks through a .part file and checks its size and sha256.
+    post(endpoint:str, payload:dict[str, str], idempotent:bool)
+        Sends a POST request to the specified endpoint with a JSON payload. Returns the response as JSON.
+    """
+
+    CONNECTION_LIMIT : int = 100
+    CONNECTION_LIMIT_PER_HOST : int = 32
+
+    @property
+    def client_session(self) -> aiohttp.ClientSession :
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        session: Optional[aiohttp.ClientSession] = _client_sessions.get(loop)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.CONNECTION_LIMIT,
+                limit_per_host=self.CONNECTION_LIMIT_PER_HOST
+            )
+            session = aiohttp.ClientSession(connector=connector)
+            _client_sessions[loop] = session
+        return session
+
+    @staticmethod
+    async def close_sessions() :
+        session: Optional[aiohttp.ClientSession] = _client_sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None:
+            await session.close()
+
+    def _headers(self) -> dict[str, str] :
+        headers: dict[str, str] = {}
+        if self.bearer_token:
+            headers["Authorization"] = f"Bearer {self.bearer_token}"
+        return headers
+
+    async def _send(self, method: str, url: str, retry: bool = True, **kwargs: typing.Any) -> aiohttp.ClientResponse :
+        policy: RetryPolicy = Api.RETRY_POLICY
+        parsed = urlparse(url)
+        endpoint: str = f"{method} {parsed.netloc}{parsed.path}"
+        retries: int = 0
+        while True:
+            resp: Optional[aiohttp.ClientResponse] = None
+            error: Optional[Exception] = None
+            try:
+                resp = await self.client_session.request(method, url, **kwargs)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                error = e
+            status_code: Optional[int] = resp.status if resp is not None else None
+
+            transient: bool = retry and policy.should_retry(status_code)
+            if method == "POST" and isinstance(error, asyncio.TimeoutError):
+                # The server may still be working on it; another full timeout per attempt would outlast the caller's deadline
+                transient = False
+            if not transient or retries + 1 >= policy.max_attempts or not policy.take_budget(parsed.netloc):
+                policy.record(endpoint, retries, gave_up=transient)
+                if error is not None:
+                    raise error
+                assert resp is not None
+                return resp
+
+            retry_after: Optional[str] = resp.headers.get("Retry-After") if resp is not None else None
+            if resp is not None:
+                resp.release()
+            await asyncio.sleep(policy.delay(retries, retry_after))
+            retries += 1
+
+    async def get(self, endpoint: str = "", payload: Optional[dict[str, typing.Any]] = {}) -> typing.Any :
+        url : str = self.build_url(endpoint)
+
+        async with await self._send(
+            "GET",
+            url,
+            params=payload or None,
+            headers=self._headers(),
+            timeout=aiohttp.ClientTimeout(total=self._TIMEOUT)
+        ) as resp:
+            text: str = await resp.text()
+            if resp.status != 200 :
+                raise Exception(f"GET request failed with status code {resp.status} from {url}: {text}")
+
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            return text
+
+    async def get_bytes(self, endpoint: str = "") -> bytes :
+        url : str = self.build_url(endpoint)
+
+        async with await self._send(
+            "GET",
+            url,
+            headers=self._headers(),
+            timeout=aiohttp.ClientTimeout(total=self._TIMEOUT)
+        ) as resp:
+            if resp.status != 200 :
+                raise Exception(f"GET request failed with status code {resp.status} from {url}: {await resp.text()}")
+            return await resp.read()
+
+    async def download(self, endpoint: str, dest_path: str, chunk_size: Optional[int] = None,
+                       expected_size: Optional[int] = None, expected_sha256: Optional[str] = None) -> int :
+        url : str = self.build_url(endpoint)
+        part_path: str = dest_path + ".part"
+        headers: dict[str, str] = self._headers()
+        headers["Accept-Encoding"] = "identity"
+
+        digest = hashlib.sha256()
+        written: int = 0
+        async with await self._send(
+            "GET",
+            url,
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(sock_connect=self._TIMEOUT, sock_read=self._TIMEOUT)
+        ) as resp:
+            if resp.status != 200 :
+                raise Exception(f"GET request failed with status code {resp.status} from {url}: {await resp.text()}")
+            with open(part_path, "wb") as f:
+                async for chunk in resp.content.iter_chunked(chunk_size or self.DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+                    digest.update(chunk)
+                    written += len(chunk)
+
+        if expected_size is not None and written != expected_size:
+            os.remove(part_path)
+            raise Exception(f"Download of {url} is {written} bytes, expected {expected_size}")
+        if expected_sha256 is not None and digest.hexdigest() != expected_sha256.lower():
+            os.remove(part_path)
+            raise Exception(f"Download of {url} failed sha256 verification")
+
+        os.replace(part_path, dest_path)
+        return written
+
+    async def post(self, endpoint: str = "", payload: dict[str, str] = {}, idempotent: bool = False) -> dict[str, str] :
+        url : str = self.build_url(endpoint)
+
+        async with await self._send(
+            "POST",
+            url,
+            retry=idempotent,
+            json=payload,
+            headers=self._headers(),
+            timeout=aiohttp.ClientTimeout(total=self._TIMEOUT)
+        ) as resp:
+            if resp.status != 200 :
+                raise Exception(f"POST request failed with status code {resp.status}: {await resp.text()}")
+            return await resp.json(content_type=None)
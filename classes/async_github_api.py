@@ -0,0 +1,112 @@
+from .async_api import AsyncApi
+from .github_api import GitHubApi
+from .rate_limit_scheduler import RateLimitScheduler
+from .github_token_pool import GitHubTokenPool
+import aiohttp
+import typing
+from os import getenv
+from typing import Optional
+
+
+class AsyncGitHubApi(AsyncApi) :
+    """
+    An asyncio counterpart of GitHubApi with the same methods as coroutines.
+
+    Endpoints and URL building are shared with GitHubApi, and so are the
+    per-token rate-limit schedulers and token pool rotation; waiting for
+    budget yields to the event loop.
+
+    Attributes:
+    -----------
+    owner (str): The owner of the repository.
+    repo (str): The name of the repository.
+    rev (str): The branch or revision (default: "main").
+    priority (str): "normal", or "low" for calls that may be held back when the budget runs low.
+    token_pool (GitHubTokenPool | None): The tokens requests rotate over, when more than one was given.
+    """
+
+    BASE_URL: str = GitHubApi.BASE_URL
+    ENDPOINT: typing.Dict[str, str] = GitHubApi.ENDPOINT
+
+    owner: str
+    repo: str
+    rev: str
+    priority: str
+    token_pool: Optional[GitHubTokenPool]
+
+    def __init__(self, owner: str, _repo: str, _rev: str = "main"):
+        super().__init__(self.BASE_URL)
+        self.owner = owner
+        self.repo = _repo
+        self.rev = _rev
+        self.priority = "normal"
+        self.token_pool = None
+
+    def set_bearer_token(self, token: str) :
+        tokens: list[str] = GitHubTokenPool.parse(token)
+        self.token_pool = GitHubTokenPool(tokens) if len(tokens) > 1 else None
+        super().set_bearer_token(tokens[0] if tokens else token)
+
+    scheduler = GitHubApi.scheduler
+
+    async def _send(self, method: str, url: str, retry: bool = True, **kwargs: typing.Any) -> aiohttp.ClientResponse :
+        pool: Optional[GitHubTokenPool] = self.token_pool
+        attempts: int = len(pool.tokens) + 1 if pool is not None else 1
+        resource: str = GitHubApi.rate_limit_resource(url)
+        for _ in range(attempts):
+            token: Optional[str] = pool.choose(resource) if pool is not None else self.bearer_token
+            if pool is not None:
+                kwargs["headers"] = dict(kwargs.get("headers") or {}, Authorization=f"Bearer {token}")
+
+            scheduler: RateLimitScheduler = RateLimitScheduler.for_token(token, resource)
+            await scheduler.acquire_async(self.priority)
+            resp: aiohttp.ClientResponse = await super()._send(method, url, retry=retry, **kwargs)
+            scheduler.observe(resp.headers)
+            if resp.status == 401:
+                GitHubApi.forget_token(token)
+
+            if pool is None or token is None:
+                return resp
+            if resp.status == 401:
+                pool.mark_invalid(token)
+                if not pool.active_tokens():
+                    return resp
+            elif not GitHubApi.is_out_of_quota(resp.status, resp.headers):
+                return resp
+            resp.release()
+        return resp
+
+    build_endpoint = GitHubApi.build_endpoint
+
+    async def verify_token(self, github_token: Optional[str]) -> bool :
+        if github_token is None:
+            return False
+        # A pool passes as long as one of its tokens is accepted
+        for token in GitHubTokenPool.parse(github_token):
+            checker: AsyncApi = AsyncApi(self.base_url)
+            checker.set_bearer_token(token)
+            try:
+                await checker.get(self.ENDPOINT["verify_token"])
+            except Exception:
+                continue
+            return True
+        return False
+
+    async def set_bearer_token_from_env(self, var_name:str = "GITHUB_TOKEN"):
+        token: Optional[str] = getenv(var_name, None)
+        if not await self.verify_token(token):
+            raise ValueError(f"GitHub token in '{var_name}' is missing or invalid")
+        assert isinstance(token, str)
+
+        self.set_bearer_token(token)
+
+    async def get_repo_pulls(self, state:str = "all", endpoint:str = "pull_requests", per_page: int = 100, max_pages: int = 10):
+        url = self.build_endpoint(endpoint)
+        pulls: list[dict[str, typing.Any]] = []
+        for page in range(1, max_pages + 1):
+            payload = {"state": state, "per_page": per_page, "page": page}
+            resp = await self.get(url, payload=payload)
+            pulls.extend(resp)
+            if len(resp) < per_page:
+                break
+        return pulls
@@ -0,0 +1,110 @@
+from .async_api import AsyncApi
+from .hugging_face_api import HuggingFaceApi
+import asyncio
+import typing
+import os
+from typing import Optional
+from typing import Union
+
+
+class AsyncHuggingFaceApi(AsyncApi) :
+    """
+    An asyncio counterpart of HuggingFaceApi with the same methods as coroutines.
+
+    Endpoints and URL building are shared with HuggingFaceApi. When given a
+    list of filenames, download_file fetches up to DOWNLOAD_WORKERS of them at
+    once; files that fail are left out of the result and kept in download_errors.
+
+    Attributes:
+    ----------
+    namespace (str): The namespace (user or organization) of the Hugging Face repository.
+    repo (str): The name of the model or dataset repository.
+    rev (str): The revision (branch, tag, or commit) to use, defaults to "main".
+    """
+
+    BASE_URL: str = HuggingFaceApi.BASE_URL
+    ENDPOINT: typing.Dict[str, str] = HuggingFaceApi.ENDPOINT
+    DOWNLOAD_WORKERS: int = HuggingFaceApi.DOWNLOAD_WORKERS
+
+    namespace: str
+    repo: str
+    rev: str
+    download_errors: dict[str, str]
+
+    def __init__(self, _namespace: str, _repo: str, _rev: str = "main"):
+        super().__init__(self.BASE_URL)
+        self.namespace = _namespace
+        self.repo = _repo
+        self.rev = _rev
+        self.download_errors = {}
+
+    def set_bearer_token_from_file(self, filepath: str, section: str = "huggingface", key: str = "bearer_token"):
+        super().set_bearer_token_from_file(filepath, section=section, key=key)
+
+    validate_model_fields = HuggingFaceApi.validate_model_fields
+    build_endpoint = HuggingFaceApi.build_endpoint
+
+    async def get_base_info(self, endpoint: str) -> dict[str, typing.Any] :
+        api_endpoint: str = self.build_endpoint(endpoint)
+        return await self.get(api_endpoint)
+
+    async def get_model_info(self, endpoint: str = "model_info") -> dict[str, typing.Any] :
+        self.validate_model_fields()
+
+        return await self.get_base_info(endpoint)
+
+    async def get_dataset_info(self, endpoint: str = "dataset_info") -> dict[str, typing.Any] :
+
+        return await self.get_base_info(endpoint)
+
+    async def get_files_info(self, endpoint: str, path: str = "") -> list[dict[str, typing.Any]]:
+
+        api_endpoint: str = self.build_endpoint(endpoint, path=path)
+
+        response: list[dict[str, typing.Any]] = await self.get(api_endpoint, payload={'recursive': 'True'})
+        return HuggingFaceApi.parse_files_info(response)
+
+    async def get_model_files_info(self, endpoint:str = "model_files", path: str = "") -> list[dict[str, typing.Any]]:
+        self.validate_model_fields()
+
+        return await self.get_files_info(endpoint, path)
+
+    async def get_dataset_files_info(self, endpoint:str = "dataset_files", path: str = "") -> list[dict[str, typing.Any]]:
+
+        return await self.get_files_info(endpoint, path)
+
+    async def _download_one(self, endpoint: str, filename: str, file_path: str) -> str:
+        api_endpoint: str = self.build_endpoint(endpoint, filename=filename)
+        await self.download(api_endpoint, file_path)
+        return file_path
+
+    async def download_file(self, endpoint: str, filename: Union[str, list[str]], dest_dir: str = "tmp") -> Union[str, list[str]]:
+        endpoint_temp: Optional[str] = self.ENDPOINT.get(endpoint)
+        if not endpoint_temp:
+            raise ValueError(f"Invalid Endpoint: '{endpoint_temp}' ")
+
+        if not os.path.exists(dest_dir):
+            os.makedirs(dest_dir, exist_ok=True)
+
+        if isinstance(filename, list):
+            self.download_errors = {}
+            slots: asyncio.Semaphore = asyncio.Semaphore(self.DOWNLOAD_WORKERS)
+
+            async def fetch(fname: str) -> Optional[str]:
+                async with slots:
+                    try:
+                        return await self._download_one(endpoint, fname, os.path.join(dest_dir, f"{self.namespace}_{self.repo}_{fname.replace('/', '_')}"))
+                    except Exception as e:
+                        self.download_errors[fname] = str(e)
+                        return None
+
+            results: list[Optional[str]] = await asyncio.gather(*(fetch(fname) for fname in filename))
+            return [file_path for file_path in results if file_path is not None]
+
+        return await self._download_one(endpoint, filename, os.path.join(dest_dir, f"{self.namespace}_{self.repo}_{filename}.txt"))
+
+    async def download_model_file(self, filename: Union[str, list[str]], dest_dir: str = "tmp", endpoint: str = "model_file_download") -> Union[str, list[str]]:
+        return await self.download_file(endpoint, filename, dest_dir)
+
+    async def download_dataset_file(self, filename: Union[str, list[str]], dest_dir: str = "tmp", endpoint: str = "dataset_file_download") -> Union[str, list[str]]:
+        return await self.download_file(endpoint, filename, dest_dir)
@@ -0,0 +1,45 @@
+from .async_api import AsyncApi
+from .llm_child_api import GenAiChatApi
+from typing import Optional
+
+
+class AsyncGenAiChatApi(AsyncApi):
+    """
+    An asyncio counterpart of GenAiChatApi. Many chat completions can be in
+    flight at once on a single event loop.
+
+    Attributes:
+        model (str): The name of the model to use for chat completions.
+    """
+    CHAT_ENDPOINT = GenAiChatApi.CHAT_ENDPOINT
+    _TIMEOUT = GenAiChatApi._TIMEOUT
+
+    def __init__(self, base_url: str, model: str):
+        """
+        Initializes the AsyncGenAiChatApi client.
+
+        Args:
+            base_url (str): The base URL for the API (e.g., "https://genai.rcac.purdue.edu").
+            model (str): The model identifier (e.g., "llama3.1:latest").
+        """
+        super().__init__(base_url)
+        self.model = model
+
+    build_payload = GenAiChatApi.build_payload
+    extract_content = staticmethod(GenAiChatApi.extract_content)
+
+    async def get_chat_completion(self, content: str) -> Optional[str]:
+        """
+        Sends a message to the chat API and returns the assistant's text response.
+
+        Args:
+            content (str): The user's message content.
+
+        Returns:
+            Optional[str]: The text content of the model's reply, or None if not found.
+        """
+        try:
+            response_data = await self.post(endpoint=self.CHAT_ENDPOINT, payload=self.build_payload(content), idempotent=True)
+            return self.extract_content(response_data)
+        except Exception:
+            return None
@@ -0,0 +1,93 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Optional
+
+
+class CredentialCache :
+    """
+    Remembers which credentials were accepted recently, so back-to-back runs
+    do not re-check the same token over the network on every start.
+
+    Only a SHA-256 fingerprint of each credential is written, never the
+    credential itself, and the file is created readable by its owner only.
+    An entry is trusted for ttl seconds; a token revoked within that window
+    is still caught the first time a real request is rejected.
+
+    Constants
+    ---------
+        DEFAULT_PATH: Where the cache lives when no path is given
+        DEFAULT_TTL: Seconds an accepted credential is trusted without a check
+
+    Attributes
+    ----------
+        path (str): The JSON file holding {fingerprint: expiry}.
+        ttl (float): Seconds an accepted credential is trusted.
+
+    Methods
+    -------
+    fingerprint(service:str, secret:str)
+        Returns the fingerprint stored for a credential.
+    is_valid(service:str, secret:str)
+        Returns whether the credential was accepted within the last ttl seconds.
+    remember(service:str, secret:str)
+        Records that the credential was just accepted.
+    forget(service:str, secret:str)
+        Drops the credential, e.g. after it was rejected.
+    """
+
+    DEFAULT_PATH: str = os.path.join(tempfile.gettempdir(), f"ece30861-credentials-{os.getuid() if hasattr(os, 'getuid') else 'user'}.json")
+    DEFAULT_TTL: float = 3600.0
+
+    def __init__(self, path: Optional[str] = None, ttl: float = DEFAULT_TTL):
+        self.path = path or self.DEFAULT_PATH
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(service: str, secret: str) -> str :
+        return hashlib.sha256(f"{service}:{secret}".encode()).hexdigest()
+
+    def _load(self) -> dict[str, float] :
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return entries if isinstance(entries, dict) else {}
+
+    def _save(self, entries: dict[str, float]) :
+        directory: str = os.path.dirname(os.path.abspath(self.path))
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".credentials-")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entries, f)
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            # The cache only saves time; a read-only location just means checking every run
+            pass
+
+    def is_valid(self, service: str, secret: str) -> bool :
+        if not secret:
+            return False
+        with self._lock:
+            expires_at = self._load().get(self.fingerprint(service, secret))
+        return isinstance(expires_at, (int, float)) and time.time() < expires_at
+
+    def remember(self, service: str, secret: str) :
+        now: float = time.time()
+        with self._lock:
+            entries: dict[str, float] = {key: expiry for key, expiry in self._load().items() if isinstance(expiry, (int, float)) and expiry > now}
+            entries[self.fingerprint(service, secret)] = now + self.ttl
+            self._save(entries)
+
+    def forget(self, service: str, secret: str) :
+        with self._lock:
+            entries: dict[str, float] = self._load()
+            if entries.pop(self.fingerprint(service, secret), None) is not None:
+                self._save(entries)
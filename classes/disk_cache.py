@@ -0,0 +1,140 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import typing
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class CacheEntry:
+    """
+    One cached value.
+
+    Attributes:
+        key (str): The cache key.
+        body (bytes): The stored value.
+        meta (dict[str, Any]): Small JSON-serialisable metadata stored alongside the body.
+        expires_at (float | None): Unix time after which the entry is stale, or None if it never expires.
+    """
+    key: str
+    body: bytes
+    meta: dict[str, typing.Any]
+    expires_at: Optional[float]
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        if self.expires_at is None:
+            return True
+        return (now if now is not None else time.time()) < self.expires_at
+
+
+class DiskCache :
+    """
+    A persistent key/value cache in a single SQLite file with a size budget
+    and least-recently-used eviction.
+
+    The file can be shared by several processes: SQLite does the locking and
+    each process (and thread) opens its own connection on first use, so a
+    cache created before the metric workers fork is safe to use from them.
+
+    Attributes
+    ----------
+        path (str): The SQLite database file.
+        max_bytes (int): The total body size kept before the least recently used entries are evicted.
+
+    Methods
+    -------
+    get(key:str)
+        Returns the CacheEntry for key, or None, and marks it as recently used.
+    put(key:str, body:bytes, meta:dict, expires_at:Optional[float])
+        Stores or replaces an entry and evicts old entries that no longer fit.
+    touch(key:str, expires_at:Optional[float], meta:Optional[dict])
+        Updates an entry's expiry (and optionally its metadata) without rewriting the body.
+    delete(key:str)
+        Removes one entry.
+    clear()
+        Removes every entry.
+    total_bytes()
+        Returns the summed size of all stored bodies.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+
+        directory: str = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY,"
+                " body BLOB NOT NULL,"
+                " meta TEXT NOT NULL,"
+                " expires_at REAL,"
+                " size INTEGER NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+
+    def _connection(self) -> sqlite3.Connection :
+        conn: Optional[sqlite3.Connection] = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key: str) -> Optional[CacheEntry] :
+        conn: sqlite3.Connection = self._connection()
+        row = conn.execute("SELECT body, meta, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+        return CacheEntry(key, bytes(row[0]), json.loads(row[1]), row[2])
+
+    def put(self, key: str, body: bytes, meta: Optional[dict[str, typing.Any]] = None, expires_at: Optional[float] = None) :
+        if len(body) > self.max_bytes:
+            return
+        conn: sqlite3.Connection = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (key, body, meta, expires_at, size, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, body, json.dumps(meta or {}), expires_at, len(body), time.time())
+        )
+        self._evict(conn)
+
+    def touch(self, key: str, expires_at: Optional[float], meta: Optional[dict[str, typing.Any]] = None) :
+        conn: sqlite3.Connection = self._connection()
+        if meta is None:
+            conn.execute("UPDATE entries SET expires_at = ?, last_access = ? WHERE key = ?", (expires_at, time.time(), key))
+        else:
+            conn.execute(
+                "UPDATE entries SET expires_at = ?, meta = ?, last_access = ? WHERE key = ?",
+                (expires_at, json.dumps(meta), time.time(), key)
+            )
+
+    def delete(self, key: str) :
+        self._connection().execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self) :
+        self._connection().execute("DELETE FROM entries")
+
+    def total_bytes(self) -> int :
+        return int(self._connection().execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0])
+
+    def _evict(self, conn: sqlite3.Connection) :
+        excess: int = self.total_bytes() - self.max_bytes
+        if excess <= 0:
+            return
+        freed: int = 0
+        doomed: list[str] = []
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY last_access ASC"):
+            doomed.append(key)
+            freed += size
+            if freed >= excess:
+                break
+        conn.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key in doomed])
@@ -1,11 +1,40 @@
 from .api import Api
+from .rate_limit_scheduler import RateLimitScheduler
+from .github_token_pool import GitHubTokenPool
+from .repo_snapshot import RepoSnapshot
+from .credential_cache import CredentialCache
 import typing
+import re
 import requests
+from datetime import datetime, timedelta, timezone
 from os import getenv
 from sys import exit
 import configparser
 from typing import Optional
 
+# Connections of a repository read by get_repos_snapshot: the arguments and
+# selection of each. The first page comes with the batch query; later pages
+# are followed by cursor, one repository at a time.
+_GRAPHQL_CONNECTIONS: dict[str, tuple[str, str]] = {
+    "pullRequests": ("orderBy: {field: CREATED_AT, direction: DESC}", "nodes { number state createdAt mergedAt }"),
+    "languages": ("orderBy: {field: SIZE, direction: DESC}", "edges { size node { name } }"),
+}
+
+_GRAPHQL_REPO_FIELDS: str = """
+    stargazerCount
+    licenseInfo { spdxId }
+    mentionableUsers { totalCount }
+    defaultBranchRef {
+      name
+      target { ... on Commit { oid history(since: $since) { totalCount } } }
+    }
+    readme: object(expression: "HEAD:README.md") { ... on Blob { text } }
+    readmeLower: object(expression: "HEAD:readme.md") { ... on Blob { text } }
+"""
+
+_REPO_LINK_PATTERN = re.compile(r"(?:.*github\.com[/:])?([^/\s]+)/([^/\s#?]+?)(?:\.git)?(?:[/#?].*)?")
+
+
 class GitHubApi(Api) :
     """
     GitHubApi provides methods for interacting with the GitHub REST API.
@@ -13,29 +42,60 @@ class GitHubApi(Api) :
     and fetching pull requests for a given repository. It extends the base Api class
     to provide GitHub-specific endpoints and logic.
 
+    Every request waits on the RateLimitScheduler of its token, which is kept
+    up to date from the X-RateLimit headers of each response, so a long run
+    slows down near the hourly limit instead of failing once it is reached.
+
+    set_bearer_token (and so set_bearer_token_from_env and
+    set_bearer_token_from_file) accepts several tokens separated by commas
+    or newlines. Requests are then spread over a GitHubTokenPool, and a
+    rejected or exhausted token is replaced by the next best one.
+
     Constants:
     ----------
     BASE_URL (str): The base URL for the GitHub API.
     ENDPOINT (Dict[str, str]): Dictionary mapping logical endpoint names to URL paths.
+    GRAPHQL_BATCH_SIZE (int): Repositories fetched per GraphQL query by get_repos_snapshot.
+    credential_cache (CredentialCache | None): Where tokens accepted at startup are remembered; a token GitHub rejects is dropped from it.
 
     Attributes:
     -----------
     owner (str): The owner of the repository.
     repo (str): The name of the repository.
     rev (str): The branch or revision (default: "main").
+    priority (str): "normal", or "low" for calls that may be held back when the budget runs low.
+    token_pool (GitHubTokenPool | None): The tokens requests rotate over, when more than one was given.
+    graphql_cost (int): GraphQL rate-limit points spent by this client so far.
 
     Methods:
     --------
     __init__(owner, _repo, _rev="main", env_var=None):
         Initializes the GitHubApi instance with repository details.
+    check_token(github_token):
+        Returns whether GitHub accepts the token, recording its rate limit.
+    check_rate_limit(github_token):
+        Records the token's rate limit from /rate_limit, which does not count against it.
     verify_token(github_token):
-        Verifies the provided GitHub token by making an authenticated request.
+        Verifies the provided GitHub token (or comma separated tokens) by making authenticated requests; returns the accepted tokens.
+    set_bearer_token(token):
+        Sets one token, or a token pool when given a comma separated list.
+    forget_token(token):
+        Drops a token GitHub rejected from credential_cache.
+    scheduler:
+        Returns the RateLimitScheduler for this client's token.
     build_endpoint(endpoint, path="", filename=""):
         Constructs the API endpoint URL with provided parameters.
     set_bearer_token_from_env(var_name="GITHUB_TOKEN"):
         Sets the bearer token for authentication from an environment variable.
-    get_repo_pulls(state="all", endpoint="pull_requests"):
-        Retrieves pull requests for the repository with the specified state.
+    get_repo_pulls(state="all", endpoint="pull_requests", per_page=100, max_pages=10):
+        Retrieves pull requests for the repository with the specified state, following pages.
+    parse_repo(link):
+        Splits a GitHub URL or "owner/repo" string into (owner, repo).
+    graphql(query, variables):
+        Runs a GraphQL query and returns its data.
+    get_repos_snapshot(repos, since_days=90, max_pull_requests=100):
+        Fetches README, license, default branch SHA, contributor and activity counts and languages
+        of many repositories with one GraphQL query per GRAPHQL_BATCH_SIZE repositories.
     
     # GitHubApi: Implements GitHub-specific API interactions.
     """
@@ -46,41 +106,120 @@ class GitHubApi(Api) :
         "verify_token": "/user",
         "repo_content": "/repose/{owner}/{repo}/contents/{path}",
         "readme": "/repos/{owner}/{repo}/readme",
-        "pull_requests": "/repos/{owner}/{repo}/pulls"
+        "pull_requests": "/repos/{owner}/{repo}/pulls",
+        "rate_limit": "/rate_limit",
+        "graphql": "/graphql"
         # Add more endpoints as needed
     }
+    GRAPHQL_BATCH_SIZE: int = 20
+    credential_cache: Optional[CredentialCache] = None
 
     owner: str
     repo: str
     rev: str
+    priority: str
+    token_pool: Optional[GitHubTokenPool]
+    graphql_cost: int
 
     def __init__(self, owner: str, _repo: str, _rev: str = "main", env_var: Optional[str] = None):
         super().__init__(self.BASE_URL)
         self.owner = owner
         self.repo = _repo
         self.rev = _rev
-            
+        self.priority = "normal"
+        self.token_pool = None
+        self.graphql_cost = 0
+
+    def set_bearer_token(self, token: str) :
+        tokens: list[str] = GitHubTokenPool.parse(token)
+        self.token_pool = GitHubTokenPool(tokens) if len(tokens) > 1 else None
+        super().set_bearer_token(tokens[0] if tokens else token)
+
+    @property
+    def scheduler(self) -> RateLimitScheduler :
+        return RateLimitScheduler.for_token(self.bearer_token)
 
     @staticmethod
-    def verify_token(github_token: Optional[str]) :
-        endpoint:str = GitHubApi.ENDPOINT['verify_token']
-        url:str = GitHubApi.BASE_URL + endpoint
-        if github_token is None:
-            # log non-existant github token
-            exit(1)
+    def rate_limit_resource(url: str) -> str :
+        # GitHub budgets GraphQL separately from the REST endpoints
+        return "graphql" if url.rstrip("/").endswith("/graphql") else "core"
+
+    @staticmethod
+    def is_out_of_quota(status_code: int, headers: typing.Mapping[str, str]) -> bool :
+        return status_code in (403, 429) and headers.get("X-RateLimit-Remaining") == "0"
+
+    @staticmethod
+    def forget_token(token: Optional[str]) :
+        # A rejected token must be checked again next run instead of trusted for the rest of the TTL
+        if token and GitHubApi.credential_cache is not None:
+            GitHubApi.credential_cache.forget("github", token)
+
+    def _send(self, method: str, url: str, retry: bool = True, **kwargs: typing.Any) -> requests.Response :
+        pool: Optional[GitHubTokenPool] = self.token_pool
+        attempts: int = len(pool.tokens) + 1 if pool is not None else 1
+        resource: str = GitHubApi.rate_limit_resource(url)
+        for _ in range(attempts):
+            token: Optional[str] = pool.choose(resource) if pool is not None else self.bearer_token
+            if pool is not None:
+                kwargs["headers"] = dict(kwargs.get("headers") or {}, Authorization=f"Bearer {token}")
 
-        headers: Optional[dict[str, typing.Any]] = {}
-        headers["Authorization"] = f"Bearer {github_token}"
+            scheduler: RateLimitScheduler = RateLimitScheduler.for_token(token, resource)
+            scheduler.acquire(self.priority)
+            resp: requests.Response = super()._send(method, url, retry=retry, **kwargs)
+            scheduler.observe(resp.headers)
+            if resp.status_code == 401:
+                self.forget_token(token)
 
-        resp: requests.Response = requests.get(
+            if pool is None or token is None:
+                return resp
+            if resp.status_code == 401:
+                pool.mark_invalid(token)
+                if not pool.active_tokens():
+                    return resp
+            elif not self.is_out_of_quota(resp.status_code, resp.headers):
+                return resp
+            resp.close()
+        return resp
+
+    @staticmethod
+    def check_token(github_token: str) -> bool :
+        url:str = GitHubApi.BASE_URL + GitHubApi.ENDPOINT['verify_token']
+        resp: requests.Response = Api.session_for(url).get(
             url=url,
-            headers=headers,
+            headers={"Authorization": f"Bearer {github_token}"},
             timeout=Api._TIMEOUT
         )
+        # /user reports the token's rate limit for free; seed the scheduler with it
+        RateLimitScheduler.for_token(github_token).observe(resp.headers)
+        return resp.status_code != 401
 
-        if resp.status_code == 401:
+    @staticmethod
+    def check_rate_limit(github_token: str) :
+        url:str = GitHubApi.BASE_URL + GitHubApi.ENDPOINT['rate_limit']
+        resp: requests.Response = Api.session_for(url).get(
+            url=url,
+            headers={"Authorization": f"Bearer {github_token}"},
+            timeout=Api._TIMEOUT
+        )
+        RateLimitScheduler.for_token(github_token).observe(resp.headers)
+
+    @staticmethod
+    def verify_token(github_token: Optional[str]) -> list[str] :
+        if github_token is None:
+            # log non-existant github token
+            exit(1)
+
+        # Every token of a pool is checked; the run goes on as long as one is accepted
+        accepted: list[str] = []
+        for token in GitHubTokenPool.parse(github_token):
+            if GitHubApi.check_token(token):
+                accepted.append(token)
+            else:
+                GitHubApi.forget_token(token)
+        if not accepted:
             # Invalid github token
             exit(1)
+        return accepted
         
     def build_endpoint(self, endpoint: str, path: str = "", filename: str = "") -> str:
         endpoint_temp: Optional[str] = self.ENDPOINT.get(endpoint)
@@ -92,19 +231,114 @@ class GitHubApi(Api) :
 # Tokens will be pulled from env var
     def set_bearer_token_from_env(self, var_name:str = "GITHUB_TOKEN"):
         token: Optional[str] = getenv(var_name, None)
-        self.verify_token(token)
+        accepted: list[str] = self.verify_token(token)
         assert isinstance(token, str)
 
-        super().set_bearer_token(token)
+        self.set_bearer_token(",".join(accepted))
 
 
 
-    def get_repo_pulls(self, state:str = "all", endpoint:str = "pull_requests"):
+    def get_repo_pulls(self, state:str = "all", endpoint:str = "pull_requests", per_page: int = 100, max_pages: int = 10):
         url = self.build_endpoint(endpoint)
-        payload = {"state": state}
+        pulls: list[dict[str, typing.Any]] = []
+        for page in range(1, max_pages + 1):
+            payload = {"state": state, "per_page": per_page, "page": page}
+            resp = self.get(url, payload=payload)
+            pulls.extend(resp)
+            if len(resp) < per_page:
+                break
+        return pulls
 
-        resp = self.get(url, payload=payload)
-        return resp
+    @staticmethod
+    def parse_repo(link: str) -> tuple[str, str] :
+        match = _REPO_LINK_PATTERN.fullmatch(link.strip())
+        if not match:
+            raise ValueError(f"Not a GitHub repository: '{link}'")
+        return match.group(1), match.group(2)
+
+    def graphql(self, query: str, variables: Optional[dict[str, typing.Any]] = None) -> dict[str, typing.Any] :
+        # Queries only read, so they are safe to retry
+        resp: dict[str, typing.Any] = self.post(self.ENDPOINT["graphql"], payload={"query": query, "variables": variables or {}}, idempotent=True)
+        data: Optional[dict[str, typing.Any]] = resp.get("data")
+        if data is None:
+            raise Exception(f"GraphQL query failed: {resp.get('errors')}")
+        self.graphql_cost += int((data.get("rateLimit") or {}).get("cost", 0))
+        return data
+
+    def get_repos_snapshot(self, repos: list[typing.Union[str, tuple[str, str]]], since_days: int = 90,
+                           max_pull_requests: int = 100) -> dict[str, Optional[RepoSnapshot]] :
+        names: list[tuple[str, str]] = [self.parse_repo(repo) if isinstance(repo, str) else repo for repo in repos]
+        since: str = (datetime.now(timezone.utc) - timedelta(days=since_days)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        connections: str = "\n".join(
+            f"{name}(first: $first, {args}) {{ totalCount pageInfo {{ hasNextPage endCursor }} {selection} }}"
+            for name, (args, selection) in _GRAPHQL_CONNECTIONS.items()
+        )
+
+        snapshots: dict[str, Optional[RepoSnapshot]] = {}
+        for start in range(0, len(names), self.GRAPHQL_BATCH_SIZE):
+            batch: list[tuple[str, str]] = names[start:start + self.GRAPHQL_BATCH_SIZE]
+            declarations: str = ", ".join(f"$o{i}: String!, $n{i}: String!" for i in range(len(batch)))
+            aliases: str = "\n".join(f"r{i}: repository(owner: $o{i}, name: $n{i}) {{ ...RepoFields }}" for i in range(len(batch)))
+            query: str = (
+                f"query($since: GitTimestamp!, $first: Int!, {declarations}) {{\n rateLimit {{ cost }}\n{aliases}\n}}\n"
+                f"fragment RepoFields on Repository {{ {_GRAPHQL_REPO_FIELDS} {connections} }}"
+            )
+            variables: dict[str, typing.Any] = {"since": since, "first": max(1, min(100, max_pull_requests))}
+            for i, (owner, name) in enumerate(batch):
+                variables[f"o{i}"] = owner
+                variables[f"n{i}"] = name
+
+            data: dict[str, typing.Any] = self.graphql(query, variables)
+            for i, (owner, name) in enumerate(batch):
+                node: Optional[dict[str, typing.Any]] = data.get(f"r{i}")
+                # A repository that does not exist (or is not visible) comes back as null
+                snapshots[f"{owner}/{name}"] = self._parse_repo_node(owner, name, node, max_pull_requests) if node else None
+        return snapshots
+
+    def _follow_connection(self, owner: str, name: str, connection: str, cursor: Optional[str], limit: Optional[int]) -> list[dict[str, typing.Any]] :
+        args, selection = _GRAPHQL_CONNECTIONS[connection]
+        query: str = (
+            "query($owner: String!, $name: String!, $first: Int!, $after: String) {\n"
+            f" repository(owner: $owner, name: $name) {{ page: {connection}(first: $first, after: $after, {args}) "
+            f"{{ pageInfo {{ hasNextPage endCursor }} {selection} }} }}\n}}"
+        )
+        items: list[dict[str, typing.Any]] = []
+        while cursor is not None and (limit is None or len(items) < limit):
+            first: int = 100 if limit is None else min(100, limit - len(items))
+            page: dict[str, typing.Any] = self.graphql(query, {"owner": owner, "name": name, "first": first, "after": cursor})["repository"]["page"]
+            items.extend(page.get("nodes", page.get("edges", [])))
+            cursor = page["pageInfo"]["endCursor"] if page["pageInfo"]["hasNextPage"] else None
+        return items
+
+    def _parse_repo_node(self, owner: str, name: str, node: dict[str, typing.Any], max_pull_requests: int) -> RepoSnapshot :
+        pulls: dict[str, typing.Any] = node["pullRequests"]
+        recent_pulls: list[dict[str, typing.Any]] = list(pulls["nodes"])[:max_pull_requests]
+        if pulls["pageInfo"]["hasNextPage"] and len(recent_pulls) < max_pull_requests:
+            recent_pulls += self._follow_connection(owner, name, "pullRequests", pulls["pageInfo"]["endCursor"], max_pull_requests - len(recent_pulls))
+
+        languages: dict[str, typing.Any] = node["languages"]
+        language_edges: list[dict[str, typing.Any]] = list(languages["edges"])
+        if languages["pageInfo"]["hasNextPage"]:
+            language_edges += self._follow_connection(owner, name, "languages", languages["pageInfo"]["endCursor"], None)
+
+        branch: dict[str, typing.Any] = node.get("defaultBranchRef") or {}
+        target: dict[str, typing.Any] = branch.get("target") or {}
+        readme: dict[str, typing.Any] = node.get("readme") or node.get("readmeLower") or {}
+        spdx_id: Optional[str] = (node.get("licenseInfo") or {}).get("spdxId")
+        return RepoSnapshot(
+            owner=owner,
+            repo=name,
+            default_branch=branch.get("name"),
+            sha=target.get("oid"),
+            license=spdx_id.lower() if spdx_id else None,
+            readme=readme.get("text"),
+            stars=node.get("stargazerCount", 0),
+            contributors=(node.get("mentionableUsers") or {}).get("totalCount", 0),
+            recent_commits=(target.get("history") or {}).get("totalCount", 0),
+            pull_requests=pulls.get("totalCount", 0),
+            recent_pull_requests=recent_pulls,
+            languages={edge["node"]["name"]: edge["size"] for edge in language_edges},
+        )
 
 
 
@@ -0,0 +1,106 @@
+import math
+import re
+import threading
+import time
+import typing
+from typing import Optional
+
+from .rate_limit_scheduler import RateLimitScheduler
+
+
+class GitHubTokenPool :
+    """
+    A set of GitHub tokens used in rotation so a run gets the combined
+    hourly quota of all of them.
+
+    Each request goes to the token with the most budget left, as tracked by
+    that token's RateLimitScheduler. A token that is rejected (401) is taken
+    out of rotation for good; a token that has used up its quota is skipped
+    until its window resets. When every token is exhausted, the one that
+    resets first is used and its scheduler waits for the reset.
+
+    Attributes
+    ----------
+        tokens (list[str]): Every token in the pool, in the order given.
+
+    Methods
+    -------
+    parse(value:str)
+        Splits a comma, whitespace or newline separated list of tokens.
+    choose(resource:str)
+        Returns the token the next request against resource should use.
+    mark_invalid(token:str)
+        Takes a rejected token out of rotation.
+    active_tokens()
+        Returns the tokens still in rotation.
+    plan(expected_requests:int)
+        Spreads the run's expected requests over the schedulers of the active tokens.
+    describe()
+        Returns the pool's combined budget as a one-line summary for the log.
+    """
+
+    def __init__(self, tokens: typing.Iterable[str]):
+        self.tokens: list[str] = list(dict.fromkeys(token for token in tokens if token))
+        if not self.tokens:
+            raise ValueError("A GitHub token pool needs at least one token")
+        self._invalid: set[str] = set()
+        self._lock: threading.Lock = threading.Lock()
+
+    @staticmethod
+    def parse(value: str) -> list[str] :
+        return [token for token in re.split(r"[\s,]+", value.strip()) if token]
+
+    def __len__(self) -> int :
+        return len(self.active_tokens())
+
+    def active_tokens(self) -> list[str] :
+        with self._lock:
+            return [token for token in self.tokens if token not in self._invalid]
+
+    def mark_invalid(self, token: str) :
+        with self._lock:
+            self._invalid.add(token)
+
+    def choose(self, resource: str = "core") -> str :
+        active: list[str] = self.active_tokens()
+        if not active:
+            raise ValueError("Every GitHub token in the pool was rejected")
+
+        now: float = time.time()
+        best: Optional[str] = None
+        best_remaining: float = -1.0
+        soonest: tuple[float, str] = (math.inf, active[0])
+        for token in active:
+            scheduler: RateLimitScheduler = RateLimitScheduler.for_token(token, resource)
+            if scheduler.remaining is None:
+                # Not used yet: its budget is probably full
+                remaining: float = math.inf
+            elif scheduler.reset_at is not None and now >= scheduler.reset_at:
+                remaining = float(scheduler.limit or math.inf)
+            else:
+                remaining = float(scheduler.remaining)
+            if remaining > 0 and remaining > best_remaining:
+                best, best_remaining = token, remaining
+            reset_at: float = scheduler.reset_at if scheduler.reset_at is not None else math.inf
+            if reset_at < soonest[0]:
+                soonest = (reset_at, token)
+        return best if best is not None else soonest[1]
+
+    def plan(self, expected_requests: int) :
+        active: list[str] = self.active_tokens()
+        share: int = math.ceil(expected_requests / max(len(active), 1))
+        for token in active:
+            RateLimitScheduler.for_token(token).plan(share)
+
+    def describe(self) -> str :
+        active: list[str] = self.active_tokens()
+        if len(self.tokens) == 1:
+            return RateLimitScheduler.for_token(self.tokens[0]).describe()
+        known: list[RateLimitScheduler] = [
+            scheduler for scheduler in (RateLimitScheduler.for_token(token) for token in active)
+            if scheduler.remaining is not None
+        ]
+        summary: str = f"GitHub token pool: {len(active)} of {len(self.tokens)} tokens active"
+        if known:
+            summary += f", {sum(s.remaining or 0 for s in known)}/{sum(s.limit or 0 for s in known)} requests left on {len(known)} checked"
+        return summary
@@ -1,27 +1,55 @@
 from .api import Api
 import typing
-import requests
+import json
 import os
-import tempfile
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 from typing import Union
 
 
+# A full 40 character commit SHA; revisions like this are immutable
+_SHA_PATTERN = re.compile(r"[0-9a-f]{40}")
+
+
 class HuggingFaceApi(Api) :
     """
     A client for interacting with the Hugging Face API, providing methods to retrieve model and dataset information,
     list files, and download files from Hugging Face repositories.
 
+    Model info, file trees and model file contents are cached under the commit
+    SHA the revision resolves to. A SHA never changes, so those entries are
+    served without any request; only resolving the revision (a conditional
+    request when the Api cache is on) touches the network. Entries go to the
+    Api disk cache when it is enabled and to a small in-process LRU otherwise.
+
+    Files are streamed to disk byte for byte. Model files are checked against
+    the size and LFS sha256 listed for them at the pinned commit, and an
+    interrupted download resumes from its .part file on the next call.
+
+    A list of filenames is downloaded concurrently on a small thread pool. A
+    file that fails is left out of the returned paths and its error is kept
+    in download_errors, so one missing file does not cost the others.
+
     Constants:
     ----------
     BASE_URL (str): The base URL for the Hugging Face API.
     ENDPOINT (Dict[str, str]): Dictionary mapping endpoint names to their URL templates.
+    PIN_REVISIONS (bool): Whether model metadata is resolved to and cached by commit SHA.
+    REVISION_TTL (float): Seconds a branch or tag to SHA resolution is reused within a process.
+    MEMORY_CACHE_ENTRIES (int): Entries kept by the in-process cache when the disk cache is off.
+    CACHE_FILE_MAX_BYTES (int): Downloaded model files up to this size are also kept in the SHA cache.
+    DOWNLOAD_WORKERS (int): Files downloaded at once when download_file is given a list.
 
     Attributes:
     ----------
     namespace (str): The namespace (user or organization) of the Hugging Face repository.
     repo (str): The name of the model or dataset repository.
     rev (str): The revision (branch, tag, or commit) to use, defaults to "main".
+    download_errors (dict[str, str]): Files that failed in the last list download_file call, with the reason.
     
     Methods:
     --------
@@ -31,9 +59,11 @@ class HuggingFaceApi(Api) :
         Loads the bearer token from a configuration file for authentication.
     validate_model_fields() -> bool:
         Validates that the namespace, repo, and rev fields are set.
-    build_endpoint(endpoint: str, path: str = "", filename: str = "") -> str:
+    build_endpoint(endpoint: str, path: str = "", filename: str = "", rev: Optional[str] = None) -> str:
         Constructs the API endpoint URL using the provided parameters.
-    get_base_info(endpoint: str) -> dict[str, Any]:
+    resolve_revision() -> str:
+        Returns the commit SHA that the model revision currently points to.
+    get_base_info(endpoint: str, payload: Optional[dict] = None) -> dict[str, Any]:
         Retrieves base information from the specified endpoint.
     get_model_info(endpoint: str = "model_info") -> dict[str, Any]:
         Fetches metadata about the specified model repository.
@@ -41,12 +71,17 @@ class HuggingFaceApi(Api) :
         Fetches metadata about the specified dataset repository.
     get_files_info(endpoint: str, path: str = "") -> list[dict[str, Any]]:
         Lists files in the specified model or dataset repository path.
+    parse_files_info(response: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        Keeps the path and size of every file entry in a tree listing.
+    parse_siblings(info: dict[str, Any]) -> list[dict[str, Any]]:
+        Lists the path, size and LFS sha256 of every file in a model info response.
     get_model_files_info(endpoint: str = "model_files", path: str = "") -> list[dict[str, Any]]:
         Lists files in the model repository.
     get_dataset_files_info(endpoint: str = "dataset_files", path: str = "") -> list[dict[str, Any]]:
         Lists files in the dataset repository.
-    download_file(endpoint: str, filename: Union[str, list[str]], dest_dir: str = "tmp") -> Union[str, list[str]]:
-        Downloads a file or list of files from the specified endpoint to the destination directory.
+    download_file(endpoint: str, filename: Union[str, list[str]], dest_dir: str = "tmp", progress: Optional[Callable] = None, max_total_bytes: Optional[int] = None) -> Union[str, list[str]]:
+        Downloads a file or list of files from the specified endpoint to the destination directory. progress is called
+        with (filename, bytes_done, bytes_total) as chunks arrive; a list download stops fetching once max_total_bytes is reached.
     download_model_file(filename: Union[str, list[str]], dest_dir: str = "tmp", endpoint: str = "model_file_download") -> Union[str, list[str]]:
         Downloads a model file or files from the model repository.
     download_dataset_file(filename: Union[str, list[str]], dest_dir: str = "tmp", endpoint: str = "dataset_file_download") -> Union[str, list[str]]:
@@ -56,6 +91,7 @@ class HuggingFaceApi(Api) :
     BASE_URL: str = "https://huggingface.co"
     ENDPOINT: typing.Dict[str, str] = {
         "model_info": "api/models/{namespace}/{repo}",
+        "model_revision": "api/models/{namespace}/{repo}/revision/{rev}",
         "model_files": "api/models/{namespace}/{repo}/tree/{rev}/{path}",
         "model_file_download": "{namespace}/{repo}/resolve/{rev}/{filename}",
         "dataset_info": "api/dataset/{namespace}/{repo}",
@@ -64,15 +100,28 @@ class HuggingFaceApi(Api) :
         # Add more endpoints as needed
     }
 
+    PIN_REVISIONS: bool = True
+    REVISION_TTL: float = 300.0
+    MEMORY_CACHE_ENTRIES: int = 512
+    CACHE_FILE_MAX_BYTES: int = 1024 * 1024
+    DOWNLOAD_WORKERS: int = 8
+
+    _resolved_revisions: dict[tuple[str, str, str], tuple[str, float]] = {}
+    _memory_cache: "OrderedDict[str, bytes]" = OrderedDict()
+    _cache_lock: threading.Lock = threading.Lock()
+    _download_locks: dict[str, threading.Lock] = {}
+
     namespace: str
     repo: str
     rev: str
+    download_errors: dict[str, str]
 
     def __init__(self, _namespace: str, _repo: str, _rev: str = "main"):
         super().__init__(self.BASE_URL)
         self.namespace = _namespace
         self.repo = _repo
         self.rev = _rev
+        self.download_errors = {}
 
 # Tokens will be pulled from env var
     def set_bearer_token_from_file(self, filepath: str, section: str = "huggingface", key: str = "bearer_token"):
@@ -85,23 +134,83 @@ class HuggingFaceApi(Api) :
             return False
         return True
 
-    def build_endpoint(self, endpoint: str, path: str = "", filename: str = "") -> str:
+    def build_endpoint(self, endpoint: str, path: str = "", filename: str = "", rev: Optional[str] = None) -> str:
         endpoint_temp: Optional[str] = self.ENDPOINT.get(endpoint)
         if not endpoint_temp:
             raise ValueError(f"Invalid Endpoint: '{endpoint_temp}' ")
-        api_endpoint: str = endpoint_temp.format(namespace=self.namespace, repo=self.repo, rev=self.rev, path=path, filename=filename)
+        api_endpoint: str = endpoint_temp.format(namespace=self.namespace, repo=self.repo, rev=rev or self.rev, path=path, filename=filename)
         return api_endpoint
 
-    def get_base_info(self, endpoint: str) -> dict[str, typing.Any] :
+    def _pinned_key(self, sha: str, kind: str) -> str:
+        return f"hf:{self.namespace}/{self.repo}@{sha}:{kind}"
+
+    def _load_pinned(self, sha: str, kind: str) -> Optional[bytes]:
+        key: str = self._pinned_key(sha, kind)
+        if Api._cache is not None:
+            entry = Api._cache.get(key)
+            return entry.body if entry is not None else None
+        with self._cache_lock:
+            body: Optional[bytes] = self._memory_cache.get(key)
+            if body is not None:
+                self._memory_cache.move_to_end(key)
+            return body
+
+    def _store_pinned(self, sha: str, kind: str, body: bytes):
+        key: str = self._pinned_key(sha, kind)
+        if Api._cache is not None:
+            # Content at a commit SHA never changes, so the entry never expires
+            Api._cache.put(key, body, {"immutable": True}, None)
+            return
+        with self._cache_lock:
+            self._memory_cache[key] = body
+            self._memory_cache.move_to_end(key)
+            while len(self._memory_cache) > self.MEMORY_CACHE_ENTRIES:
+                self._memory_cache.popitem(last=False)
+
+    def resolve_revision(self) -> str:
+        self.validate_model_fields()
+        if _SHA_PATTERN.fullmatch(self.rev):
+            return self.rev
+
+        key: tuple[str, str, str] = (self.namespace, self.repo, self.rev)
+        resolved: Optional[tuple[str, float]] = self._resolved_revisions.get(key)
+        if resolved is not None and time.time() - resolved[1] < self.REVISION_TTL:
+            return resolved[0]
+
+        # blobs=true adds sizes and LFS hashes to the sibling list
+        info: dict[str, typing.Any] = self.get(self.build_endpoint("model_revision"), payload={"blobs": "true"})
+        sha: Optional[str] = info.get("sha") if isinstance(info, dict) else None
+        if not sha:
+            raise Exception(f"Could not resolve revision '{self.rev}' of {self.namespace}/{self.repo}")
+
+        HuggingFaceApi._resolved_revisions[key] = (sha, time.time())
+        # The revision endpoint already returns the full model info at that commit
+        self._store_pinned(sha, "model_info", json.dumps(info).encode())
+        return sha
+
+    def _get_pinned_json(self, kind: str, endpoint: str, path: str = "", payload: Optional[dict[str, typing.Any]] = None) -> typing.Any:
+        sha: str = self.resolve_revision()
+        cached: Optional[bytes] = self._load_pinned(sha, kind)
+        if cached is not None:
+            return json.loads(cached)
+
+        response: typing.Any = self.get(self.build_endpoint(endpoint, path=path, rev=sha), payload=payload or {})
+        self._store_pinned(sha, kind, json.dumps(response).encode())
+        return response
+
+    def get_base_info(self, endpoint: str, payload: Optional[dict[str, typing.Any]] = None) -> dict[str, typing.Any] :
         # self.validate_model_fields()
         
         api_endpoint: str = self.build_endpoint(endpoint)
-        return self.get(api_endpoint)
+        return self.get(api_endpoint, payload=payload or {})
 
     def get_model_info(self, endpoint: str = "model_info") -> dict[str, typing.Any] :
         self.validate_model_fields()
-        
-        return self.get_base_info(endpoint)
+
+        if self.PIN_REVISIONS and endpoint == "model_info":
+            return self._get_pinned_json("model_info", "model_revision", payload={"blobs": "true"})
+        # blobs=true here too, or the siblings carry no sizes and the model looks empty
+        return self.get_base_info(endpoint, payload={"blobs": "true"} if endpoint == "model_info" else None)
     
     def get_dataset_info(self, endpoint: str = "dataset_info") -> dict[str, typing.Any] :
         
@@ -113,6 +222,22 @@ class HuggingFaceApi(Api) :
         api_endpoint: str = self.build_endpoint(endpoint, path=path)
 
         response: list[dict[str, typing.Any]] = self.get(api_endpoint, payload={'recursive': 'True'})
+        return self.parse_files_info(response)
+
+    @staticmethod
+    def parse_siblings(info: dict[str, typing.Any]) -> list[dict[str, typing.Any]]:
+        file_infos: list[dict[str, typing.Any]] = [
+            {
+                "path": sibling["rfilename"],
+                "size": sibling.get("size", None),
+                "sha256": (sibling.get("lfs") or {}).get("sha256", None),
+            }
+            for sibling in info.get("siblings", []) if "rfilename" in sibling
+        ]
+        return file_infos
+
+    @staticmethod
+    def parse_files_info(response: list[dict[str, typing.Any]]) -> list[dict[str, typing.Any]]:
         file_infos: list[dict[str, typing.Any]] = [
             {"path": item["path"], "size": item.get("size", None)}
             for item in response if item.get("type") == "file"
@@ -121,14 +246,19 @@ class HuggingFaceApi(Api) :
     
     def get_model_files_info(self, endpoint:str = "model_files", path: str = "") -> list[dict[str, typing.Any]]:
         self.validate_model_fields()
-        
+
+        if self.PIN_REVISIONS and endpoint == "model_files":
+            response = self._get_pinned_json(f"tree:{path}", endpoint, path=path, payload={'recursive': 'True'})
+            return self.parse_files_info(response)
         return self.get_files_info(endpoint, path)
     
     def get_dataset_files_info(self, endpoint:str = "dataset_files", path: str = "") -> list[dict[str, typing.Any]]:
         
         return self.get_files_info(endpoint, path)
 
-    def download_file(self, endpoint: str, filename: Union[str, list[str]], dest_dir: str = "tmp") -> Union[str, list[str]]:
+    def download_file(self, endpoint: str, filename: Union[str, list[str]], dest_dir: str = "tmp",
+                      progress: Optional[typing.Callable[[str, int, Optional[int]], None]] = None,
+                      max_total_bytes: Optional[int] = None) -> Union[str, list[str]]:
         file_path: str = ""
         endpoint_temp: Optional[str] = self.ENDPOINT.get(endpoint)
         if not endpoint_temp:
@@ -138,26 +268,104 @@ class HuggingFaceApi(Api) :
                     os.makedirs(dest_dir, exist_ok=True)
 
         if isinstance(filename, list):
-            file_paths: list[str] = []
-            for fname in filename:
-                api_endpoint = self.build_endpoint(endpoint, filename=fname)
-                content = str(self.get(api_endpoint))
-                fname = fname.replace('/', '_')
-                file_path = os.path.join(dest_dir, f"{self.repo}_{fname}")
+            return self._download_many(endpoint, filename, dest_dir, progress, max_total_bytes)
+
+        sha: Optional[str] = self.resolve_revision() if self.PIN_REVISIONS and endpoint == "model_file_download" else None
+        file_path = os.path.join(dest_dir, f"{self._local_name(filename, sha)}.txt")
+        return self._download_to(endpoint, filename, file_path, progress)
+
+    def _local_name(self, filename: str, sha: Optional[str]) -> str:
+        # Models with the same repo name in different namespaces, or at different commits, must not share a file
+        prefix: str = f"{self.namespace}_{self.repo}_{sha[:12]}" if sha is not None else f"{self.namespace}_{self.repo}"
+        return f"{prefix}_{filename.replace('/', '_')}"
+
+    def _download_many(self, endpoint: str, filenames: list[str], dest_dir: str,
+                       progress: Optional[typing.Callable[[str, int, Optional[int]], None]],
+                       max_total_bytes: Optional[int]) -> list[str]:
+        self.download_errors = {}
+        sha: Optional[str] = None
+        if self.PIN_REVISIONS and endpoint == "model_file_download":
+            # Resolve once up front rather than once per worker thread
+            sha = self.resolve_revision()
+
+        lock: threading.Lock = threading.Lock()
+        received: dict[str, int] = {}
+
+        def track(fname: str, done: int, total: Optional[int]):
+            with lock:
+                received[fname] = done
+                over_budget: bool = max_total_bytes is not None and sum(received.values()) > max_total_bytes
+            if over_budget:
+                raise Exception(f"Download budget of {max_total_bytes} bytes exceeded")
+            if progress is not None:
+                progress(fname, done, total)
+
+        def fetch(fname: str) -> Optional[str]:
+            file_path: str = os.path.join(dest_dir, self._local_name(fname, sha))
+            expected_size: Optional[int] = self._expected_blob(sha, fname)[0] if sha is not None else None
+            with lock:
+                if max_total_bytes is not None and expected_size is not None \
+                        and sum(received.values()) + expected_size > max_total_bytes:
+                    self.download_errors[fname] = f"Skipped: {expected_size} bytes would exceed the download budget of {max_total_bytes} bytes"
+                    return None
+            try:
+                return self._download_to(endpoint, fname, file_path, track)
+            except Exception as e:
+                with lock:
+                    self.download_errors[fname] = str(e)
+                return None
+
+        workers: int = max(1, min(self.DOWNLOAD_WORKERS, len(filenames)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results: list[Optional[str]] = list(executor.map(fetch, filenames))
+        return [file_path for file_path in results if file_path is not None]
+
+    def _expected_blob(self, sha: str, filename: str) -> tuple[Optional[int], Optional[str]]:
+        info: Optional[bytes] = self._load_pinned(sha, "model_info")
+        if info is None:
+            return None, None
+        for file_info in self.parse_siblings(json.loads(info)):
+            if file_info["path"] == filename:
+                return file_info["size"], file_info["sha256"]
+        return None, None
+
+    def _download_to(self, endpoint: str, filename: str, file_path: str,
+                     progress: Optional[typing.Callable[[str, int, Optional[int]], None]] = None) -> str:
+        with self._cache_lock:
+            lock: threading.Lock = HuggingFaceApi._download_locks.setdefault(os.path.abspath(file_path), threading.Lock())
+        # The same model evaluated twice at once shares one file and one .part; download it once at a time
+        with lock:
+            return self._fetch_to(endpoint, filename, file_path, progress)
+
+    def _fetch_to(self, endpoint: str, filename: str, file_path: str,
+                  progress: Optional[typing.Callable[[str, int, Optional[int]], None]] = None) -> str:
+        sha: Optional[str] = None
+        size: Optional[int] = None
+        sha256: Optional[str] = None
+        part_path: Optional[str] = None
+        if self.PIN_REVISIONS and endpoint == "model_file_download":
+            sha = self.resolve_revision()
+            cached: Optional[bytes] = self._load_pinned(sha, f"file:{filename}")
+            if cached is not None:
                 with open(file_path, "wb") as f:
-                    f.write(content.encode())
-                file_paths.append(file_path)
-            return file_paths
+                    f.write(cached)
+                if progress is not None:
+                    progress(filename, len(cached), len(cached))
+                return file_path
+            size, sha256 = self._expected_blob(sha, filename)
+            # Only resume a partial file that came from the same commit
+            part_path = f"{file_path}.{sha[:12]}.part"
 
-        api_endpoint = self.build_endpoint(endpoint, filename=filename)
-        content = self.get(api_endpoint)
-        
-        file_path: str = os.path.join(dest_dir, f"{self.repo}_{filename}.txt")
-        with open(file_path, "wb") as f:
-            f.write(content.encode())
+        api_endpoint: str = self.build_endpoint(endpoint, filename=filename, rev=sha)
+        on_chunk = (lambda done, total: progress(filename, done, total)) if progress is not None else None
+        written: int = self.download(api_endpoint, file_path, expected_size=size, expected_sha256=sha256,
+                                     part_path=part_path, progress=on_chunk)
 
+        if sha is not None and written <= self.CACHE_FILE_MAX_BYTES:
+            with open(file_path, "rb") as f:
+                self._store_pinned(sha, f"file:{filename}", f.read())
         return file_path
-    
+
     def download_model_file(self, filename: Union[str, list[str]], dest_dir: str = "tmp", endpoint: str = "model_file_download") -> Union[str, list[str]]:
         return self.download_file(endpoint, filename, dest_dir)
     
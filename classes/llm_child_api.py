@@ -37,7 +37,25 @@ class GenAiChatApi(Api):
         Returns:
             Optional[str]: The text content of the model's reply, or None if not found.
         """
-        payload = {
+        payload = self.build_payload(content)
+
+        try:
+            # Call the parent class's post method; a completion has no side effects, so it is safe to retry
+            response_data = self.post(endpoint=self.CHAT_ENDPOINT, payload=payload, idempotent=True)
+            return self.extract_content(response_data)
+
+        except Exception as e:
+            #print(f"An error occurred while getting chat completion: {e}")
+            return None
+
+    def build_payload(self, content: str) -> dict:
+        """
+        Builds the chat completion request body for a single user message.
+
+        Args:
+            content (str): The user's message content.
+        """
+        return {
             "model": self.model,
             "messages": [
                 {
@@ -48,25 +66,28 @@ class GenAiChatApi(Api):
             "stream": False
         }
 
-        try:
-            # Call the parent class's post method
-            response_data = self.post(endpoint=self.CHAT_ENDPOINT, payload=payload)
-            
-            # Safely navigate the JSON structure to find the content
-            # response['choices'][0]['message']['content']
-            choices = response_data.get("choices")
-            if choices and isinstance(choices, list) and len(choices) > 0:
-                first_choice = choices[0]
-                message = first_choice.get("message")
-                if message and isinstance(message, dict):
-                    return message.get("content")
-
-            print("Warning: Could not find assistant's message in the API response.")
-            return None
+    @staticmethod
+    def extract_content(response_data: dict) -> str:
+        """
+        Pulls the assistant's text out of a chat completion response.
 
-        except Exception as e:
-            #print(f"An error occurred while getting chat completion: {e}")
-            return None
+        Args:
+            response_data (dict): The decoded JSON response.
+
+        Returns:
+            Optional[str]: The text content of the model's reply, or None if not found.
+        """
+        # Safely navigate the JSON structure to find the content
+        # response['choices'][0]['message']['content']
+        choices = response_data.get("choices")
+        if choices and isinstance(choices, list) and len(choices) > 0:
+            first_choice = choices[0]
+            message = first_choice.get("message")
+            if message and isinstance(message, dict):
+                return message.get("content")
+
+        print("Warning: Could not find assistant's message in the API response.")
+        return None
 
 
 
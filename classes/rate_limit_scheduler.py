@@ -0,0 +1,182 @@
+import asyncio
+import hashlib
+import threading
+import time
+import typing
+from typing import Optional
+
+
+class RateLimitScheduler :
+    """
+    Paces requests made with one API token so its rate-limit budget lasts
+    the whole run.
+
+    The budget is read from the X-RateLimit-Limit, -Remaining and -Reset
+    headers of every response. Once the remaining budget is smaller than the
+    requests still expected (or, when that is unknown, below PACE_FRACTION
+    of the limit), requests are spread evenly over the time left until the
+    reset. Low priority requests are held until the reset once only
+    LOW_PRIORITY_RESERVE of the limit is left, keeping that share for the
+    calls the run cannot do without. With the budget spent, every request
+    waits for the reset instead of failing.
+
+    One scheduler is shared per token and rate-limit resource ("core" for
+    REST, "graphql" for GraphQL, which GitHub budgets separately); see
+    for_token().
+
+    Constants
+    ---------
+        PACE_FRACTION: Share of the limit below which requests are paced when the expected demand is unknown
+        LOW_PRIORITY_RESERVE: Share of the limit that low priority requests may not use
+
+    Attributes
+    ----------
+        resource (str): The X-RateLimit-Resource this scheduler tracks.
+        limit (int | None): Requests allowed per window, as last reported.
+        remaining (int | None): Requests left in the current window.
+        reset_at (float | None): Unix time at which the window resets.
+        expected_requests (int | None): Requests the run still expects to make, if known.
+
+    Methods
+    -------
+    for_token(token:str, resource:str)
+        Returns the scheduler shared by every client using token for resource.
+    observe(headers:Mapping[str, str])
+        Updates the budget from a response's rate-limit headers.
+    plan(expected_requests:int)
+        Sets how many more requests the run expects to make.
+    delay(priority:str)
+        Returns how long a request of the given priority would have to wait now.
+    acquire(priority:str)
+        Blocks until a request may be sent, then counts it against the budget.
+    acquire_async(priority:str)
+        Coroutine counterpart of acquire().
+    forecast()
+        Returns the budget, the expected demand and whether the run fits in it.
+    describe()
+        Returns forecast() as a one-line summary for the log.
+    """
+
+    PACE_FRACTION: float = 0.25
+    LOW_PRIORITY_RESERVE: float = 0.1
+
+    _schedulers: dict[str, "RateLimitScheduler"] = {}
+    _schedulers_lock: threading.Lock = threading.Lock()
+
+    def __init__(self, clock: typing.Callable[[], float] = time.time, sleep: typing.Callable[[float], None] = time.sleep, resource: str = "core"):
+        self.resource: str = resource
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset_at: Optional[float] = None
+        self.expected_requests: Optional[int] = None
+        self._clock = clock
+        self._sleep = sleep
+        self._last_sent: float = 0.0
+        self._lock: threading.Lock = threading.Lock()
+
+    @classmethod
+    def for_token(cls, token: Optional[str], resource: str = "core") -> "RateLimitScheduler" :
+        fingerprint: str = hashlib.sha256(token.encode()).hexdigest()[:16] if token else ""
+        key: str = f"{fingerprint}:{resource}"
+        with cls._schedulers_lock:
+            scheduler: Optional[RateLimitScheduler] = cls._schedulers.get(key)
+            if scheduler is None:
+                scheduler = cls(resource=resource)
+                cls._schedulers[key] = scheduler
+            return scheduler
+
+    def observe(self, headers: typing.Mapping[str, str]) :
+        remaining: Optional[str] = headers.get("X-RateLimit-Remaining")
+        if remaining is None or not remaining.isdigit():
+            return
+        if headers.get("X-RateLimit-Resource", self.resource) != self.resource:
+            return
+        with self._lock:
+            self.remaining = int(remaining)
+            limit: Optional[str] = headers.get("X-RateLimit-Limit")
+            if limit is not None and limit.isdigit():
+                self.limit = int(limit)
+            reset: Optional[str] = headers.get("X-RateLimit-Reset")
+            if reset is not None and reset.isdigit():
+                self.reset_at = float(reset)
+
+    def plan(self, expected_requests: int) :
+        with self._lock:
+            self.expected_requests = max(expected_requests, 0)
+
+    def _delay(self, priority: str, now: float) -> float :
+        if self.remaining is None or self.reset_at is None or now >= self.reset_at:
+            return 0.0
+        window: float = self.reset_at - now
+        if self.remaining <= 0:
+            return window
+
+        limit: int = self.limit or self.remaining
+        if priority == "low" and self.remaining <= limit * self.LOW_PRIORITY_RESERVE:
+            return window
+
+        if self.expected_requests is not None:
+            tight: bool = self.expected_requests > self.remaining
+        else:
+            tight = self.remaining < limit * self.PACE_FRACTION
+        if not tight:
+            return 0.0
+        interval: float = window / self.remaining
+        return max(self._last_sent + interval - now, 0.0)
+
+    def delay(self, priority: str = "normal") -> float :
+        with self._lock:
+            return self._delay(priority, self._clock())
+
+    def _try_reserve(self, priority: str) -> float :
+        with self._lock:
+            now: float = self._clock()
+            wait: float = self._delay(priority, now)
+            if wait <= 0:
+                # Count the request now so concurrent callers see the smaller budget
+                if self.remaining is not None and (self.reset_at is None or now < self.reset_at):
+                    self.remaining -= 1
+                if self.expected_requests:
+                    self.expected_requests -= 1
+                self._last_sent = now
+            return wait
+
+    def acquire(self, priority: str = "normal") :
+        while True:
+            wait: float = self._try_reserve(priority)
+            if wait <= 0:
+                return
+            self._sleep(wait)
+
+    async def acquire_async(self, priority: str = "normal") :
+        while True:
+            wait: float = self._try_reserve(priority)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def forecast(self) -> dict[str, typing.Any] :
+        with self._lock:
+            now: float = self._clock()
+            reset_in: Optional[float] = max(self.reset_at - now, 0.0) if self.reset_at is not None else None
+            fits: Optional[bool] = None
+            if self.remaining is not None and self.expected_requests is not None:
+                fits = self.expected_requests <= self.remaining
+            return {
+                "limit": self.limit,
+                "remaining": self.remaining,
+                "reset_in": reset_in,
+                "expected_requests": self.expected_requests,
+                "fits": fits,
+            }
+
+    def describe(self) -> str :
+        forecast: dict[str, typing.Any] = self.forecast()
+        if forecast["remaining"] is None:
+            return "GitHub rate limit unknown until the first response"
+        summary: str = f"GitHub rate limit: {forecast['remaining']}/{forecast['limit']} left, resets in {forecast['reset_in']:.0f}s"
+        if forecast["expected_requests"] is None:
+            return summary
+        if forecast["fits"]:
+            return f"{summary}; {forecast['expected_requests']} requests expected, no pacing needed"
+        return f"{summary}; {forecast['expected_requests']} requests expected, pacing until the reset"
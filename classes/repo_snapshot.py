@@ -0,0 +1,37 @@
+import typing
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+@dataclass
+class RepoSnapshot :
+    """
+    What the metrics need to know about one GitHub repository, as returned
+    by GitHubApi.get_repos_snapshot.
+
+    Attributes:
+        owner (str): The owner of the repository.
+        repo (str): The name of the repository.
+        default_branch (str | None): The name of the default branch.
+        sha (str | None): The commit the default branch points to.
+        license (str | None): The lowercase SPDX id of the license, e.g. "mit".
+        readme (str | None): The text of the README on the default branch.
+        stars (int): The number of stargazers.
+        contributors (int): Users GitHub lists as mentionable (contributors and collaborators).
+        recent_commits (int): Commits on the default branch since the snapshot's cut-off date.
+        pull_requests (int): Total pull requests ever opened.
+        recent_pull_requests (list[dict]): The newest pull requests: number, state, createdAt and mergedAt.
+        languages (dict[str, int]): Bytes of code per language, largest first.
+    """
+    owner: str
+    repo: str
+    default_branch: Optional[str] = None
+    sha: Optional[str] = None
+    license: Optional[str] = None
+    readme: Optional[str] = None
+    stars: int = 0
+    contributors: int = 0
+    recent_commits: int = 0
+    pull_requests: int = 0
+    recent_pull_requests: list[dict[str, typing.Any]] = field(default_factory=list)
+    languages: dict[str, int] = field(default_factory=dict)
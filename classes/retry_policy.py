@@ -0,0 +1,121 @@
+import email.utils
+import os
+import random
+import threading
+import time
+import weakref
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional
+
+# Every policy, so a forked worker can replace locks that were held mid-update
+# by another parent thread at fork time and would otherwise never be released.
+_policies: list[weakref.ref] = []
+
+def _reset_policy_locks() :
+    for ref in _policies:
+        policy = ref()
+        if policy is not None:
+            policy._lock = threading.Lock()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_policy_locks)
+
+
+@dataclass
+class RetryPolicy :
+    """
+    When and how long to wait before retrying a failed request.
+
+    Delays grow exponentially with full jitter, so workers that failed
+    together do not retry together, and a Retry-After header from the server
+    always wins. Every retry also spends from a per-host budget: once a host
+    has used host_budget retries within budget_window seconds, further
+    failures are raised straight away instead of piling more load onto a
+    host that is already struggling.
+
+    Attributes
+    ----------
+        max_attempts (int): Total attempts per request, including the first.
+        backoff_base (float): Seconds of the first backoff; doubled on each retry.
+        backoff_max (float): Upper bound on any single wait, including Retry-After.
+        retry_statuses (frozenset[int]): Response codes worth retrying.
+        host_budget (int): Retries allowed per host within budget_window.
+        budget_window (float): Length in seconds of the sliding budget window.
+
+    Methods
+    -------
+    should_retry(status_code:Optional[int])
+        Returns whether a response code (or None for a connection error) is transient.
+    delay(attempt:int, retry_after:Optional[str])
+        Returns the seconds to wait before the given retry attempt.
+    take_budget(host:str)
+        Spends one retry from host's budget; returns False when it is used up.
+    record(endpoint:str, retried:bool, gave_up:bool)
+        Counts the outcome of a request against its endpoint.
+    stats()
+        Returns {endpoint: {"retries", "gave_up"}} for this process.
+    """
+
+    max_attempts: int = 4
+    backoff_base: float = 0.5
+    backoff_max: float = 30.0
+    retry_statuses: frozenset = frozenset({429, 500, 502, 503, 504})
+    host_budget: int = 20
+    budget_window: float = 60.0
+
+    _spent: dict = field(default_factory=dict, init=False, repr=False, compare=False)
+    _stats: dict = field(default_factory=dict, init=False, repr=False, compare=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
+
+    def __post_init__(self) :
+        _policies.append(weakref.ref(self))
+
+    def should_retry(self, status_code: Optional[int]) -> bool :
+        return status_code is None or status_code in self.retry_statuses
+
+    def delay(self, attempt: int, retry_after: Optional[str] = None) -> float :
+        if retry_after:
+            wait: Optional[float] = self.parse_retry_after(retry_after)
+            if wait is not None:
+                return min(max(wait, 0.0), self.backoff_max)
+        return random.uniform(0.0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    @staticmethod
+    def parse_retry_after(value: str) -> Optional[float] :
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            when = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return when.timestamp() - time.time()
+
+    def take_budget(self, host: str) -> bool :
+        now: float = time.monotonic()
+        with self._lock:
+            spent: deque = self._spent.setdefault(host, deque())
+            while spent and now - spent[0] > self.budget_window:
+                spent.popleft()
+            if len(spent) >= self.host_budget:
+                return False
+            spent.append(now)
+            return True
+
+    def record(self, endpoint: str, retries: int, gave_up: bool) :
+        if not retries and not gave_up:
+            return
+        with self._lock:
+            counts: dict[str, int] = self._stats.setdefault(endpoint, {"retries": 0, "gave_up": 0})
+            counts["retries"] += retries
+            counts["gave_up"] += int(gave_up)
+
+    def stats(self) -> dict[str, dict[str, int]] :
+        with self._lock:
+            return {endpoint: dict(counts) for endpoint, counts in self._stats.items()}
+
+    def reset(self) :
+        with self._lock:
+            self._spent.clear()
+            self._stats.clear()
@@ -1,6 +1,69 @@
+from dataclasses import dataclass, field
 from typing import Dict, Any
 from classes.hugging_face_api import HuggingFaceApi  # adjust import to where your class is saved
 
+
+@dataclass
+class ModelSnapshot:
+    """
+    Everything the metrics need about one model revision, gathered in one pass.
+
+    Attributes:
+        namespace (str): The user or organization owning the model.
+        repo (str): The model repository name.
+        rev (str): The requested revision.
+        sha (str): The commit SHA the revision resolved to.
+        size (float): Total size in bytes of every file in the repository.
+        license (str): The license tag, or "" if the model declares none.
+        readme_path (str): Local path of the downloaded README, or "" if the model has none.
+        files (list[dict[str, Any]]): Path, size and LFS sha256 of every file.
+    """
+    namespace: str
+    repo: str
+    rev: str
+    sha: str
+    size: float
+    license: str
+    readme_path: str
+    files: list[Dict[str, Any]] = field(default_factory=list)
+
+
+def license_from_info(info: Dict[str, Any]) -> str:
+    for t in info.get("tags", []):
+        if t.startswith("license:"):
+            return t.split("license:")[-1]
+    card_license: Any = (info.get("cardData") or {}).get("license")
+    return card_license if isinstance(card_license, str) else ""
+
+
+def get_model_snapshot(namespace: str, repo: str, rev: str = "main", dest_dir: str = "tmp") -> ModelSnapshot:
+    """
+    Builds a ModelSnapshot from a single model info request at the resolved
+    commit: its sibling list already carries the file sizes and its tags the
+    license, so no tree walk is needed. Only the README is fetched separately,
+    and it is served from the SHA cache when the commit has been seen before.
+    """
+    api = HuggingFaceApi(namespace, repo, rev)
+
+    info: Dict[str, Any] = api.get_model_info()
+    files: list[Dict[str, Any]] = api.parse_siblings(info)
+    size: float = sum(f["size"] or 0 for f in files)
+
+    readme_path: str = ""
+    if any(f["path"] == "README.md" for f in files):
+        readme_path = api.download_file("model_file_download", "README.md", dest_dir)
+
+    return ModelSnapshot(
+        namespace=namespace,
+        repo=repo,
+        rev=rev,
+        sha=info.get("sha", ""),
+        size=size,
+        license=license_from_info(info),
+        readme_path=readme_path,
+        files=files,
+    )
+
 def get_model_size(namespace: str, repo: str, rev: str = "main") -> float:
     api = HuggingFaceApi(namespace, repo, rev)
     # api.set_bearer_token_from_file("token.ini")  # <-- load token here
@@ -29,12 +92,7 @@ def get_model_README(namespace: str, repo: str, rev: str = "main") -> str:
 def get_model_license(namespace: str, repo: str, rev: str = "main") -> str:
     api = HuggingFaceApi(namespace, repo, rev)
 
-    tags = api.get_model_info().get("tags", [])
-
-    for t in tags:
-        if t.startswith("license:"):
-            return t.split("license:")[-1]                 
-    return ""
+    return license_from_info(api.get_model_info())
 
 if __name__ == "__main__":
     metrics = get_model_license("openai-community", "gpt2")
@@ -1,10 +1,45 @@
+import asyncio
 import multiprocessing
+import multiprocessing.pool
+import multiprocessing.queues
+import queue
 import re
 import os
+import sys
+import json
 import importlib
+import subprocess
 import time
 import inspect
+import threading
 from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Iterable, Optional, Union
+
+# Metric functions and log queue set up by each pool worker (see _init_pool_worker).
+_worker_functions: dict = {}
+_worker_log_queue = None
+
+# Lists every metric of a metrics package so it can be planned without importing it.
+MANIFEST_FILENAME = "manifest.json"
+
+# Where a metric runs: in the calling thread, on the shared thread pool, on the
+# shared event loop (async def metrics), or in its own process.
+EXECUTORS = ("inline", "thread", "async", "process")
+DEFAULT_EXECUTOR = "process"
+
+# Metrics whose score is a dict of sub-scores; a failed run of one scores an empty dict, not 0.0.
+DICT_SCORED_METRICS = {"calculate_size_score"}
+
+# Thread pool shared by the "thread" metrics of every model in flight (see metric_thread_pool).
+METRIC_THREADS = 32
+_metric_threads: Optional[ThreadPoolExecutor] = None
+_metric_threads_lock = threading.Lock()
+
+# Event loop, on its own thread, shared by the "async" metrics of every model in flight (see metric_event_loop).
+_metric_loop: Optional[asyncio.AbstractEventLoop] = None
+_metric_loop_thread: Optional[threading.Thread] = None
 
 def parse_keys_from_string(key_string: str) -> list[str]:
     """Parses a comma-separated string of keys into a clean list."""
@@ -12,45 +47,428 @@ def parse_keys_from_string(key_string: str) -> list[str]:
         return []
     return [key.strip() for key in key_string.split(',')]
 
-def logger_process(log_queue: multiprocessing.Queue, log_file_path: str):
+def logger_process(log_queue: multiprocessing.Queue, log_file_path: str, flush_bytes: int = 64 * 1024, flush_interval: float = 1.0, mode: str = 'w'):
     """
     A dedicated process that listens for messages on a queue and writes them to a log file.
+    Messages are buffered and written once `flush_bytes` have accumulated or
+    `flush_interval` seconds have passed since the last write.
     """
     try:
-        with open(log_file_path, 'w', encoding='ASCII') as f:
-           #f.write(f"--- Log started at {time.strftime('%Y-%m-%d %H:%M:%S')} ---\n")
+        with open(log_file_path, mode, encoding='ASCII', errors='replace') as f:
+            buffer: list[str] = []
+            buffered_bytes = 0
+            last_flush = time.monotonic()
             while True:
-                message = log_queue.get()
+                try:
+                    message = log_queue.get(timeout=flush_interval)
+                except queue.Empty:
+                    message = ""  # Nothing arrived; fall through to the time-based flush
+
                 if message is None: # A 'None' message is our signal to stop
-                    #f.write(f"--- Log ended at {time.strftime('%Y-%m-%d %H:%M:%S')} ---\n")
                     break
-                f.write(f"{message}\n")
-                f.flush() # Ensure messages are written immediately
+                if message:
+                    line = f"{message}\n"
+                    buffer.append(line)
+                    buffered_bytes += len(line)
+
+                if buffer and (buffered_bytes >= flush_bytes or time.monotonic() - last_flush >= flush_interval):
+                    f.write(''.join(buffer))
+                    f.flush()
+                    buffer.clear()
+                    buffered_bytes = 0
+                    last_flush = time.monotonic()
+
+            f.write(''.join(buffer))
     except Exception as e:
         pass
         # This print is a fallback for a critical logger failure
         #print(f"[Logger Process Error] An error occurred: {e}")
 
+class LogSink:
+    """
+    A single log writer shared by every model and worker in a run.
 
-def process_worker(target_func, result_queue, log_queue, weight, func_name, *args):
+    Messages travel over a plain multiprocessing.Queue (a pipe, no Manager
+    proxy process) to one logger_process, which opens the log file once and
+    batches its writes.
+
+    Attributes:
+        queue (multiprocessing.Queue): The queue metrics put their messages on.
+        log_file_path (str): The file the messages are written to.
     """
-    Worker that executes the target function and handles any exceptions,
-    returning a score of 0.0 upon failure.
+
+    def __init__(self, log_file_path: str, flush_bytes: int = 64 * 1024, flush_interval: float = 1.0, mode: str = 'w'):
+        self.log_file_path = log_file_path
+        self.queue = multiprocessing.Queue()
+        self._process = multiprocessing.Process(
+            target=logger_process,
+            args=(self.queue, log_file_path, flush_bytes, flush_interval, mode),
+            daemon=True,
+        )
+        self._process.start()
+
+    def put(self, message: str):
+        self.queue.put(message)
+
+    def close(self):
+        """Flushes any buffered messages and stops the logger process."""
+        self.queue.put(None)
+        self._process.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+class _WorkerLogQueue:
+    """Placeholder for a log queue argument; pool workers swap in their inherited queue."""
+
+class _NullLogQueue:
+    """Log queue used by pool workers that were started without a LogSink."""
+
+    def put(self, message):
+        pass
+
+
+def failed_score(func_name: str):
+    """The score a metric gets when it fails: 0.0, or {} for a metric in DICT_SCORED_METRICS."""
+    return {} if func_name in DICT_SCORED_METRICS else 0.0
+
+def run_metric(target_func, weight, func_name, *args) -> tuple:
+    """
+    Executes the target function and handles any exceptions, returning the
+    (score, time, weight, name) tuple with the failed_score upon failure.
     """
     start_time = time.perf_counter()
     try:
-        score, time_taken = target_func(*args)
-        result_queue.put((score, float(time_taken), float(weight), func_name))
-    except Exception as e:
+        result = target_func(*args)
+        if inspect.isawaitable(result):
+            # An async metric planned on a sync executor gets an event loop of its own
+            result = asyncio.run(result)
+        score, time_taken = result
+        return (score, float(time_taken), float(weight), func_name)
+    except Exception:
         time_taken = time.perf_counter() - start_time
-        # This is a fallback for critical failures in the worker itself.
-        #log_queue.put(f"[WORKER CRASH] Process for '{func_name}' failed critically: {e}")
-        result_queue.put((0.0, time_taken, float(weight), func_name))
+        # This is a fallback for critical failures in the metric itself.
+        return (failed_score(func_name), time_taken, float(weight), func_name)
+
+async def run_async_metric(target_func, weight, func_name, deadline: Optional[float], *args) -> tuple:
+    """
+    Coroutine counterpart of run_metric for async def metrics. A metric that
+    has not finished `deadline` seconds after it started is cancelled; like
+    a failed or otherwise cancelled metric it scores 0.0.
+    """
+    start_time = time.perf_counter()
+    try:
+        score, time_taken = await asyncio.wait_for(target_func(*args), deadline)
+        return (score, float(time_taken), float(weight), func_name)
+    except (Exception, asyncio.CancelledError):
+        time_taken = time.perf_counter() - start_time
+        return (failed_score(func_name), time_taken, float(weight), func_name)
+
+def process_worker(target_func, result_queue, log_queue, weight, func_name, *args):
+    """
+    Worker that executes the target function in its own process and puts
+    the result tuple of run_metric on `result_queue`.
+    """
+    result_queue.put(run_metric(target_func, weight, func_name, *args))
+
+def metric_thread_pool() -> ThreadPoolExecutor:
+    """Returns the thread pool shared by every "thread" metric, creating it on first use."""
+    global _metric_threads
+    with _metric_threads_lock:
+        if _metric_threads is None:
+            _metric_threads = ThreadPoolExecutor(max_workers=METRIC_THREADS, thread_name_prefix="metric")
+        return _metric_threads
+
+def metric_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Returns the event loop shared by every "async" metric, starting it on a
+    daemon thread on first use. Coroutines are handed to it with
+    asyncio.run_coroutine_threadsafe, so all async metrics of all models in
+    flight share one loop (and one aiohttp session per client class).
+    """
+    global _metric_loop, _metric_loop_thread
+    with _metric_threads_lock:
+        if _metric_loop is None or _metric_loop.is_closed():
+            _metric_loop = asyncio.new_event_loop()
+            _metric_loop_thread = threading.Thread(target=_metric_loop.run_forever, name="metric-loop", daemon=True)
+            _metric_loop_thread.start()
+        return _metric_loop
+
+def close_metric_event_loop(cleanup: Optional[Callable[[], Awaitable]] = None):
+    """
+    Cancels the async metrics still running on the shared event loop, awaits
+    `cleanup()` there (e.g. AsyncApi.close_sessions) and stops the loop.
+    """
+    global _metric_loop, _metric_loop_thread
+    with _metric_threads_lock:
+        loop, thread = _metric_loop, _metric_loop_thread
+        _metric_loop, _metric_loop_thread = None, None
+    if loop is None:
+        return
+
+    async def shutdown():
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if cleanup is not None:
+            await cleanup()
+
+    asyncio.run_coroutine_threadsafe(shutdown(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+def _init_pool_worker(directory: str, log_queue=None, preload: Optional[Iterable[str]] = None):
+    """
+    Pool initializer: imports the metric modules in `preload` once per worker
+    process so that individual tasks only pay for the metric itself, and keeps
+    the run's log queue, which cannot be pickled into individual tasks. Other
+    metrics listed in a manifest are imported on their first call.
+    """
+    global _worker_functions, _worker_log_queue
+    _worker_functions = load_available_functions(directory)
+    _worker_log_queue = log_queue if log_queue is not None else _NullLogQueue()
+    for func_name in preload or ():
+        func = _worker_functions.get(func_name)
+        if isinstance(func, LazyMetric):
+            try:
+                func.load()
+            except Exception:
+                pass # The task itself then fails and scores 0.0
+
+def pool_worker(func_name: str, weight: float, *args):
+    """
+    Pool counterpart of process_worker. Looks the metric up in the worker's
+    preloaded functions and returns the same (score, time, weight, name) tuple,
+    with a score of 0.0 upon failure.
+    """
+    args = tuple(_worker_log_queue if isinstance(arg, _WorkerLogQueue) else arg for arg in args)
+    return run_metric(_worker_functions.get(func_name), weight, func_name, *args)
+
+class MetricWorkerPool:
+    """
+    A long-lived pool of metric worker processes shared by every model in a run.
+
+    Workers import the metric modules named in `preload` once when they start
+    (a package without a manifest is imported whole) and are recycled after
+    `max_tasks_per_child` tasks to cap memory growth from heavy metrics
+    (pandas/datasets). Create it once and pass it to run_concurrently_from_file.
+
+    Attributes:
+        directory (str): The metrics package the workers load functions from.
+        processes (int): The number of worker processes.
+        max_tasks_per_child (int): Tasks a worker runs before it is replaced.
+        log_queue (multiprocessing.Queue | None): The run's LogSink queue, handed to every worker.
+        preload (list[str]): The metrics every worker imports when it starts, usually those of the TaskPlan.
+    """
+
+    def __init__(self, directory: str = "metrics", processes: Optional[int] = None, max_tasks_per_child: Optional[int] = 50, log_queue: Optional[multiprocessing.Queue] = None, preload: Optional[Iterable[str]] = None):
+        self.directory = directory
+        self.processes = processes or os.cpu_count() or 1
+        self.max_tasks_per_child = max_tasks_per_child
+        self.log_queue = log_queue
+        self.preload = list(dict.fromkeys(preload or ()))
+        self._pool = multiprocessing.Pool(
+            processes=self.processes,
+            initializer=_init_pool_worker,
+            initargs=(directory, log_queue, self.preload),
+            maxtasksperchild=max_tasks_per_child,
+        )
+
+    def submit(self, func_name: str, weight: float, args: tuple) -> multiprocessing.pool.AsyncResult:
+        """Queues one metric call and returns a handle to its result tuple."""
+        args = tuple(_WorkerLogQueue() if isinstance(arg, multiprocessing.queues.Queue) else arg for arg in args)
+        return self._pool.apply_async(pool_worker, (func_name, weight) + args)
+
+    def close(self):
+        """Waits for outstanding tasks and shuts the workers down."""
+        self._pool.close()
+        self._pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self._pool.terminate()
+            self._pool.join()
+        else:
+            self.close()
+
+class LazyMetric:
+    """
+    A metric function listed in a package manifest, imported on its first call.
+
+    Only the names are pickled, so a LazyMetric handed to a worker process is
+    imported there and never in the parent. inspect.signature() reports the
+    parameters from the manifest, which lets TaskPlan.compile check the tasks
+    file without importing anything.
+
+    Attributes:
+        package (str): The metrics package, e.g. "metrics".
+        module (str): The module within the package that defines the function.
+        function (str): The name of the function.
+        params (list[str]): The function's parameters, as listed in the manifest.
+        executor (str): Where the metric runs: "inline", "thread", "async" or "process".
+        deadline (float | None): Seconds an "async" metric may run before it is cancelled.
+        batch (LazyMetric | None): The metric's `{function}_batch` counterpart, if it has one.
+        github_requests (int): GitHub API requests the metric makes per model, for the startup rate-limit forecast.
+    """
+
+    def __init__(self, package: str, module: str, function: str, params: list[str], executor: str = DEFAULT_EXECUTOR, deadline: Optional[float] = None, batch: bool = False, github_requests: int = 0):
+        self.package = package
+        self.module = module
+        self.function = function
+        self.params = list(params)
+        self.executor = executor
+        self.deadline = deadline
+        self.batch = LazyMetric(package, module, f"{function}_batch", params, executor) if batch else None
+        self.github_requests = github_requests
+        self._func: Optional[Callable] = None
+
+    @property
+    def __signature__(self) -> inspect.Signature:
+        return inspect.Signature([inspect.Parameter(name, inspect.Parameter.POSITIONAL_OR_KEYWORD) for name in self.params])
+
+    def load(self) -> Callable:
+        """Imports the module (once per process) and returns the function."""
+        if self._func is None:
+            module = importlib.import_module(f"{self.package}.{self.module}")
+            self._func = getattr(module, self.function)
+        return self._func
+
+    def __call__(self, *args):
+        return self.load()(*args)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_func"] = None
+        return state
+
+    def __repr__(self):
+        return f"LazyMetric({self.package}.{self.module}.{self.function})"
+
+class BatchCollector:
+    """
+    Groups the calls that the models in flight make to a batch-capable metric
+    into one call of its `{name}_batch` function.
+
+    A batch function takes one list per parameter, holding that parameter's
+    value for each model, and returns one (score, time_taken) tuple per
+    model, in order. A batch is run as soon as it holds `max_size` calls, or
+    `max_wait` seconds after its first call arrived, by whichever thread
+    completes it. If the batch function fails, every model in the batch
+    gets the failed_score.
+
+    Attributes:
+        max_size (int): Calls that make a batch full; usually the number of models in flight.
+        max_wait (float): Seconds a call waits for others to join its batch.
+    """
+
+    def __init__(self, max_size: int = 64, max_wait: float = 0.05):
+        self.max_size = max(max_size, 1)
+        self.max_wait = max_wait
+        self._pending: dict[str, tuple[Callable, list[tuple[tuple, float, Future]]]] = {}
+        self._timers: dict[str, threading.Timer] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, func_name: str, batch_func: Callable, weight: float, args: tuple) -> Future:
+        """Adds one model's call and returns a Future for its (score, time, weight, name) tuple."""
+        future: Future = Future()
+        full = None
+        with self._lock:
+            _, calls = self._pending.setdefault(func_name, (batch_func, []))
+            calls.append((args, weight, future))
+            if len(calls) >= self.max_size:
+                full = self._take(func_name)
+            elif len(calls) == 1:
+                timer = threading.Timer(self.max_wait, self.flush, (func_name,))
+                timer.daemon = True
+                self._timers[func_name] = timer
+                timer.start()
+        if full is not None:
+            self._run(func_name, *full)
+        return future
+
+    def _take(self, func_name: str):
+        timer = self._timers.pop(func_name, None)
+        if timer is not None:
+            timer.cancel()
+        return self._pending.pop(func_name, None)
+
+    def flush(self, func_name: Optional[str] = None):
+        """Runs the pending batch of `func_name`, or of every metric, right away."""
+        with self._lock:
+            names = [func_name] if func_name is not None else list(self._pending)
+            batches = [(name, self._take(name)) for name in names]
+        for name, batch in batches:
+            if batch is not None:
+                self._run(name, *batch)
+
+    @staticmethod
+    def _run(func_name: str, batch_func: Callable, calls: list[tuple[tuple, float, Future]]):
+        start_time = time.perf_counter()
+        try:
+            results = batch_func(*[list(column) for column in zip(*(args for args, _, _ in calls))])
+            if len(results) != len(calls):
+                raise ValueError(f"{func_name}_batch returned {len(results)} results for {len(calls)} calls")
+            for (_, weight, future), (score, time_taken) in zip(calls, results):
+                future.set_result((score, float(time_taken), float(weight), func_name))
+        except Exception:
+            time_taken = time.perf_counter() - start_time
+            for _, weight, future in calls:
+                if not future.done():
+                    future.set_result((failed_score(func_name), time_taken, float(weight), func_name))
+
+    def close(self):
+        """Runs whatever is still pending."""
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def load_manifest(directory: str) -> Optional[dict]:
+    """
+    Reads `directory`/manifest.json, which maps each metric name to its
+    module, function, parameters, executor and deadline:
+
+        {"bus_factor_metric": {"module": "bus_factor_metric", "params": ["filename", "verbosity", "log_queue"], "executor": "inline"}}
+
+    "module" and "function" default to the metric name. "executor" is
+    "inline" for microsecond metrics, "thread" for metrics that mostly wait on
+    I/O, "async" for async def metrics and "process" (the default) for CPU or
+    memory heavy ones. "deadline" (seconds) applies to "async" metrics.
+    "batch": true says the module also defines `{function}_batch`, see
+    BatchCollector. "github_requests" is how many GitHub API requests the
+    metric makes per model (0 when left out). Returns None when the package
+    has no manifest.
+    """
+    try:
+        with open(os.path.join(directory, MANIFEST_FILENAME), 'r', encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
 
 def load_available_functions(directory: str) -> dict:
     """
-    Discovers and loads metric functions, sending output to the provided log queue.
+    Discovers the metric functions of a package. When the package has a
+    manifest the functions are LazyMetrics and nothing is imported; otherwise
+    every module is imported and its function of the same name is returned.
     """
+    manifest = load_manifest(directory)
+    if manifest is not None:
+        return {
+            name: LazyMetric(directory, entry.get("module", name), entry.get("function", name), entry.get("params", []), entry.get("executor", DEFAULT_EXECUTOR), entry.get("deadline"), entry.get("batch", False), entry.get("github_requests", 0))
+            for name, entry in manifest.items()
+        }
+
     functions = {}
 
     for filename in os.listdir(directory):
@@ -64,80 +482,212 @@ def load_available_functions(directory: str) -> dict:
                 pass
     return functions
 
-def run_concurrently_from_file(tasks_filename: str, all_args_dict: dict, available_functions: dict, log_file: str):
+def profile_imports(directory: str, func_names: Optional[Iterable[str]] = None) -> list[tuple[str, float, Optional[str]]]:
+    """
+    Times the import of each metric module (only those defining `func_names`,
+    when given) and returns (module, seconds, error) tuples, slowest first.
+
+    Each module is imported in a fresh interpreter, so a dependency shared by
+    several metrics is charged to every one of them, just as it is to a worker
+    that imports only that module.
+    """
+    wanted = set(func_names) if func_names is not None else None
+    manifest = load_manifest(directory)
+    if manifest is not None:
+        modules = {entry.get("module", name) for name, entry in manifest.items() if wanted is None or name in wanted}
+    else:
+        modules = {filename[:-3] for filename in os.listdir(directory)
+                   if filename.endswith('.py') and not filename.startswith('__') and (wanted is None or filename[:-3] in wanted)}
+
+    script = "import importlib, sys, time\nstart = time.perf_counter()\nimportlib.import_module(sys.argv[1])\nprint(time.perf_counter() - start)"
+    profile = []
+    for module in sorted(modules):
+        result = subprocess.run([sys.executable, "-c", script, f"{directory}.{module}"], capture_output=True, text=True)
+        if result.returncode == 0:
+            profile.append((module, float(result.stdout.strip().splitlines()[-1]), None))
+        else:
+            error_lines = result.stderr.strip().splitlines()
+            profile.append((module, 0.0, error_lines[-1] if error_lines else f"exit code {result.returncode}"))
+    profile.sort(key=lambda entry: entry[1], reverse=True)
+    return profile
+
+@dataclass
+class PlannedTask:
+    """One validated line of the tasks file."""
+    line_number: int
+    func_name: str
+    func: Callable
+    arg_keys: list[str]
+    weight: float
+    executor: str = DEFAULT_EXECUTOR
+    deadline: Optional[float] = None
+    batch: Optional[Callable] = None
+
+class TaskPlan:
+    """
+    The tasks file compiled once against the available metric functions.
+
+    Parsing, signature checks and function lookup happen in compile(); every
+    rejected line is recorded in `errors` so it can be reported a single time
+    at startup. bind() then resolves the arguments for one model.
+
+    Attributes:
+        tasks_filename (str): The file the plan was compiled from.
+        tasks (list[PlannedTask]): The valid tasks, in file order.
+        errors (list[str]): Warnings for the lines that were skipped.
+    """
+
+    LINE_PATTERN = re.compile(r'(\w+)\((.*)\)\s*([\d.]+)')
+
+    def __init__(self, tasks_filename: str, tasks: list[PlannedTask], errors: list[str]):
+        self.tasks_filename = tasks_filename
+        self.tasks = tasks
+        self.errors = errors
+        self._reported_missing: set[tuple[int, str]] = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def compile(cls, tasks_filename: str, available_functions: dict) -> "TaskPlan":
+        tasks: list[PlannedTask] = []
+        errors: list[str] = []
+
+        with open(tasks_filename, 'r', encoding="utf-8") as f:
+            for i, line in enumerate(f, 1):
+                line = line.strip()
+                if not line: continue
+                match = cls.LINE_PATTERN.match(line)
+                if not match:
+                    errors.append(f"[WARNING] Skipped line {i}: Could not parse syntax: '{line}'.")
+                    continue
+
+                func_name, keys_str, weight_str = match.groups()
+
+                if func_name not in available_functions:
+                    errors.append(f"[WARNING] Skipped line {i}: Function '{func_name}' not found.")
+                    continue
+
+                target_func = available_functions[func_name]
+                required_keys = parse_keys_from_string(keys_str)
+
+                expected_count = len(inspect.signature(target_func).parameters)
+                provided_count = len(required_keys)
+
+                if provided_count != expected_count:
+                    errors.append(f"[WARNING] Skipped line {i}: '{func_name}' expects {expected_count} args, but {provided_count} keys were provided.")
+                    continue
+
+                executor = getattr(target_func, "executor", "async" if inspect.iscoroutinefunction(target_func) else DEFAULT_EXECUTOR)
+                if executor not in EXECUTORS:
+                    errors.append(f"[WARNING] Line {i}: '{func_name}' has unknown executor '{executor}'; running it in a process.")
+                    executor = DEFAULT_EXECUTOR
+
+                tasks.append(PlannedTask(i, func_name, target_func, required_keys, float(weight_str), executor, getattr(target_func, "deadline", None), getattr(target_func, "batch", None)))
+
+        return cls(tasks_filename, tasks, errors)
+
+    def report(self, log_queue, verbosity: int):
+        """Sends the compile warnings to the log."""
+        if verbosity > 0:
+            for error in self.errors:
+                log_queue.put(error)
+
+    def bind(self, all_args_dict: dict, log_queue=None, verbosity: int = 0) -> list[tuple[PlannedTask, tuple]]:
+        """
+        Resolves every task's arguments from `all_args_dict`. Tasks whose keys
+        are missing are skipped; each such line is logged only the first time.
+        """
+        bound = []
+        for task in self.tasks:
+            try:
+                bound.append((task, tuple(all_args_dict[key] for key in task.arg_keys)))
+            except KeyError:
+                missing = [key for key in task.arg_keys if key not in all_args_dict]
+                with self._lock:
+                    first_time = (task.line_number, str(missing)) not in self._reported_missing
+                    self._reported_missing.add((task.line_number, str(missing)))
+                if first_time and log_queue is not None and verbosity > 0:
+                    log_queue.put(f"[WARNING] Skipped line {task.line_number}: Missing required keys in input dictionary: {missing}")
+        return bound
+
+def run_concurrently_from_file(tasks_filename: Union[str, TaskPlan], all_args_dict: dict, available_functions: dict, log_file: str, pool: Optional[MetricWorkerPool] = None, log_sink: Optional[LogSink] = None, batcher: Optional[BatchCollector] = None):
     """
     Parses a file, runs functions concurrently, and directs all status updates to the log file.
+    `tasks_filename` may also be a TaskPlan compiled up front, in which case
+    the file is not read again and its warnings are assumed to be reported.
+    Each task runs where its executor says: "inline" tasks in the calling
+    thread, "thread" tasks on the shared metric_thread_pool, "async" tasks on
+    the shared metric_event_loop, and "process"
+    tasks on the MetricWorkerPool when one is given, or else in one freshly
+    spawned process per metric. When a BatchCollector is given, metrics with
+    a batch function are instead handed to it, to be scored together with
+    the other models in flight. When a LogSink is given its queue
+    is used for every message; otherwise a LogSink is opened on `log_file`
+    for the duration of the call.
     """
     script_verbosity = all_args_dict["verbosity"]
-    manager = multiprocessing.Manager()
-    log_queue = manager.Queue()
-    
-    logger = multiprocessing.Process(target=logger_process, args=(log_queue, log_file))
-    logger.start()
-
-    # Load available functions and log the process
+    own_sink: Optional[LogSink] = None
+    if log_sink is not None:
+        log_queue = log_sink.queue
+    elif pool is not None and pool.log_queue is not None:
+        log_queue = pool.log_queue
+    else:
+        own_sink = LogSink(log_file, mode='a')
+        log_queue = own_sink.queue
 
     all_args_dict['log_queue'] = log_queue
 
-    line_pattern = re.compile(r'(\w+)\((.*)\)\s*([\d.]+)')
     processes = []
+    pool_tasks = []
+    thread_tasks = []
+    batch_tasks = []
+    async_tasks = []
+    inline_tasks = []
     results_queue = multiprocessing.Queue()
     total_weight = 0.0
 
-    if script_verbosity > 0:
-        log_queue.put(f"[INFO] Reading and parsing tasks from '{tasks_filename}'...")
-    
-    with open(tasks_filename, 'r', encoding="utf-8") as f:
-        for i, line in enumerate(f, 1):
-            line = line.strip()
-            if not line: continue
-            match = line_pattern.match(line)
-            if not match:
-                #log_queue.put(f"[WARNING] Skipped line {i}: Could not parse syntax: '{line}'.")
-                continue
-
-            func_name, keys_str, weight_str = match.groups()
-            
-            if func_name not in available_functions:
-                #log_queue.put(f"[WARNING] Skipped line {i}: Function '{func_name}' not found.")
-                continue
-
-            target_func = available_functions[func_name]
-            required_keys = parse_keys_from_string(keys_str)
-            
-            sig = inspect.signature(target_func)
-            expected_count = len(sig.parameters)
-            provided_count = len(required_keys)
+    if isinstance(tasks_filename, TaskPlan):
+        plan = tasks_filename
+    else:
+        if script_verbosity > 0:
+            log_queue.put(f"[INFO] Reading and parsing tasks from '{tasks_filename}'...")
+        plan = TaskPlan.compile(tasks_filename, available_functions)
+        plan.report(log_queue, script_verbosity)
 
-            if provided_count != expected_count:
-                #log_queue.put(f"[WARNING] Skipped line {i}: '{func_name}' expects {expected_count} args, but {provided_count} keys were provided.")
-                continue
-            
-            if not all(key in all_args_dict for key in required_keys):
-                missing = [key for key in required_keys if key not in all_args_dict]
-                #log_queue.put(f"[WARNING] Skipped line {i}: Missing required keys in input dictionary: {missing}")
-                continue
-
-            resolved_args = [all_args_dict[key] for key in required_keys]
-            weight = float(weight_str)
-            process_args = (target_func, results_queue, log_queue, weight, func_name) + tuple(resolved_args)
+    for task, resolved_args in plan.bind(all_args_dict, log_queue, script_verbosity):
+        if batcher is not None and task.batch is not None:
+            batch_tasks.append((task.func_name, task.batch, task.weight, resolved_args))
+        elif task.executor == "inline":
+            inline_tasks.append((task.func, task.weight, task.func_name) + resolved_args)
+        elif task.executor == "thread":
+            thread_tasks.append((task.func, task.weight, task.func_name) + resolved_args)
+        elif task.executor == "async":
+            async_tasks.append((task.func, task.weight, task.func_name, task.deadline) + resolved_args)
+        elif pool is not None:
+            pool_tasks.append((task.func_name, task.weight, resolved_args))
+        else:
+            process_args = (task.func, results_queue, log_queue, task.weight, task.func_name) + resolved_args
             process = multiprocessing.Process(target=process_worker, args=process_args)
             processes.append(process)
-            total_weight += weight
-            if script_verbosity > 0:
-                log_queue.put(f"[INFO] Queued: {func_name}(...) with weight {weight}")
+        total_weight += task.weight
+        if script_verbosity > 0:
+            log_queue.put(f"[INFO] Queued: {task.func_name}(...) with weight {task.weight} ({task.executor})")
 
-    if not processes:
+    if not processes and not pool_tasks and not thread_tasks and not batch_tasks and not async_tasks and not inline_tasks:
         if script_verbosity > 0:
             log_queue.put("[INFO] No valid tasks to run.")
-        log_queue.put(None)
-        logger.join()
+        if own_sink is not None:
+            own_sink.close()
         return {'net_score': 0.0}, {}
     
     if script_verbosity > 0:
         log_queue.put("[INFO] --- Starting all processes ---")
     concurrent_start_time = time.perf_counter()
     for p in processes: p.start()
+    pending = [pool.submit(*task) for task in pool_tasks]
+    pending.extend(metric_thread_pool().submit(run_metric, *task) for task in thread_tasks)
+    pending.extend(batcher.submit(*task) for task in batch_tasks)
+    pending.extend(asyncio.run_coroutine_threadsafe(run_async_metric(*task), metric_event_loop()) for task in async_tasks)
+    inline_results = [run_metric(*task) for task in inline_tasks]
     
     if script_verbosity > 0:
         log_queue.put("[INFO] --- Collecting results ---")
@@ -145,8 +695,11 @@ def run_concurrently_from_file(tasks_filename: str, all_args_dict: dict, availab
     scores_dictionary = {}
     weighted_score_sum = 0.0
     
-    for _ in range(len(processes)):
-        score, time_taken, weight, func_name = results_queue.get()
+    results = [results_queue.get() for _ in range(len(processes))]
+    results.extend(result.get() if isinstance(result, multiprocessing.pool.AsyncResult) else result.result() for result in pending)
+    results.extend(inline_results)
+
+    for score, time_taken, weight, func_name in results:
         scores_dictionary[func_name] = score
         times_dictionary[func_name] = round(time_taken * 1000)
         if func_name != "calculate_size_score":
@@ -169,9 +722,8 @@ def run_concurrently_from_file(tasks_filename: str, all_args_dict: dict, availab
     if script_verbosity > 0:
         log_queue.put("[INFO] --- All processes have completed ---")
     
-    
-    log_queue.put(None)
-    logger.join()
+    if own_sink is not None:
+        own_sink.close()
     
     return scores_dictionary, times_dictionary
 
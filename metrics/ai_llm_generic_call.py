@@ -1,7 +1,15 @@
 import sys
 import os
+import re
+import json
+import math
 import time
-from typing import Tuple, Optional
+import asyncio
+import hashlib
+import sqlite3
+import tempfile
+import threading
+from typing import Callable, Dict, Iterable, Optional, Sequence, Tuple, Union
 
 # --- Import Setup ---
 # This block of code is crucial for allowing this script to find and import modules
@@ -21,57 +29,330 @@ sys.path.append(classes_path)
 # Now that the project root is on the path, we can import from the 'classes' package.
 # The file we are importing from is `llm_child_api.py`.
 from classes.llm_child_api import GenAiChatApi
+from classes.async_llm_child_api import AsyncGenAiChatApi
+from classes.disk_cache import DiskCache
+from readme_document import ReadmeDocument
+from .keyword_matcher import KeywordMatcher, load_keywords
+from .readme_compactor import compact_readme, estimate_tokens
 
-def process_file_and_get_response(filename: str, instruction: str, model: str) -> str:
+GENAI_BASE_URL = "https://genai.rcac.purdue.edu"
+
+# READMEs are compacted to about this many tokens before they are sent; LLM_PROMPT_TOKEN_BUDGET
+# overrides it, and 0 sends them whole.
+PROMPT_TOKEN_DEFAULT_BUDGET = 3000
+_relevance_matchers: Dict[Tuple[str, ...], Optional[KeywordMatcher]] = {}
+_relevance_lock = threading.Lock()
+
+# Responses are cached on disk, keyed by model, instruction and README content, so an
+# unchanged model costs no LLM call. LLM_CACHE_DIR (or else HTTP_CACHE_DIR) moves the
+# cache from LLM_CACHE_DEFAULT_DIR, and LLM_CACHE_DIR=off turns it off.
+LLM_CACHE_DEFAULT_DIR = os.path.join(tempfile.gettempdir(), f"ece30861-llm-cache-{os.getuid() if hasattr(os, 'getuid') else 'user'}")
+LLM_CACHE_DEFAULT_TTL = 7 * 24 * 3600.0
+LLM_CACHE_DEFAULT_MAX_MB = 64
+_response_cache: Optional[DiskCache] = None
+_response_cache_checked = False
+_response_cache_lock = threading.Lock()
+
+def response_cache() -> Optional[DiskCache]:
+    """
+    Returns the LLM response cache, opening it on first use from the
+    LLM_CACHE_DIR (or HTTP_CACHE_DIR), LLM_CACHE_MAX_MB and LLM_CACHE_TTL
+    environment variables. Without a directory the cache lives in
+    LLM_CACHE_DEFAULT_DIR; it is None when LLM_CACHE_DIR is "off" or the
+    file cannot be opened. The SQLite file is shared safely by every
+    process of a run.
     """
-    Reads a .md or .txt file, prepends instructions, gets a response from the LLM,
-    and measures the execution time.
+    global _response_cache, _response_cache_checked
+    with _response_cache_lock:
+        if not _response_cache_checked:
+            _response_cache_checked = True
+            _response_cache = None
+            cache_dir = os.getenv("LLM_CACHE_DIR") or os.getenv("HTTP_CACHE_DIR") or LLM_CACHE_DEFAULT_DIR
+            if cache_dir.lower() != "off":
+                max_mb = os.getenv("LLM_CACHE_MAX_MB", "")
+                try:
+                    _response_cache = DiskCache(
+                        os.path.join(cache_dir, "llm_cache.sqlite"),
+                        max_bytes=(int(max_mb) if max_mb.isdigit() else LLM_CACHE_DEFAULT_MAX_MB) * 1024 * 1024
+                    )
+                except (OSError, sqlite3.Error):
+                    # The cache only saves calls; an unwritable location means asking every run
+                    pass
+        return _response_cache
 
-    Args:
-        filename (str): The path to the input file (.md or .txt).
-        api_key (str): The API key for authentication.
+def configure_response_cache(cache: Optional[DiskCache]):
+    """Replaces the LLM response cache, e.g. with one in a temporary directory; None disables caching."""
+    global _response_cache, _response_cache_checked
+    with _response_cache_lock:
+        _response_cache = cache
+        _response_cache_checked = True
 
-    Returns:
-        A tuple containing:
-        - The LLM's response text (Optional[str]).
-        - The total time spent in the function (float).
+def _cache_ttl() -> float:
+    ttl = os.getenv("LLM_CACHE_TTL", "")
+    return float(ttl) if ttl.isdigit() else LLM_CACHE_DEFAULT_TTL
+
+def response_cache_key(model: str, instruction: str, document: ReadmeDocument, budget: int = 0, focus: Sequence[str] = ()) -> str:
+    """
+    The cache key of one request: the model, a hash of the instruction, the
+    README's content hash, and the token budget and focus it was compacted with.
+    """
+    instruction_hash = hashlib.sha256(instruction.encode("utf-8")).hexdigest()
+    return f"llm:{model}:{instruction_hash}:{document.sha256}:{budget}:{','.join(focus)}"
+
+def _cached_response(key: str) -> Optional[str]:
+    cache = response_cache()
+    if cache is None:
+        return None
+    try:
+        entry = cache.get(key)
+    except sqlite3.Error:
+        return None
+    if entry is None or not entry.is_fresh():
+        return None
+    return entry.body.decode("utf-8")
+
+def _store_response(key: str, response_text: Optional[str], accept: Optional[Callable[[str], bool]] = None):
+    cache = response_cache()
+    if cache is None or response_text is None:
+        return
+    if accept is not None and not accept(response_text):
+        # A reply that does not parse is asked again next time, not served for the whole TTL
+        return
+    try:
+        cache.put(key, response_text.encode("utf-8"), expires_at=time.time() + _cache_ttl())
+    except sqlite3.Error:
+        # The cache only saves calls; a locked or read-only file must not fail the metric
+        pass
+
+def _load_readme(readme: Union[ReadmeDocument, str]) -> Optional[ReadmeDocument]:
+    """
+    Returns the README to send, given a parsed ReadmeDocument or the path of
+    a .md or .txt file. Returns None when the API key is not set or there is
+    no README text.
     """
     api_key = os.getenv("GEN_AI_STUDIO_API_KEY", "YOUR_API_KEY_HERE") # Replace with your key if not set as env var
     if not api_key or api_key == "YOUR_API_KEY_HERE":
         # print("Error: API_KEY not set.")
-        return
+        return None
 
-    if not filename.endswith(('.md', '.txt')):
+    if not isinstance(readme, ReadmeDocument) and not (readme or "").endswith(('.md', '.txt')):
         # print("Error: Invalid file type. Please provide a .md or .txt file.")
         return None
 
-    try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            file_content = f.read()
-    except FileNotFoundError:
-        # print(f"Error: The file '{filename}' was not found.")
+    document = ReadmeDocument.load(readme)
+    if not document:
+        # print(f"Error: The file '{readme}' was not found or is empty.")
         return None
-    except Exception as e:
-        # print(f"An error occurred while reading the file: {e}")
+    return document
+
+def prompt_token_budget() -> int:
+    """Returns the README token budget of a prompt, from LLM_PROMPT_TOKEN_BUDGET; 0 means no compaction."""
+    budget = os.getenv("LLM_PROMPT_TOKEN_BUDGET", "")
+    return int(budget) if budget.isdigit() else PROMPT_TOKEN_DEFAULT_BUDGET
+
+def relevance_matcher(focus: Sequence[str]) -> Optional[KeywordMatcher]:
+    """
+    Returns the matcher that ranks README sections for the dimensions in
+    `focus`, from their keyword groups in keywords.json, or None when none of
+    them has one. Matchers are compiled once per process.
+    """
+    focus = tuple(focus)
+    with _relevance_lock:
+        if focus not in _relevance_matchers:
+            groups = {group: spec for group, spec in load_keywords("ai_llm_generic_call").items() if group in focus}
+            _relevance_matchers[focus] = KeywordMatcher(
+                {group: spec.get("terms", []) for group, spec in groups.items()},
+                {group: spec.get("whole_words", False) for group, spec in groups.items()},
+            ) if groups else None
+        return _relevance_matchers[focus]
+
+def _build_prompt(document: ReadmeDocument, instruction: str, budget: int, focus: Sequence[str], log_queue=None, verbosity: int = 0) -> str:
+    """Puts the instruction before the README compacted to `budget` tokens, logging how much was cut."""
+    readme_text = compact_readme(document, budget, relevance_matcher(focus))
+    if log_queue is not None and verbosity >= 1:
+        log_queue.put(
+            f"[{os.getpid()}] [INFO] Compacted README '{os.path.basename(document.path)}' for {'/'.join(focus) or 'LLM'}: "
+            f"{estimate_tokens(document.text)} -> {estimate_tokens(readme_text)} tokens (budget {budget or 'none'})"
+        )
+    return instruction + readme_text
+
+def process_file_and_get_response(readme: Union[ReadmeDocument, str], instruction: str, model: str, focus: Sequence[str] = (), log_queue=None, verbosity: int = 0, accept: Optional[Callable[[str], bool]] = None) -> str:
+    """
+    Prepends instructions to a README and gets a response from the LLM.
+    The README is compacted to the prompt token budget first, keeping the
+    sections most relevant to the `focus` dimensions. A response cached for
+    the same model, instruction, README content and budget is returned
+    without a request; a new response is cached only if `accept` (when
+    given) approves it, e.g. because it parses as a score.
+
+    Args:
+        readme (ReadmeDocument | str): The parsed README, or the path of the input file (.md or .txt).
+        instruction (str): The instructions placed before the file's content.
+        model (str): The model to ask.
+        focus (Sequence[str]): The LLM_DIMENSIONS the instruction asks about, to rank sections by.
+        log_queue (multiprocessing.Queue): Optional queue for the compaction log message.
+        verbosity (int): The verbosity level (0=silent, 1=INFO, 2=DEBUG).
+        accept (Callable[[str], bool]): Optional check a response must pass to be cached.
+
+    Returns:
+        The LLM's response text (Optional[str]).
+    """
+    document = _load_readme(readme)
+    if document is None:
         return None
 
+    budget = prompt_token_budget()
+    key = response_cache_key(model, instruction, document, budget, focus)
+    cached = _cached_response(key)
+    if cached is not None:
+        return cached
+
     # Instructions for the LLM
-    prompt = instruction + file_content
+    prompt = _build_prompt(document, instruction, budget, focus, log_queue, verbosity)
 
     # Initialize the client
     chat_api = GenAiChatApi(
-        base_url="https://genai.rcac.purdue.edu",
+        base_url=GENAI_BASE_URL,
         model=model
     )
 
     # Set the token
-    chat_api.set_bearer_token(api_key)
+    chat_api.set_bearer_token(os.getenv("GEN_AI_STUDIO_API_KEY"))
 
     # Get a completion
-    # print(f"\n> Sending content from '{filename}' to the model...")
+    # print(f"\n> Sending content from '{readme}' to the model...")
     response_text = chat_api.get_chat_completion(prompt)
+    _store_response(key, response_text, accept)
+
+    return response_text
+
+async def process_file_and_get_response_async(readme: Union[ReadmeDocument, str], instruction: str, model: str, focus: Sequence[str] = (), log_queue=None, verbosity: int = 0, accept: Optional[Callable[[str], bool]] = None) -> Optional[str]:
+    """
+    Coroutine counterpart of process_file_and_get_response, for metrics that
+    run on the shared metric event loop. Many requests can then be in flight
+    at once over one aiohttp session.
+    """
+    document = _load_readme(readme)
+    if document is None:
+        return None
 
-    
+    budget = prompt_token_budget()
+    key = response_cache_key(model, instruction, document, budget, focus)
+    cached = _cached_response(key)
+    if cached is not None:
+        return cached
+
+    prompt = _build_prompt(document, instruction, budget, focus, log_queue, verbosity)
+    chat_api = AsyncGenAiChatApi(base_url=GENAI_BASE_URL, model=model)
+    chat_api.set_bearer_token(os.getenv("GEN_AI_STUDIO_API_KEY"))
+    response_text = await chat_api.get_chat_completion(prompt)
+    _store_response(key, response_text, accept)
     return response_text
 
+# The README dimensions an LLM judges, with what the model is asked to rate for each.
+# A metric reads its dimension from the result of get_readme_scores_async.
+LLM_DIMENSIONS: Dict[str, str] = {
+    "rampup_time": "what the 'ramp-up' time of this model would be for a brand new engineer. Take into account things like the descriptions and examples given in the readme",
+    "performance_claims": "the performance claims of this model. Take into account things like verifiable claims and evidence provided within the readme",
+}
+
+# Single-number prompts, used for a dimension the combined answer did not score.
+SINGLE_SCORE_INSTRUCTIONS: Dict[str, str] = {
+    "rampup_time": "Given the following readme, give a number from 0 to 1.0, with 1 being the best, on what the 'ramp-up' time of this model would be for a brand new engineer. Take into account things like the descriptions and examples given in the readme to make the score. ONLY PROVIDE A SINGLE NUMBER, NO OTHER TEXT SHOULD BE IN THE RESPONSE. IT SHOULD BE DIRECTLY CONVERTABLE TO A FLOAT:\n\n",
+    "performance_claims": "Given the following readme, give a number from 0 to 1.0, with 1 being the best, on the performance claims of this model. Take into account things like verifiable claims and evidence provided within the readme to make the score. ONLY PROVIDE A SINGLE NUMBER, NO OTHER TEXT SHOULD BE IN THE RESPONSE. IT SHOULD BE DIRECTLY CONVERTABLE TO A FLOAT:\n\n",
+}
+
+# Combined requests in flight, so every metric of a model awaits the same one.
+_inflight: Dict[tuple, asyncio.Task] = {}
+
+def combined_instruction(fields: Iterable[str]) -> str:
+    """Builds the prompt that asks for every dimension in `fields` as one JSON object."""
+    fields = list(fields)
+    lines = "\n".join(f"- {field}: {LLM_DIMENSIONS[field]}" for field in fields)
+    example = json.dumps({field: 0.5 for field in fields})
+    return (
+        "Given the following readme, rate this model on each dimension below with a number from 0 to 1.0, with 1 being the best.\n"
+        f"{lines}\n"
+        f"ONLY PROVIDE A JSON OBJECT WITH EXACTLY THESE KEYS AND NUMBER VALUES, e.g. {example}. NO OTHER TEXT SHOULD BE IN THE RESPONSE:\n\n"
+    )
+
+def _as_score(value) -> Optional[float]:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    value = float(value)
+    return value if math.isfinite(value) and 0.0 <= value <= 1.0 else None
+
+def parse_single_score(response_text: Optional[str]) -> Optional[float]:
+    """Returns the response as a score if it is exactly one number from 0 to 1, else None."""
+    try:
+        return _as_score(float((response_text or "").strip()))
+    except ValueError:
+        return None
+
+def parse_scores(response_text: Optional[str], fields: Iterable[str]) -> Dict[str, Optional[float]]:
+    """
+    Parses a combined response strictly: it must be a JSON object (a
+    markdown code fence around it is tolerated), and each field must be a
+    number from 0 to 1. Every field that is missing or invalid is None, so
+    it can be asked for on its own.
+    """
+    scores: Dict[str, Optional[float]] = {field: None for field in fields}
+    text = (response_text or "").strip()
+    fence = re.match(r"^```(?:json)?\s*(.*?)\s*```$", text, re.DOTALL)
+    if fence:
+        text = fence.group(1)
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return scores
+    if isinstance(data, dict):
+        for field in scores:
+            scores[field] = _as_score(data.get(field))
+    return scores
+
+async def _score_readme(document: ReadmeDocument, model: str, fields: Tuple[str, ...], log_queue=None, verbosity: int = 0) -> Dict[str, Optional[float]]:
+    response_text = await process_file_and_get_response_async(
+        document, combined_instruction(fields), model, fields, log_queue, verbosity,
+        accept=lambda text: None not in parse_scores(text, fields).values(),
+    )
+    scores = parse_scores(response_text, fields)
+    missing = [field for field, score in scores.items() if score is None]
+    if missing and response_text is not None:
+        # Per-field fallback: ask for what the combined answer left out, one number at a time
+        answers = await asyncio.gather(*(process_file_and_get_response_async(document, SINGLE_SCORE_INSTRUCTIONS[field], model, (field,), log_queue, verbosity, accept=lambda text: parse_single_score(text) is not None) for field in missing))
+        for field, answer in zip(missing, answers):
+            scores[field] = parse_single_score(answer)
+    return scores
+
+async def get_readme_scores_async(readme: Union[ReadmeDocument, str], model: str, fields: Optional[Iterable[str]] = None, log_queue=None, verbosity: int = 0) -> Dict[str, Optional[float]]:
+    """
+    Scores a README on every LLM-judged dimension (LLM_DIMENSIONS, or just
+    `fields`) with one request that returns a JSON object. A dimension the
+    answer does not score validly is asked for on its own; one that still
+    has no valid score is None.
+
+    Concurrent calls for the same README content, model and dimensions share
+    one request, so the metrics of a model make a single round trip between
+    them, and the response cache serves later runs. The README is
+    compacted to the prompt token budget, favouring the sections relevant
+    to the dimensions asked for; `log_queue` receives the token counts.
+    """
+    fields = tuple(fields or LLM_DIMENSIONS)
+    document = _load_readme(readme)
+    if document is None:
+        return {field: None for field in fields}
+
+    key = (model, fields, document.sha256)
+    loop = asyncio.get_running_loop()
+    task = _inflight.get(key)
+    if task is None or task.get_loop() is not loop:
+        task = loop.create_task(_score_readme(document, model, fields, log_queue, verbosity))
+        _inflight[key] = task
+
+        def forget(done: asyncio.Task):
+            if _inflight.get(key) is done:
+                del _inflight[key]
 
+        task.add_done_callback(forget)
+    # Shielded, so one metric running out of time does not cancel the request the others await
+    return dict(await asyncio.shield(task))
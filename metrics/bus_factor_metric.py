@@ -1,9 +1,11 @@
 import os
 import time
 import re
-from typing import Tuple
+from typing import Tuple, Union
+from readme_document import ReadmeDocument
+from .keyword_matcher import matcher_for
 
-def bus_factor_metric(filename: str, verbosity: int, log_queue) -> Tuple[float, float]:
+def bus_factor_metric(readme: Union[ReadmeDocument, str], verbosity: int, log_queue) -> Tuple[float, float]:
     """
     Calculates a proxy for the bus factor score by searching for contributor
     information within a README file's text.
@@ -11,7 +13,7 @@ def bus_factor_metric(filename: str, verbosity: int, log_queue) -> Tuple[float,
     Verbosity is controlled by the passed-in argument (0=silent, 1=INFO, 2=DEBUG).
 
     Args:
-        readme_content (str): The full text content of the README file.
+        readme (ReadmeDocument | str): The model's parsed README, or the path of the file.
         verbosity (int): The verbosity level (0, 1, or 2).
         log_queue (multiprocessing.Queue): The queue for centralized logging.
 
@@ -28,23 +30,18 @@ def bus_factor_metric(filename: str, verbosity: int, log_queue) -> Tuple[float,
         if verbosity >= 1: # Informational
             log_queue.put(f"[{pid}] [INFO] Starting bus factor check based on README content...")
 
-        readme_text = filename.lower()
+        readme_text = ReadmeDocument.load(readme).text_lower
 
-        # Keywords that suggest contributor information is present. This can be expanded.
-        contributor_keywords = [
-            "contributor", "contributors", "author", "authors",
-            "team", "maintainer", "maintained by", "developed by", "credits"
-        ]
-
-        # Check if any keywords are present. This is a simple proxy for the bus factor.
-        found_mention = any(keyword in readme_text for keyword in contributor_keywords)
+        # Keywords that suggest contributor information is present; the list lives in keywords.json.
+        # One pass finds every keyword. This is a simple proxy for the bus factor.
+        found_kws = matcher_for("bus_factor_metric").found(readme_text)["contributor_keywords"]
+        found_mention = bool(found_kws)
 
         if found_mention:
             score = 1.0
             if verbosity >= 1: # Informational
                 log_queue.put(f"[{pid}] [INFO] Found mention of contributors in README -> Score = 1.0")
             if verbosity >= 2: # Debug
-                found_kws = [kw for kw in contributor_keywords if kw in readme_text]
                 log_queue.put(f"[{pid}] [DEBUG] Found keywords: {', '.join(found_kws)}")
         else:
             score = 0.0
@@ -62,4 +59,3 @@ def bus_factor_metric(filename: str, verbosity: int, log_queue) -> Tuple[float,
         log_queue.put(f"[{pid}] [INFO] Finished calculation. Score={score:.2f}, Time={time_taken:.3f}s")
 
     return score, time_taken
-
@@ -1,10 +1,13 @@
 import os
 import time
-from typing import Tuple
+from typing import Tuple, Union
+from readme_document import ReadmeDocument
+from .keyword_matcher import matcher_for
 
-def dataset_and_code_present(filename: str, verbosity: int, log_queue) -> Tuple[float, float]:
+def dataset_and_code_present(readme: Union[ReadmeDocument, str], verbosity: int, log_queue) -> Tuple[float, float]:
     """
     Calculates a score based on the presence of dataset keywords in provided README text.
+    `readme` is the model's parsed README (or the path of the file).
     Verbosity is controlled by the passed-in argument (0=silent, 1=INFO, 2=DEBUG).
     """
     pid = os.getpid()
@@ -15,24 +18,19 @@ def dataset_and_code_present(filename: str, verbosity: int, log_queue) -> Tuple[
         if verbosity >= 1: # Informational
             log_queue.put(f"[{pid}] [INFO] Starting dataset-in-readme check...")
 
-        readme_text = filename.lower()
+        readme_text = ReadmeDocument.load(readme).text_lower
 
-        # Check for these datasets (add more if needed)
-        dataset_hosts = [
-            "huggingface.co/datasets", "kaggle.com/datasets", 
-            "roboflow.com", "drive.google.com"
-        ]
-        dataset_keywords = ["dataset", "datasets", "data", "training data", "download data"]
+        # Check for these datasets (add more in keywords.json); one pass finds every host and keyword
+        found = matcher_for("dataset_and_code_present").found(readme_text)
+        found_hosts = found["dataset_hosts"]
+        found_kws = found["dataset_keywords"]
 
-        has_dataset = any(host in readme_text for host in dataset_hosts) or \
-                      any(kw in readme_text for kw in dataset_keywords)
+        has_dataset = bool(found_hosts or found_kws)
         
         if verbosity >= 1: # Informational
             log_queue.put(f"[{pid}] [INFO] Dataset mention found in README: {has_dataset}")
         
         if verbosity >= 2 and has_dataset: # Debug
-            found_hosts = [host for host in dataset_hosts if host in readme_text]
-            found_kws = [kw for kw in dataset_keywords if kw in readme_text]
             if found_hosts:
                 log_queue.put(f"[{pid}] [DEBUG] Found dataset hosts: {', '.join(found_hosts)}")
             if found_kws:
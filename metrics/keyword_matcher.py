@@ -0,0 +1,144 @@
+import json
+import os
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+# Keyword lists of the README metrics, keyed by metric and then by group.
+KEYWORDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "keywords.json")
+
+_matchers: Dict[str, "KeywordMatcher"] = {}
+_matchers_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class KeywordMatch:
+    """
+    One occurrence of a keyword in a text.
+
+    Attributes:
+        group (str): The keyword group the term belongs to, e.g. "dataset_hosts".
+        keyword (str): The term that matched.
+        start (int): Index of the first character of the match.
+        end (int): Index one past the last character of the match.
+    """
+    group: str
+    keyword: str
+    start: int
+    end: int
+
+
+class KeywordMatcher:
+    """
+    Finds every occurrence of many keywords in one pass over a text, using
+    an Aho-Corasick automaton compiled once. The cost of a scan grows with
+    the length of the text, not with the number of keywords.
+
+    Keywords are organised in groups; each group either matches anywhere
+    (e.g. host names inside URLs) or only as whole words, so "data" does not
+    match inside "database". Matching ignores case: the keywords are
+    lowercased, and the text passed in should be lowercased too (see
+    ReadmeDocument.text_lower).
+
+    Attributes:
+        groups (dict[str, list[str]]): The lowercased keywords of each group.
+        whole_words (dict[str, bool]): Whether each group matches whole words only.
+
+    Methods:
+        find_all(text:str)
+            Returns every match, in the order the matches end in the text.
+        found(text:str)
+            Returns the distinct keywords found in each group.
+    """
+
+    def __init__(self, groups: Mapping[str, Iterable[str]], whole_words: Optional[Mapping[str, bool]] = None):
+        self.groups: Dict[str, List[str]] = {group: list(dict.fromkeys(term.lower() for term in terms if term)) for group, terms in groups.items()}
+        self.whole_words: Dict[str, bool] = {group: bool((whole_words or {}).get(group, False)) for group in self.groups}
+
+        # Build the trie of all keywords; state 0 is the root.
+        trie: List[Dict[str, int]] = [{}]
+        outputs: List[List[Tuple[str, str]]] = [[]]
+        for group, terms in self.groups.items():
+            for term in terms:
+                state = 0
+                for ch in term:
+                    next_state = trie[state].get(ch)
+                    if next_state is None:
+                        next_state = len(trie)
+                        trie[state][ch] = next_state
+                        trie.append({})
+                        outputs.append([])
+                    state = next_state
+                outputs[state].append((group, term))
+
+        # Breadth-first, compute the failure links and fold them into a complete
+        # transition table, so a scan is a single dictionary lookup per character.
+        fail: List[int] = [0] * len(trie)
+        delta: List[Dict[str, int]] = [{} for _ in trie]
+        delta[0] = dict(trie[0])
+        queue: deque = deque(trie[0].values())
+        while queue:
+            state = queue.popleft()
+            if state:
+                delta[state] = {**delta[fail[state]], **trie[state]}
+            for ch, next_state in trie[state].items():
+                fail[next_state] = delta[fail[state]].get(ch, 0) if state else 0
+                outputs[next_state] = outputs[next_state] + outputs[fail[next_state]]
+                queue.append(next_state)
+
+        self._delta = delta
+        self._outputs = outputs
+
+    def find_all(self, text: str) -> List[KeywordMatch]:
+        matches: List[KeywordMatch] = []
+        delta, outputs = self._delta, self._outputs
+        state = 0
+        for index, ch in enumerate(text):
+            state = delta[state].get(ch, 0)
+            if outputs[state]:
+                end = index + 1
+                for group, term in outputs[state]:
+                    start = end - len(term)
+                    if self.whole_words[group] and not self._on_word_boundaries(text, start, end):
+                        continue
+                    matches.append(KeywordMatch(group, term, start, end))
+        return matches
+
+    def found(self, text: str) -> Dict[str, List[str]]:
+        """Returns, for every group, the distinct keywords found in `text` in the order they first appear."""
+        found: Dict[str, Dict[str, None]] = {group: {} for group in self.groups}
+        for match in self.find_all(text):
+            found[match.group].setdefault(match.keyword, None)
+        return {group: list(terms) for group, terms in found.items()}
+
+    @staticmethod
+    def _on_word_boundaries(text: str, start: int, end: int) -> bool:
+        before = text[start - 1] if start > 0 else " "
+        after = text[end] if end < len(text) else " "
+        return not (before.isalnum() or before == "_") and not (after.isalnum() or after == "_")
+
+
+def load_keywords(metric: str, path: str = KEYWORDS_FILE) -> Dict[str, dict]:
+    """
+    Returns the keyword groups of `metric` from keywords.json, which looks like:
+
+        {"dataset_and_code_present": {"dataset_hosts": {"whole_words": false, "terms": ["kaggle.com/datasets"]}}}
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)[metric]
+
+
+def matcher_for(metric: str, path: str = KEYWORDS_FILE) -> KeywordMatcher:
+    """Returns the KeywordMatcher of `metric`, compiled on first use and then shared within the process."""
+    key = f"{path}:{metric}"
+    with _matchers_lock:
+        matcher = _matchers.get(key)
+        if matcher is None:
+            groups = load_keywords(metric, path)
+            matcher = KeywordMatcher(
+                {group: spec.get("terms", []) for group, spec in groups.items()},
+                {group: spec.get("whole_words", False) for group, spec in groups.items()},
+            )
+            _matchers[key] = matcher
+        return matcher
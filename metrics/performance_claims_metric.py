@@ -1,7 +1,7 @@
 import sys
 import os
 import time
-from typing import Tuple
+from typing import Tuple, Union
 
 # --- Import Setup ---
 # This block gets the project root onto the Python path
@@ -10,14 +10,15 @@ project_root = os.path.dirname(current_dir)
 sys.path.append(project_root)
 
 # Now we can import the function from the other file in the 'metrics' directory
-from .ai_llm_generic_call import process_file_and_get_response
+from .ai_llm_generic_call import get_readme_scores_async
+from readme_document import ReadmeDocument
 
-def performance_claims_metric(filename: str, verbosity: int, log_queue) -> Tuple[float, float]:
+async def performance_claims_metric(readme: Union[ReadmeDocument, str], verbosity: int, log_queue) -> Tuple[float, float]:
     """
-    Calls an LLM to rate performance claims in a file, logging its progress to a queue.
+    Asks an LLM to rate performance claims in a file, logging its progress to a queue.
 
     Args:
-        filename (str): The absolute path to the input file (.md or .txt).
+        readme (ReadmeDocument | str): The model's parsed README, or the path of the file (.md or .txt).
         verbosity (int): The verbosity level (0=silent, 1=INFO, 2=DEBUG).
         log_queue (multiprocessing.Queue): The queue to send log messages to.
 
@@ -29,29 +30,21 @@ def performance_claims_metric(filename: str, verbosity: int, log_queue) -> Tuple
     start_time = time.time()
     pid = os.getpid() # Get process ID for clear log messages
 
-    instruction = "Given the following readme, give a number from 0 to 1.0, with 1 being the best, on the performance claims of this model. Take into account things like verifiable claims and evidence provided within the readme to make the score. ONLY PROVIDE A SINGLE NUMBER, NO OTHER TEXT SHOULD BE IN THE RESPONSE. IT SHOULD BE DIRECTLY CONVERTABLE TO A FLOAT:\n\n"
-
     try:
         if verbosity >= 1: # Informational
-            log_queue.put(f"[{pid}] [INFO] Calling LLM for performance claims on '{os.path.basename(filename)}'...")
-            
-        llm_response_str = process_file_and_get_response(filename, instruction, "gemma3:1b")
+            log_queue.put(f"[{pid}] [INFO] Calling LLM for performance claims on '{os.path.basename(getattr(readme, 'path', readme))}'...")
 
-        score = 0.0  # Default to 0.0 for failure cases
+        # One request scores every LLM dimension of this README; the other LLM metric shares it
+        score = (await get_readme_scores_async(readme, "gemma3:1b", log_queue=log_queue, verbosity=verbosity))["performance_claims"]
 
-        # Safely convert the LLM's string response to a float
-        if llm_response_str is not None:
-            score = float(llm_response_str.strip())
+        if score is not None:
             if verbosity >= 2: # Debug
-                log_queue.put(f"[{pid}] [DEBUG] Successfully converted LLM response to score: {score}")
+                log_queue.put(f"[{pid}] [DEBUG] LLM scored performance claims: {score}")
         else:
-             if verbosity >= 1: # Informational
-                log_queue.put(f"[{pid}] [WARNING] Received no response from LLM for performance claims metric.")
+            score = 0.0  # Default to 0.0 for failure cases
+            if verbosity >= 1: # Informational
+                log_queue.put(f"[{pid}] [WARNING] Received no usable score from LLM for performance claims metric.")
 
-    except (ValueError, TypeError):
-        if verbosity >= 1: # Informational
-            log_queue.put(f"[{pid}] [WARNING] Could not convert LLM response '{llm_response_str}' to a float.")
-        score = 0.0 # Ensure score is 0 on conversion failure
     except Exception as e:
         # Log any other critical error before the process terminates
         if verbosity >0:
@@ -0,0 +1,176 @@
+import math
+import re
+from typing import Dict, List, Optional, Tuple
+
+from readme_document import ReadmeDocument, FENCE_PATTERN
+from .keyword_matcher import KeywordMatcher
+
+# Rough size of a token for English prose and markdown; close enough to budget prompts.
+CHARS_PER_TOKEN = 4
+
+# How much of a table or code sample is kept; the rest is summarised in one line.
+MAX_TABLE_ROWS = 5
+MAX_CODE_LINES = 12
+
+# A section that does not fit is still cut to fit when at least this many tokens are left.
+MIN_SECTION_TOKENS = 40
+
+# Sections and code blocks that cost many tokens and say nothing the LLM is asked about.
+LOW_SIGNAL_TITLE = re.compile(r"citation|bibtex|cite this|model card (authors|contact)", re.IGNORECASE)
+LOW_SIGNAL_LANGUAGES = {"bibtex", "bib", "latex", "tex"}
+
+HTML_COMMENT = re.compile(r"<!--.*?-->", re.DOTALL)
+LINKED_IMAGE = re.compile(r"\[!\[[^\]]*\]\([^)]*\)\]\([^)]*\)")
+IMAGE = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+LINK = re.compile(r"\[([^\]]+)\]\([^)]*\)")
+HTML_TAG = re.compile(r"</?[a-zA-Z][^>]*>")
+PLACEHOLDER = re.compile(r"^\s*[\[(]?more information needed[\])]?\s*$", re.IGNORECASE)
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimates the tokens `text` costs in a prompt, at CHARS_PER_TOKEN characters per token."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _compact_lines(text: str) -> str:
+    """Strips markup and trims tables and code blocks of one section's text."""
+    text = HTML_COMMENT.sub("", text)
+    out: List[str] = []
+    fence: Optional[str] = None
+    code_kept = code_dropped = 0
+    skip_block = False
+    table_rows = table_dropped = 0
+
+    def end_table():
+        nonlocal table_rows, table_dropped
+        if table_dropped:
+            out.append(f"| ... {table_dropped} more rows |")
+        table_rows = table_dropped = 0
+
+    for line in text.splitlines():
+        fence_match = FENCE_PATTERN.match(line)
+        if fence is not None:
+            if fence_match and fence_match.group(1).startswith(fence) and not fence_match.group(2):
+                if not skip_block:
+                    if code_dropped:
+                        out.append(f"# ... {code_dropped} more lines")
+                    out.append(line.strip())
+                fence = None
+            elif skip_block:
+                pass
+            elif code_kept < MAX_CODE_LINES:
+                out.append(line.rstrip())
+                code_kept += 1
+            else:
+                code_dropped += 1
+            continue
+        if fence_match:
+            end_table()
+            fence, code_kept, code_dropped = fence_match.group(1), 0, 0
+            skip_block = fence_match.group(2).lower() in LOW_SIGNAL_LANGUAGES
+            if not skip_block:
+                out.append(line.strip())
+            continue
+
+        line = LINKED_IMAGE.sub("", line)
+        line = IMAGE.sub("", line)
+        line = LINK.sub(r"\1", line)
+        line = HTML_TAG.sub("", line).rstrip()
+        if PLACEHOLDER.match(line):
+            continue
+
+        if line.lstrip().startswith("|"):
+            # Keep the header, its separator row and the first MAX_TABLE_ROWS rows
+            if table_rows < MAX_TABLE_ROWS + 2:
+                out.append(line.strip())
+                table_rows += 1
+            else:
+                table_dropped += 1
+            continue
+        end_table()
+        out.append(line)
+    end_table()
+    if fence is not None and not skip_block and code_dropped:
+        out.append(f"# ... {code_dropped} more lines")
+
+    # Collapse runs of blank lines
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(out)).strip()
+
+
+def _blocks(document: ReadmeDocument) -> List[Tuple[str, str]]:
+    """Returns (heading, cleaned text) for every section worth sending, in document order."""
+    blocks: List[Tuple[str, str]] = []
+    if document.front_matter.strip():
+        blocks.append(("# Model card metadata", _compact_lines(document.front_matter)))
+    blocks.append(("", _compact_lines(document.root.text)))
+    for section in document.sections:
+        if LOW_SIGNAL_TITLE.search(section.title):
+            continue
+        blocks.append((f"{'#' * section.level} {section.title}", _compact_lines(section.text)))
+
+    # Drop paragraphs repeated across the card (template boilerplate, copied disclaimers)
+    seen: set = set()
+    deduplicated: List[Tuple[str, str]] = []
+    for heading, text in blocks:
+        paragraphs = []
+        for paragraph in re.split(r"\n\s*\n", text):
+            normalized = " ".join(paragraph.split()).lower()
+            if len(normalized) > 40 and normalized in seen:
+                continue
+            seen.add(normalized)
+            paragraphs.append(paragraph)
+        text = "\n\n".join(paragraphs).strip()
+        if text:
+            deduplicated.append((heading, text))
+    return deduplicated
+
+
+def _render(heading: str, text: str) -> str:
+    return f"{heading}\n{text}" if heading else text
+
+
+def compact_readme(document: ReadmeDocument, budget_tokens: int, relevance: Optional[KeywordMatcher] = None) -> str:
+    """
+    Returns the README text to put in a prompt, within about `budget_tokens`.
+
+    Badges, images, HTML, link targets, "[More Information Needed]"
+    placeholders, citation sections and repeated paragraphs are removed,
+    and tables and code samples are cut short. If the rest is still over
+    budget, the introduction is kept first, then the sections with the
+    most `relevance` keyword hits (in their heading, which counts triple,
+    or their text); the chosen sections are sent in document order. The
+    top section is always kept, cut to the budget if it does not fit. A
+    budget of 0 or less returns the text unchanged.
+    """
+    if budget_tokens <= 0:
+        return document.text
+
+    blocks = _blocks(document)
+    rendered = [_render(heading, text) for heading, text in blocks]
+    if estimate_tokens("\n\n".join(rendered)) <= budget_tokens:
+        return "\n\n".join(rendered)
+
+    def priority(index: int) -> Tuple[int, int]:
+        heading, text = blocks[index]
+        if not heading.startswith("#"):
+            return (1, 0) # The introduction comes first
+        if relevance is None:
+            return (0, 0)
+        hits = 3 * len(relevance.find_all(heading.lower())) + len(relevance.find_all(text.lower()))
+        return (0, hits)
+
+    chosen: Dict[int, str] = {}
+    remaining = budget_tokens
+    for index in sorted(range(len(blocks)), key=lambda i: (priority(i), -i), reverse=True):
+        cost = estimate_tokens(rendered[index]) + 1
+        if cost <= remaining:
+            chosen[index] = rendered[index]
+            remaining -= cost
+        elif remaining >= MIN_SECTION_TOKENS or not chosen:
+            # Below MIN_SECTION_TOKENS only the top section is cut to fit, so the prompt is never empty
+            cut = rendered[index][:remaining * CHARS_PER_TOKEN]
+            chosen[index] = cut[:cut.rfind("\n")] or cut if "\n" in cut else cut
+            remaining = 0
+        if remaining < MIN_SECTION_TOKENS:
+            break
+    return "\n\n".join(chosen[index] for index in sorted(chosen))
@@ -0,0 +1,182 @@
+import hashlib
+import re
+from dataclasses import dataclass, field
+from typing import Optional, Union
+
+
+HEADING_PATTERN = re.compile(r"^(#{1,6})[ \t]+(.+?)[ \t#]*$")
+FENCE_PATTERN = re.compile(r"^[ \t]*(```+|~~~+)[ \t]*([\w+.#-]*)")
+LINK_PATTERN = re.compile(r"\[[^\]]*\]\(\s*<?([^)\s>]+)>?(?:\s+\"[^\"]*\")?\s*\)|<(https?://[^>\s]+)>|(https?://[^\s)\]>\"'`]+)")
+
+
+@dataclass
+class ReadmeSection:
+    """
+    One heading of a README and the text under it, up to the next heading.
+
+    Attributes:
+        title (str): The heading text; "" for the text before the first heading.
+        level (int): 1-6 for "#" to "######"; 0 for the document root.
+        text (str): The section's own text, without its subsections.
+        children (list[ReadmeSection]): The subsections, in document order.
+    """
+    title: str
+    level: int
+    text: str = ""
+    children: list["ReadmeSection"] = field(default_factory=list)
+
+    def walk(self) -> list["ReadmeSection"]:
+        """Returns this section and every section below it, in document order."""
+        sections = [self]
+        for child in self.children:
+            sections.extend(child.walk())
+        return sections
+
+
+@dataclass
+class CodeBlock:
+    """
+    A fenced code block of a README.
+
+    Attributes:
+        language (str): The info string after the opening fence, e.g. "python"; "" if none.
+        code (str): The block's content, without the fences.
+    """
+    language: str
+    code: str
+
+
+@dataclass
+class ReadmeDocument:
+    """
+    A README read and parsed once per model, then handed to every metric that
+    looks at it, so none of them reads or preprocesses the file again.
+
+    Attributes:
+        path (str): The file the README was read from; "" if the model has none.
+        text (str): The raw text.
+        text_lower (str): The text lowercased, for case-insensitive matching.
+        sha256 (str): Hex SHA-256 of the text, identifying its content.
+        front_matter (str): The YAML block between leading "---" lines of a model card, if any.
+        root (ReadmeSection): The section tree; the root holds the text before the first heading.
+        code_blocks (list[CodeBlock]): The fenced code blocks, in document order.
+        links (list[str]): Every distinct link target, in order of first appearance.
+    """
+    path: str
+    text: str
+    text_lower: str = ""
+    sha256: str = ""
+    front_matter: str = ""
+    root: ReadmeSection = field(default_factory=lambda: ReadmeSection("", 0))
+    code_blocks: list[CodeBlock] = field(default_factory=list)
+    links: list[str] = field(default_factory=list)
+
+    @classmethod
+    def from_text(cls, text: str, path: str = "") -> "ReadmeDocument":
+        front_matter, body = cls._split_front_matter(text)
+        root, code_blocks = cls._parse(body)
+        return cls(
+            path=path,
+            text=text,
+            text_lower=text.lower(),
+            sha256=hashlib.sha256(text.encode("utf-8")).hexdigest(),
+            front_matter=front_matter,
+            root=root,
+            code_blocks=code_blocks,
+            links=cls._find_links(body),
+        )
+
+    @classmethod
+    def from_file(cls, path: str) -> "ReadmeDocument":
+        """Reads and parses a README; a missing or unreadable file gives an empty document."""
+        if not path:
+            return cls.from_text("", path)
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                return cls.from_text(f.read(), path)
+        except OSError:
+            return cls.from_text("", path)
+
+    @classmethod
+    def load(cls, readme: Union["ReadmeDocument", str, None]) -> "ReadmeDocument":
+        """Returns `readme` itself if it is already a ReadmeDocument, otherwise reads the file it names."""
+        if isinstance(readme, ReadmeDocument):
+            return readme
+        return cls.from_file(readme or "")
+
+    @property
+    def sections(self) -> list[ReadmeSection]:
+        """Every section below the root, in document order."""
+        return self.root.walk()[1:]
+
+    def find_section(self, title: str) -> Optional[ReadmeSection]:
+        """Returns the first section whose heading contains `title`, ignoring case."""
+        title = title.lower()
+        for section in self.sections:
+            if title in section.title.lower():
+                return section
+        return None
+
+    def __bool__(self) -> bool:
+        return bool(self.text.strip())
+
+    @staticmethod
+    def _split_front_matter(text: str) -> tuple[str, str]:
+        if not text.startswith("---"):
+            return "", text
+        match = re.match(r"---[ \t]*\r?\n(.*?)\r?\n---[ \t]*(?:\r?\n|$)", text, re.DOTALL)
+        if match is None:
+            return "", text
+        return match.group(1), text[match.end():]
+
+    @staticmethod
+    def _parse(body: str) -> tuple[ReadmeSection, list[CodeBlock]]:
+        root = ReadmeSection("", 0)
+        stack: list[ReadmeSection] = [root]
+        lines: dict[int, list[str]] = {id(root): []}
+        code_blocks: list[CodeBlock] = []
+        fence: Optional[str] = None
+        fence_language = ""
+        code_lines: list[str] = []
+
+        for line in body.splitlines():
+            fence_match = FENCE_PATTERN.match(line)
+            if fence is not None:
+                if fence_match and fence_match.group(1).startswith(fence) and not fence_match.group(2):
+                    code_blocks.append(CodeBlock(fence_language, "\n".join(code_lines)))
+                    fence = None
+                else:
+                    code_lines.append(line)
+                lines[id(stack[-1])].append(line)
+                continue
+            if fence_match:
+                fence, fence_language, code_lines = fence_match.group(1), fence_match.group(2), []
+                lines[id(stack[-1])].append(line)
+                continue
+
+            heading = HEADING_PATTERN.match(line)
+            if heading:
+                section = ReadmeSection(heading.group(2).strip(), len(heading.group(1)))
+                while stack[-1].level >= section.level:
+                    stack.pop()
+                stack[-1].children.append(section)
+                stack.append(section)
+                lines[id(section)] = []
+            else:
+                lines[id(stack[-1])].append(line)
+
+        if fence is not None:
+            # An unclosed fence runs to the end of the file
+            code_blocks.append(CodeBlock(fence_language, "\n".join(code_lines)))
+
+        for section in root.walk():
+            section.text = "\n".join(lines[id(section)]).strip()
+        return root, code_blocks
+
+    @staticmethod
+    def _find_links(body: str) -> list[str]:
+        links: dict[str, None] = {}
+        for match in LINK_PATTERN.finditer(body):
+            target = next(group for group in match.groups() if group)
+            links.setdefault(target.rstrip(".,;:"), None)
+        return list(links)
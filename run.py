@@ -4,22 +4,57 @@ import subprocess
 import url_class
 import metric_caller
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import itertools
 import time
 from json_output import build_model_output
 import os
-from classes.github_api import GitHubApi
-from get_model_metrics import get_model_size, get_model_README, get_model_license
-
 import requests
+from classes.api import Api
+from classes.async_api import AsyncApi
+from classes.github_api import GitHubApi
+from classes.github_token_pool import GitHubTokenPool
+from classes.rate_limit_scheduler import RateLimitScheduler
+from classes.credential_cache import CredentialCache
+from get_model_metrics import get_model_snapshot
+from readme_document import ReadmeDocument
 
 
 def validate_github_token(token: str) -> bool:
-    """Checks if a GitHub token is valid by making a simple API call."""
+    """Checks if a GitHub token (or any token of a comma separated pool) is valid by making a simple API call."""
+    if not token:
+        return False
+    for single_token in GitHubTokenPool.parse(token):
+        headers = {"Authorization": f"token {single_token}"}
+        response = Api.session_for(GitHubApi.BASE_URL).get(f"{GitHubApi.BASE_URL}/zen", headers=headers, timeout=Api._TIMEOUT)
+        if response.status_code == 200:
+            return True
+    return False
+
+def check_github_token(token: str, cache: CredentialCache = None) -> bool:
+    """
+    Runs both GitHub token checks at once, or skips them when the cache says
+    every token of the pool was accepted recently. Exits like
+    GitHubApi.verify_token when GitHub rejects the token outright.
+    """
     if not token:
         return False
-    headers = {"Authorization": f"token {token}"}
-    response = requests.get("https://api.github.com/zen", headers=headers)
-    return response.status_code == 200
+    tokens = GitHubTokenPool.parse(token)
+    if cache is not None and tokens and all(cache.is_valid("github", single_token) for single_token in tokens):
+        return True
+    with ThreadPoolExecutor(max_workers=2) as checks:
+        verified = checks.submit(GitHubApi.verify_token, token)
+        validated = checks.submit(validate_github_token, token)
+        verified_tokens = verified.result()
+        accepted = validated.result()
+    if cache is not None:
+        # Only the tokens GitHub accepted are remembered, so a rejected pool token is checked again next run
+        for single_token in tokens:
+            if accepted and single_token in verified_tokens:
+                cache.remember("github", single_token)
+            else:
+                cache.forget("github", single_token)
+    return accepted
 
 def validate_log_file_path(path: str) -> bool:
     """Checks if the log file path is valid and the directory is writable."""
@@ -36,37 +71,63 @@ def validate_log_file_path(path: str) -> bool:
     return True
 
 
-def main() -> int:
-    start_time = time.time()
+def evaluate_project_group(group: url_class.ProjectGroup, plan: metric_caller.TaskPlan, available_functions: dict, verbosity: int, log_file_path: str, pool=None, log_sink=None, batcher=None) -> tuple:
+    """Fetches one model's metadata and runs every metric on it. Returns (name, scores, latency)."""
+    snapshot = get_model_snapshot(group.model.namespace, group.model.repo, group.model.rev)
 
+    input_dict = {
+        "repo_owner": group.model.namespace,
+        "repo_name": group.model.repo,
+        "verbosity": verbosity,
+        "log_queue": log_file_path,
+        "model_size_bytes": snapshot.size,
+        "github_str": f"{group.code.link}",  # New parameter for GitHub repo
+        "dataset_name": f"{group.dataset.repo}",  # New parameter for dataset name
+        "filename" : snapshot.readme_path,
+        "readme" : ReadmeDocument.from_file(snapshot.readme_path),  # Read and parsed once, shared by every README metric
+        "license" : snapshot.license
+    }
 
+    scores,latency = metric_caller.run_concurrently_from_file(plan,input_dict,available_functions,log_file_path,pool=pool,log_sink=log_sink,batcher=batcher)
+    return f"{group.model.repo}", scores, latency
 
+def evaluate_project_groups(project_groups: list, evaluate, jobs: int = 1, ordered: bool = True):
+    """
+    Runs `evaluate` on every project group with at most `jobs` models in flight.
 
-    log_level_str = os.getenv('LOG_LEVEL')
-    log_file_path = os.getenv('LOG_FILE')
-    github_token = os.getenv("GITHUB_TOKEN")
-    gen_ai_key = os.getenv('GEN_AI_STUDIO_API_KEY') # Used by a child module
+    Results are yielded in input order (held in a reorder buffer until every
+    earlier model has finished) when `ordered` is True, otherwise as soon as
+    each model completes.
+    """
+    if jobs <= 1:
+        for group in project_groups:
+            yield evaluate(group)
+        return
 
-    
+    groups = enumerate(project_groups)
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        pending = {executor.submit(evaluate, group): index for index, group in itertools.islice(groups, jobs)}
+        reorder_buffer = {}
+        next_index = 0
 
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                for next_group_index, group in itertools.islice(groups, 1):
+                    pending[executor.submit(evaluate, group)] = next_group_index
+                if ordered:
+                    reorder_buffer[index] = future.result()
+                else:
+                    yield future.result()
 
-    GitHubApi.verify_token(github_token)
-    
-    if not log_level_str or not log_level_str.isdigit() or int(log_level_str) not in [0, 1, 2]:
-        # print("ERROR: LOG_LEVEL environment variable not set or invalid. Must be 0, 1, or 2.", file=sys.stderr)
-        sys.exit(1)
-        
-    if not log_file_path or not validate_log_file_path(log_file_path):
-        # print(f"ERROR: LOG_FILE environment variable not set or path is unwritable: '{log_file_path}'", file=sys.stderr)
-        sys.exit(1)
-        
-    if not github_token or not validate_github_token(github_token):
-        # print("ERROR: GITHUB_TOKEN environment variable not set or is invalid.", file=sys.stderr)
-        sys.exit(1)
-        
-    if not gen_ai_key:
-        # print("ERROR: GEN_AI_STUDIO_API_KEY environment variable not set.", file=sys.stderr)
-        sys.exit(1)
+            while next_index in reorder_buffer:
+                yield reorder_buffer.pop(next_index)
+                next_index += 1
+
+
+def main() -> int:
+    start_time = time.time()
 
     parser = argparse.ArgumentParser(
         prog="run",
@@ -75,7 +136,7 @@ def main() -> int:
     )
 
     parser.add_argument('-h', '--help', action='help', default=argparse.SUPPRESS,
-                        help="""usage: run [-v | --verbose] [-h | --help] { install, test } | URL_FILE\n
+                        help="""usage: run [-v | --verbose] [-h | --help] [-j N] [--order {input,completion}] --import-profile | { install, test } | URL_FILE\n
                         positional arguments:\n
                         \tinstall             Install any dependencies needed\n
                         \ttest                Runs testing suite\n
@@ -83,7 +144,10 @@ def main() -> int:
                         
                         options:\n
                         \t-h, --help          show this help message\n
-                        \t-v. --verbose       enable verbose output\n""")
+                        \t-v. --verbose       enable verbose output\n
+                        \t-j, --jobs N        number of models to evaluate at once\n
+                        \t--order ORDER       emit results in 'input' or 'completion' order\n
+                        \t--import-profile    report how long each planned metric module takes to import, then exit\n""")
     
     parser.add_argument(
         '-v', '--verbose',
@@ -91,15 +155,94 @@ def main() -> int:
         help='enable verbose output'
     )
 
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=1,
+        help='number of models to evaluate at once'
+    )
+
+    parser.add_argument(
+        '--order',
+        choices=['input', 'completion'],
+        default='input',
+        help="emit results in 'input' or 'completion' order"
+    )
+
+    parser.add_argument(
+        '--import-profile',
+        action='store_true',
+        help='report how long each planned metric module takes to import, then exit'
+    )
+
     # install command
     parser.add_argument(
         "target",
         type=str,
+        nargs="?",
         help="Choose 'install', 'test', or URL path."
     )
 
     args = parser.parse_args()
 
+    # Profiling only imports the metric modules, so it needs neither a target nor the environment below
+    if args.import_profile:
+        plan = metric_caller.TaskPlan.compile("./tasks.txt", metric_caller.load_available_functions("metrics"))
+        for module, seconds, error in metric_caller.profile_imports("metrics", [task.func_name for task in plan.tasks]):
+            print(f"{module}: {error}" if error else f"{module}: {seconds * 1000:.1f} ms")
+        return 0
+
+    if args.target is None:
+        parser.error("the following arguments are required: target")
+
+    log_level_str = os.getenv('LOG_LEVEL')
+    log_file_path = os.getenv('LOG_FILE')
+    github_token = os.getenv("GITHUB_TOKEN")
+    gen_ai_key = os.getenv('GEN_AI_STUDIO_API_KEY') # Used by a child module
+    http_cache_dir = os.getenv('HTTP_CACHE_DIR') # Optional: enables the persistent GET response cache
+
+    
+
+
+    credential_ttl = os.getenv('CREDENTIAL_CACHE_TTL', '')
+    credential_cache = CredentialCache(
+        os.getenv('CREDENTIAL_CACHE_FILE'),
+        ttl=float(credential_ttl) if credential_ttl.isdigit() else CredentialCache.DEFAULT_TTL
+    )
+
+    GitHubApi.credential_cache = credential_cache
+    
+    if not log_level_str or not log_level_str.isdigit() or int(log_level_str) not in [0, 1, 2]:
+        # print("ERROR: LOG_LEVEL environment variable not set or invalid. Must be 0, 1, or 2.", file=sys.stderr)
+        sys.exit(1)
+        
+    if not log_file_path or not validate_log_file_path(log_file_path):
+        # print(f"ERROR: LOG_FILE environment variable not set or path is unwritable: '{log_file_path}'", file=sys.stderr)
+        sys.exit(1)
+        
+    if not gen_ai_key:
+        # print("ERROR: GEN_AI_STUDIO_API_KEY environment variable not set.", file=sys.stderr)
+        sys.exit(1)
+
+    # The token checks are network round trips; once the cheap checks above pass,
+    # let them run while the URL file is parsed
+    credential_checks = ThreadPoolExecutor(max_workers=1)
+    github_check = credential_checks.submit(check_github_token, github_token, credential_cache)
+    credential_checks.shutdown(wait=False)
+
+    if http_cache_dir:
+        cache_mb = os.getenv('HTTP_CACHE_MAX_MB', '256')
+        Api.enable_cache(os.path.join(http_cache_dir, "http_cache.sqlite"), max_bytes=int(cache_mb) * 1024 * 1024 if cache_mb.isdigit() else 256 * 1024 * 1024)
+
+
+    project_groups: list[url_class.ProjectGroup] = []
+    if args.target not in ("install", "test"):
+        project_groups = url_class.parse_project_file(args.target)
+
+    if not github_check.result():
+        # print("ERROR: GITHUB_TOKEN environment variable not set or is invalid.", file=sys.stderr)
+        sys.exit(1)
+
 
     # --- dispatch logic ---
     if args.target == "install":
@@ -115,30 +258,42 @@ def main() -> int:
 
     else:
         #Running URL FILE
-        project_groups: list[url_class.ProjectGroup] = url_class.parse_project_file(args.target)
         x = metric_caller.load_available_functions("metrics")
-        for i in project_groups:
-            
-            size = get_model_size(i.model.namespace, i.model.repo, i.model.rev)
-            filename = get_model_README(i.model.namespace, i.model.repo, i.model.rev)
-            license = get_model_license(i.model.namespace, i.model.repo, i.model.rev)
-
-            input_dict = {
-                "repo_owner": i.model.namespace,
-                "repo_name": i.model.repo,
-                "verbosity": int(log_level_str),
-                "log_queue": log_file_path,
-                "model_size_bytes": size,
-                "github_str": f"{i.code.link}",  # New parameter for GitHub repo
-                "dataset_name": f"{i.dataset.repo}",  # New parameter for dataset name
-                "filename" : filename,
-                "license" : license
-            }
-
-            
-            scores,latency = metric_caller.run_concurrently_from_file("./tasks.txt",input_dict,x,log_file_path)
-            
-            build_model_output(f"{i.model.repo}","model",scores,latency)
+        plan = metric_caller.TaskPlan.compile("./tasks.txt", x)
+        jobs = max(args.jobs, 1)
+        Api.configure_pool(pool_maxsize=max(Api.POOL_MAXSIZE, jobs))
+        # Inline and thread metrics run in this process; only the rest need pool workers
+        process_tasks = [task.func_name for task in plan.tasks if task.executor == "process"]
+        with metric_caller.LogSink(log_file_path) as log_sink, \
+             metric_caller.MetricWorkerPool("metrics", processes=max(len(process_tasks), 1) * jobs, log_queue=log_sink.queue, preload=process_tasks) as pool:
+            plan.report(log_sink.queue, int(log_level_str))
+            github_pool = GitHubTokenPool(GitHubTokenPool.parse(github_token))
+            # A credential cache hit skipped check_token, which seeds each token's remaining quota; fetch it without spending any
+            for token in github_pool.active_tokens():
+                if RateLimitScheduler.for_token(token).remaining is None:
+                    try:
+                        GitHubApi.check_rate_limit(token)
+                    except requests.RequestException:
+                        pass # Planned without quota data; the first responses seed it
+            # Forecast only what the planned metrics declare they fetch from GitHub; with nothing declared the demand is unknown
+            github_requests_per_repo = sum(getattr(task.func, "github_requests", 0) for task in plan.tasks)
+            if github_requests_per_repo:
+                github_pool.plan(sum(1 for group in project_groups if group.code and "github.com" in group.code.link) * github_requests_per_repo)
+            if int(log_level_str) > 0:
+                log_sink.put(f"[INFO] {github_pool.describe()}")
+            # With several models in flight, metrics that have a batch form score them in one call
+            batched = any(task.batch is not None for task in plan.tasks)
+            batcher = metric_caller.BatchCollector(max_size=jobs) if jobs > 1 and batched else None
+            evaluate = lambda group: evaluate_project_group(group, plan, x, int(log_level_str), log_file_path, pool, log_sink, batcher)
+            for name, scores, latency in evaluate_project_groups(project_groups, evaluate, jobs, args.order == "input"):
+                build_model_output(name,"model",scores,latency)
+            if batcher is not None:
+                batcher.close()
+            if int(log_level_str) > 1:
+                for endpoint, counts in Api.retry_stats().items():
+                    log_sink.put(f"[INFO] Retried {endpoint} {counts['retries']} time(s), gave up {counts['gave_up']} time(s)")
+        # The async metrics of every model shared one event loop; close its HTTP sessions with it
+        metric_caller.close_metric_event_loop(cleanup=AsyncApi.close_sessions)
     
     return 0
 
@@ -0,0 +1,968 @@
+import unittest
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import multiprocessing
+from unittest.mock import patch
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from classes.api import Api
+from classes.disk_cache import DiskCache
+from classes.retry_policy import RetryPolicy
+from classes.rate_limit_scheduler import RateLimitScheduler
+from classes.github_token_pool import GitHubTokenPool
+from classes.async_api import AsyncApi
+from classes.hugging_face_api import HuggingFaceApi
+from classes.async_hugging_face_api import AsyncHuggingFaceApi
+from classes.github_api import GitHubApi
+from classes.async_github_api import AsyncGitHubApi
+from classes.llm_child_api import GenAiChatApi
+from classes.async_llm_child_api import AsyncGenAiChatApi
+from get_model_metrics import get_model_snapshot
+
+
+SHA = "0123456789abcdef0123456789abcdef01234567"
+TREE = [
+    {"type": "file", "path": "README.md", "size": 11},
+    {"type": "directory", "path": "sub"},
+    {"type": "file", "path": "sub/config.json", "size": 2},
+]
+MODEL_INFO = {
+    "id": "ns/repo",
+    "sha": SHA,
+    "tags": ["license:mit"],
+    "siblings": [
+        {"rfilename": "README.md", "size": 12},
+        {"rfilename": "model.bin", "size": 1000, "lfs": {"sha256": "ab" * 32, "size": 1000}},
+    ],
+}
+
+# Canned responses for the Hugging Face, GitHub and GenAI endpoints the clients use
+ROUTES = {
+    "/api/models/ns/repo": MODEL_INFO,
+    "/api/models/ns/repo?blobs=true": MODEL_INFO,
+    "/api/models/ns/repo/revision/main?blobs=true": MODEL_INFO,
+    f"/api/models/ns/repo/revision/{SHA}?blobs=true": MODEL_INFO,
+    "/api/models/ns/repo/tree/main/?recursive=True": TREE,
+    f"/api/models/ns/repo/tree/{SHA}/?recursive=True": TREE,
+    "/repos/owner/repo/pulls?state=all&per_page=100&page=1": [{"number": 1}, {"number": 2}],
+    "/repos/owner/repo/pulls?state=all&per_page=1&page=1": [{"number": 1}],
+    "/repos/owner/repo/pulls?state=all&per_page=1&page=2": [{"number": 2}],
+    "/repos/owner/repo/pulls?state=all&per_page=1&page=3": [],
+}
+
+FILES = {
+    "/ns/repo/resolve/main/README.md": b"# Stub\nbytes",
+    f"/ns/repo/resolve/{SHA}/README.md": b"# Stub\nbytes",
+    "/ns/repo/resolve/main/sub/config.json": b"{}",
+    # Not the content MODEL_INFO lists for model.bin, so verification must fail
+    f"/ns/repo/resolve/{SHA}/model.bin": b"\x00" * 1000,
+    "/blob.bin": bytes(range(256)) * 64,
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serves ROUTES and FILES and echoes any other request as JSON."""
+
+    protocol_version = "HTTP/1.1"
+
+    def _reply(self, status: int = 200, body=None, headers: dict = None, raw: bytes = None):
+        data = raw if raw is not None else json.dumps(body if body is not None else {}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/octet-stream" if raw is not None else "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self.server.requests.append(("GET", self.path, dict(self.headers)))
+        if self.path in FILES and self.headers.get("Range"):
+            start = int(self.headers["Range"][len("bytes="):].rstrip("-"))
+            data = FILES[self.path]
+            if start >= len(data):
+                self._reply(status=416, raw=b"")
+            else:
+                self._reply(status=206, raw=data[start:], headers={"Content-Range": f"bytes {start}-{len(data) - 1}/{len(data)}"})
+        elif self.path in FILES:
+            self._reply(raw=FILES[self.path])
+        elif self.path in ROUTES:
+            self._reply(body=ROUTES[self.path])
+        else:
+            self._reply(body={"path": self.path, "auth": self.headers.get("Authorization")})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        self.server.requests.append(("POST", self.path, dict(self.headers)))
+        if self.path == "/api/chat/completions":
+            content = payload["messages"][0]["content"]
+            self._reply(body={"choices": [{"message": {"content": f"echo: {content}"}}]})
+        else:
+            self._reply(body={"path": self.path, "payload": payload})
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer:
+    """A ThreadingHTTPServer on a free local port, run on a background thread."""
+
+    def __init__(self, handler=StubHandler):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.httpd.requests = []
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        self.thread.start()
+
+    @property
+    def requests(self):
+        return self.httpd.requests
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class ETagHandler(StubHandler):
+    """Serves a versioned JSON document with an ETag and answers matching revalidations with 304."""
+
+    def do_GET(self):
+        self.server.requests.append(("GET", self.path, dict(self.headers)))
+        etag = f'"v{self.server.version}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        headers = {"ETag": etag}
+        if self.path.startswith("/fresh"):
+            headers["Cache-Control"] = "max-age=3600"
+        self._reply(body={"version": self.server.version, "path": self.path}, headers=headers)
+
+
+class FlakyHandler(StubHandler):
+    """Answers 503 with Retry-After: 0 until server.failures runs out, then behaves like StubHandler."""
+
+    def _maybe_fail(self):
+        if self.server.failures > 0:
+            self.server.failures -= 1
+            self.server.requests.append((self.command, self.path, dict(self.headers)))
+            length = int(self.headers.get("Content-Length", 0))
+            self.rfile.read(length)
+            self._reply(status=503, body={"error": "busy"}, headers={"Retry-After": "0"})
+            return True
+        return False
+
+    def do_GET(self):
+        if not self._maybe_fail():
+            super().do_GET()
+
+    def do_POST(self):
+        if not self._maybe_fail():
+            super().do_POST()
+
+
+class SlowPostHandler(StubHandler):
+    """Takes DELAY seconds to answer a POST, as a long LLM completion would."""
+
+    DELAY = 0.5
+
+    def do_POST(self):
+        self.server.requests.append(("POST", self.path, dict(self.headers)))
+        time.sleep(self.DELAY)
+        try:
+            self._reply(body={})
+        except ConnectionError:
+            pass  # The client gave up waiting
+
+
+def _child_stats(url, result_queue):
+    api = Api(url)
+    api.get("/child")
+    result_queue.put(Api.pool_stats())
+
+
+class TestApiSessions(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer()
+        self.host = self.server.url.split("//")[1]
+
+    def tearDown(self):
+        self.server.close()
+
+    def test_get_and_post(self):
+        api = Api(self.server.url)
+        api.set_bearer_token("secret")
+        self.assertEqual(api.get("/models", payload={"a": "1"})["path"], "/models?a=1")
+        self.assertEqual(api.get("/models")["auth"], "Bearer secret")
+        self.assertEqual(api.post("/chat", payload={"x": "y"})["payload"], {"x": "y"})
+
+    def test_session_is_shared_per_host_and_reused(self):
+        first, second = Api(self.server.url), Api(self.server.url)
+        self.assertIs(first.session, second.session)
+
+        before = Api.pool_stats().get(self.host, {"requests": 0, "connections": 0})
+        for _ in range(5):
+            first.get("/a")
+            second.get("/b")
+        stats = Api.pool_stats()[self.host]
+
+        self.assertEqual(stats["requests"] - before["requests"], 10)
+        self.assertLessEqual(stats["connections"] - before["connections"], 1)
+        self.assertGreaterEqual(stats["reused"], 9)
+
+    def test_forked_worker_gets_its_own_pool(self):
+        Api(self.server.url).get("/parent")
+        result_queue = multiprocessing.Queue()
+        p = multiprocessing.Process(target=_child_stats, args=(self.server.url, result_queue))
+        p.start()
+        child_stats = result_queue.get(timeout=10)
+        p.join()
+
+        # The child only sees its own single request on a fresh connection
+        self.assertEqual(child_stats[self.host]["requests"], 1)
+        self.assertEqual(child_stats[self.host]["connections"], 1)
+
+
+def _child_cached_get(url, result_queue):
+    result_queue.put(Api(url).get("/doc"))
+
+
+class TestHttpCache(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer(ETagHandler)
+        self.server.httpd.version = 1
+        self.tmpdir = tempfile.TemporaryDirectory()
+        Api.enable_cache(os.path.join(self.tmpdir.name, "cache.sqlite"))
+
+    def tearDown(self):
+        Api.disable_cache()
+        self.server.close()
+        self.tmpdir.cleanup()
+
+    def test_revalidates_with_etag_and_serves_304_from_cache(self):
+        api = Api(self.server.url)
+        self.assertEqual(api.get("/doc")["version"], 1)
+        self.assertEqual(api.get("/doc")["version"], 1)
+
+        # The second request was conditional and the body came from the cache
+        self.assertNotIn("If-None-Match", self.server.requests[0][2])
+        self.assertEqual(self.server.requests[1][2]["If-None-Match"], '"v1"')
+
+        self.server.httpd.version = 2
+        self.assertEqual(api.get("/doc")["version"], 2)
+
+    def test_fresh_entries_skip_the_network(self):
+        api = Api(self.server.url)
+        api.get("/fresh")
+        api.get("/fresh")
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_tokens_do_not_share_entries(self):
+        anonymous, authorised = Api(self.server.url), Api(self.server.url)
+        authorised.set_bearer_token("secret")
+        anonymous.get("/fresh")
+        authorised.get("/fresh")
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_cache_is_shared_with_worker_processes(self):
+        Api(self.server.url).get("/doc")
+        result_queue = multiprocessing.Queue()
+        p = multiprocessing.Process(target=_child_cached_get, args=(self.server.url, result_queue))
+        p.start()
+        self.assertEqual(result_queue.get(timeout=10)["version"], 1)
+        p.join()
+        self.assertEqual(self.server.requests[-1][2]["If-None-Match"], '"v1"')
+
+    def test_lru_eviction_respects_size_budget(self):
+        cache = DiskCache(os.path.join(self.tmpdir.name, "lru.sqlite"), max_bytes=30)
+        cache.put("a", b"x" * 10)
+        cache.put("b", b"x" * 10)
+        cache.put("c", b"x" * 10)
+        cache.get("a")  # "b" is now the least recently used entry
+        cache.put("d", b"x" * 10)
+
+        self.assertIsNone(cache.get("b"))
+        for key in ("a", "c", "d"):
+            self.assertIsNotNone(cache.get(key))
+        self.assertLessEqual(cache.total_bytes(), 30)
+
+
+def _child_take_budget(policy, result_queue):
+    result_queue.put(policy.take_budget("host"))
+
+
+class TestRetryPolicy(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer(FlakyHandler)
+        self.server.httpd.failures = 2
+        self.host = self.server.url.split("//")[1]
+        self.previous = Api.RETRY_POLICY
+        Api.configure_retries(RetryPolicy(backoff_base=0.01))
+
+    def tearDown(self):
+        Api.configure_retries(self.previous)
+        self.server.close()
+
+    def test_transient_get_failures_are_retried_and_counted(self):
+        self.assertEqual(Api(self.server.url).get("/models")["path"], "/models")
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(Api.retry_stats()[f"GET {self.host}/models"], {"retries": 2, "gave_up": 0})
+
+    def test_gives_up_after_max_attempts(self):
+        self.server.httpd.failures = 10
+        with self.assertRaises(Exception):
+            Api(self.server.url).get("/models")
+        self.assertEqual(len(self.server.requests), Api.RETRY_POLICY.max_attempts)
+        self.assertEqual(Api.retry_stats()[f"GET {self.host}/models"]["gave_up"], 1)
+
+    def test_only_idempotent_posts_are_retried(self):
+        api = Api(self.server.url)
+        with self.assertRaises(Exception):
+            api.post("/chat", payload={"x": "y"})
+        self.assertEqual(len(self.server.requests), 1)
+
+        self.assertEqual(api.post("/chat", payload={"x": "y"}, idempotent=True)["payload"], {"x": "y"})
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_timed_out_post_is_not_retried(self):
+        server = StubServer(SlowPostHandler)
+        self.addCleanup(server.close)
+
+        async def async_post():
+            try:
+                return await AsyncApi(server.url).post("/chat", payload={"x": "y"}, idempotent=True)
+            finally:
+                await AsyncApi.close_sessions()
+
+        with patch.object(Api, "_TIMEOUT", SlowPostHandler.DELAY / 5):
+            with self.assertRaises(Exception):
+                Api(server.url).post("/chat", payload={"x": "y"}, idempotent=True)
+            with self.assertRaises(Exception):
+                asyncio.run(async_post())
+        self.assertEqual([method for method, _, _ in server.requests], ["POST", "POST"])
+
+    def test_host_budget_stops_retry_storms(self):
+        Api.configure_retries(RetryPolicy(backoff_base=0.01, host_budget=1))
+        self.server.httpd.failures = 10
+        api = Api(self.server.url)
+        with self.assertRaises(Exception):
+            api.get("/a")
+        with self.assertRaises(Exception):
+            api.get("/b")
+        # One retry for /a, then the budget is spent and /b fails on its first answer
+        self.assertEqual([path for _, path, _ in self.server.requests], ["/a", "/a", "/b"])
+
+    @unittest.skipUnless(hasattr(os, "register_at_fork"), "needs fork")
+    def test_forked_worker_gets_a_fresh_lock(self):
+        policy = RetryPolicy()
+        result_queue = multiprocessing.get_context("fork").Queue()
+        with policy._lock:
+            # Forked while another thread holds the lock, as a pool worker may be
+            p = multiprocessing.get_context("fork").Process(target=_child_take_budget, args=(policy, result_queue))
+            p.start()
+        try:
+            self.assertTrue(result_queue.get(timeout=10))
+        finally:
+            p.join(5)
+            if p.is_alive():
+                p.terminate()
+                p.join()
+
+    def test_delay_honours_retry_after_and_caps_jitter(self):
+        policy = RetryPolicy(backoff_base=1.0, backoff_max=5.0)
+        self.assertEqual(policy.delay(0, "3"), 3.0)
+        self.assertEqual(policy.delay(0, "120"), 5.0)
+        self.assertLessEqual(policy.delay(0, "Wed, 21 Oct 2015 07:28:00 GMT"), 5.0)
+        self.assertTrue(all(0.0 <= policy.delay(2) <= 4.0 for _ in range(50)))
+
+    def test_async_get_is_retried(self):
+        async def scenario():
+            try:
+                return await AsyncApi(self.server.url).get("/models")
+            finally:
+                await AsyncApi.close_sessions()
+
+        self.assertEqual(asyncio.run(scenario())["path"], "/models")
+        self.assertEqual(len(self.server.requests), 3)
+
+
+class FakeClock:
+    """A clock whose sleep() just moves time forward."""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+        self.slept = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class RateLimitHandler(StubHandler):
+    """Adds GitHub style rate-limit headers that count down with each request."""
+
+    def _reply(self, status=200, body=None, headers=None, raw=None):
+        self.server.remaining -= 1
+        headers = dict(headers or {}, **{
+            "X-RateLimit-Limit": "5000",
+            "X-RateLimit-Remaining": str(self.server.remaining),
+            "X-RateLimit-Reset": str(int(time.time()) + 3600),
+        })
+        super()._reply(status, body, headers, raw)
+
+
+class TestRateLimitScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.scheduler = RateLimitScheduler(clock=self.clock.time, sleep=self.clock.sleep)
+        RateLimitScheduler._schedulers.clear()
+
+    def observe(self, remaining, limit=5000, reset_in=100):
+        self.scheduler.observe({
+            "X-RateLimit-Limit": str(limit),
+            "X-RateLimit-Remaining": str(remaining),
+            "X-RateLimit-Reset": str(int(self.clock.now + reset_in)),
+        })
+
+    def test_plenty_of_budget_means_no_waiting(self):
+        self.observe(4000)
+        self.scheduler.plan(100)
+        for _ in range(100):
+            self.scheduler.acquire()
+        self.assertEqual(self.clock.slept, [])
+        self.assertEqual(self.scheduler.remaining, 3900)
+
+    def test_requests_are_spread_over_the_window_when_demand_exceeds_budget(self):
+        self.observe(10, reset_in=100)
+        self.scheduler.plan(50)
+        for _ in range(3):
+            self.scheduler.acquire()
+        # The remaining 9 requests are spread over the 100 seconds left
+        self.assertEqual(len(self.clock.slept), 2)
+        for waited in self.clock.slept:
+            self.assertAlmostEqual(waited, 100.0 / 9, places=3)
+
+    def test_low_priority_is_held_near_the_limit(self):
+        self.observe(400, limit=5000, reset_in=600)
+        self.assertEqual(self.scheduler.delay("low"), 600.0)
+        self.assertEqual(self.scheduler.delay("normal"), 0.0)
+
+    def test_exhausted_budget_waits_for_the_reset(self):
+        self.observe(0, reset_in=42)
+        self.scheduler.acquire()
+        self.assertEqual(self.clock.slept, [42.0])
+
+    def test_forecast(self):
+        self.assertIn("unknown", self.scheduler.describe())
+        self.observe(30, reset_in=120)
+        self.scheduler.plan(40)
+        forecast = self.scheduler.forecast()
+        self.assertEqual((forecast["remaining"], forecast["expected_requests"], forecast["fits"]), (30, 40, False))
+        self.assertIn("pacing", self.scheduler.describe())
+
+    def test_github_client_tracks_headers_per_token(self):
+        server = StubServer(RateLimitHandler)
+        server.httpd.remaining = 4000
+        try:
+            api = GitHubApi("owner", "repo")
+            api.base_url = server.url
+            api.set_bearer_token("token-a")
+            api.get_repo_pulls()
+            api.get_repo_pulls()
+        finally:
+            server.close()
+
+        self.assertEqual(api.scheduler.remaining, 3998)
+        self.assertEqual(api.scheduler.limit, 5000)
+        self.assertIs(api.scheduler, RateLimitScheduler.for_token("token-a"))
+        self.assertIsNone(RateLimitScheduler.for_token("token-b").remaining)
+
+
+class TokenBudgetHandler(StubHandler):
+    """Gives each token in server.budgets that many requests; unknown tokens get 401, spent ones 403."""
+
+    def do_GET(self):
+        token = (self.headers.get("Authorization") or "").replace("Bearer ", "")
+        self.server.requests.append(("GET", self.path, dict(self.headers)))
+        if token not in self.server.budgets:
+            self._reply(status=401, body={"message": "Bad credentials"})
+            return
+        # A limit this small keeps the scheduler from pacing the handful of test requests
+        reset = {"X-RateLimit-Limit": "4", "X-RateLimit-Reset": str(int(time.time()) + 3600)}
+        if self.server.budgets[token] <= 0:
+            self._reply(status=403, body={"message": "API rate limit exceeded"}, headers=dict(reset, **{"X-RateLimit-Remaining": "0"}))
+            return
+        self.server.budgets[token] -= 1
+        self._reply(body={"token": token}, headers=dict(reset, **{"X-RateLimit-Remaining": str(self.server.budgets[token])}))
+
+
+class TestGitHubTokenPool(unittest.TestCase):
+
+    def setUp(self):
+        RateLimitScheduler._schedulers.clear()
+        self.server = StubServer(TokenBudgetHandler)
+        self.server.httpd.budgets = {"a": 1, "b": 3}
+        self.api = GitHubApi("owner", "repo")
+        self.api.base_url = self.server.url
+
+    def tearDown(self):
+        self.server.close()
+        RateLimitScheduler._schedulers.clear()
+
+    def tokens_used(self):
+        return [headers["Authorization"].replace("Bearer ", "") for _, _, headers in self.server.requests]
+
+    def test_parse_and_single_token(self):
+        self.assertEqual(GitHubTokenPool.parse(" a, b\nc ,,"), ["a", "b", "c"])
+        self.api.set_bearer_token("a")
+        self.assertIsNone(self.api.token_pool)
+        self.api.set_bearer_token("a,b")
+        self.assertEqual(self.api.token_pool.tokens, ["a", "b"])
+        self.assertEqual(self.api.bearer_token, "a")
+
+    def test_requests_rotate_and_skip_bad_or_spent_tokens(self):
+        self.api.set_bearer_token("bad,a,b")
+        answers = [self.api.get("/user")["token"] for _ in range(4)]
+
+        self.assertEqual(answers, ["a", "b", "b", "b"])
+        # The rejected token was tried once and never again
+        self.assertEqual(self.tokens_used().count("bad"), 1)
+        self.assertEqual(self.api.token_pool.active_tokens(), ["a", "b"])
+
+    def test_exhausted_token_fails_over(self):
+        self.server.httpd.budgets = {"a": 0, "b": 3}
+        self.api.set_bearer_token("a,b")
+        self.assertEqual(self.api.get("/user")["token"], "b")
+        self.assertEqual(self.tokens_used(), ["a", "b"])
+        # Now that a is known to be spent, b is chosen straight away
+        self.assertEqual(self.api.token_pool.choose(), "b")
+
+    def test_async_token_pool_from_env(self):
+        self.server.httpd.budgets = {"a": 2, "b": 3}
+        api = AsyncGitHubApi("owner", "repo")
+        api.base_url = self.server.url
+
+        async def scenario():
+            try:
+                await api.set_bearer_token_from_env()
+                return [(await api.get("/user"))["token"] for _ in range(3)]
+            finally:
+                await AsyncApi.close_sessions()
+
+        with patch.dict(os.environ, {"GITHUB_TOKEN": "a,b"}):
+            answers = asyncio.run(scenario())
+        self.assertEqual(api.token_pool.tokens, ["a", "b"])
+        self.assertEqual(answers, ["a", "b", "b"])
+        self.assertNotIn("a,b", self.tokens_used())
+
+    def test_rate_limit_check_seeds_the_scheduler(self):
+        with patch.object(GitHubApi, "BASE_URL", self.server.url):
+            GitHubApi.check_rate_limit("b")
+        self.assertEqual([path for _, path, _ in self.server.requests], ["/rate_limit"])
+        self.assertEqual(RateLimitScheduler.for_token("b").remaining, 2)
+
+    def test_most_remaining_budget_wins(self):
+        pool = GitHubTokenPool(["a", "b"])
+        reset = str(int(time.time()) + 3600)
+        RateLimitScheduler.for_token("a").observe({"X-RateLimit-Remaining": "10", "X-RateLimit-Limit": "5000", "X-RateLimit-Reset": reset})
+        RateLimitScheduler.for_token("b").observe({"X-RateLimit-Remaining": "900", "X-RateLimit-Limit": "5000", "X-RateLimit-Reset": reset})
+        self.assertEqual(pool.choose(), "b")
+        pool.plan(100)
+        self.assertEqual(RateLimitScheduler.for_token("a").expected_requests, 50)
+        self.assertIn("2 of 2 tokens active, 910/10000", pool.describe())
+
+
+def _repo_node(name, pulls, has_more_pulls=False):
+    return {
+        "stargazerCount": 7,
+        "licenseInfo": {"spdxId": "LGPL-2.1"},
+        "mentionableUsers": {"totalCount": 4},
+        "defaultBranchRef": {"name": "main", "target": {"oid": SHA, "history": {"totalCount": 12}}},
+        "readme": {"text": f"# {name}"},
+        "readmeLower": None,
+        "pullRequests": {
+            "totalCount": 40,
+            "pageInfo": {"hasNextPage": has_more_pulls, "endCursor": "cursor-1" if has_more_pulls else None},
+            "nodes": [{"number": n, "state": "MERGED", "createdAt": "2024-01-01T00:00:00Z", "mergedAt": None} for n in pulls],
+        },
+        "languages": {
+            "totalCount": 2,
+            "pageInfo": {"hasNextPage": False, "endCursor": None},
+            "edges": [{"size": 900, "node": {"name": "Python"}}, {"size": 100, "node": {"name": "C"}}],
+        },
+    }
+
+
+class GraphQLHandler(StubHandler):
+    """Answers batched repository queries and follow-up pull request pages; unknown repositories are null."""
+
+    REPOS = {("org", "one"): ([3, 2], True), ("org", "two"): ([9], False), ("org", "three"): ([], False)}
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append(("POST", self.path, dict(self.headers), body))
+        variables = body["variables"]
+        if "page:" in body["query"]:
+            assert variables["after"] == "cursor-1"
+            page = {"pageInfo": {"hasNextPage": False, "endCursor": None},
+                    "nodes": [{"number": 1, "state": "CLOSED", "createdAt": "2023-01-01T00:00:00Z", "mergedAt": None}]}
+            data = {"repository": {"page": page}}
+        else:
+            data = {"rateLimit": {"cost": 1}}
+            i = 0
+            while f"o{i}" in variables:
+                known = self.REPOS.get((variables[f"o{i}"], variables[f"n{i}"]))
+                data[f"r{i}"] = _repo_node(variables[f"n{i}"], *known) if known else None
+                i += 1
+        self._reply(body={"data": data}, headers={
+            "X-RateLimit-Resource": "graphql", "X-RateLimit-Limit": "5000",
+            "X-RateLimit-Remaining": "4990", "X-RateLimit-Reset": str(int(time.time()) + 3600),
+        })
+
+
+class TestGitHubGraphQLSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        RateLimitScheduler._schedulers.clear()
+        self.server = StubServer(GraphQLHandler)
+        self.api = GitHubApi("org", "one")
+        self.api.base_url = self.server.url
+        self.api.set_bearer_token("token")
+
+    def tearDown(self):
+        self.server.close()
+        RateLimitScheduler._schedulers.clear()
+
+    def test_many_repos_in_one_query(self):
+        snapshots = self.api.get_repos_snapshot(["https://github.com/org/two", ("org", "missing"), "org/three"])
+
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertIsNone(snapshots["org/missing"])
+        two = snapshots["org/two"]
+        self.assertEqual((two.sha, two.license, two.readme, two.contributors, two.recent_commits), (SHA, "lgpl-2.1", "# two", 4, 12))
+        self.assertEqual(two.languages, {"Python": 900, "C": 100})
+        self.assertEqual([pull["number"] for pull in two.recent_pull_requests], [9])
+        self.assertEqual(self.api.graphql_cost, 1)
+
+    def test_large_connections_follow_the_cursor(self):
+        snapshots = self.api.get_repos_snapshot(["org/one"])
+        self.assertEqual([pull["number"] for pull in snapshots["org/one"].recent_pull_requests], [3, 2, 1])
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_batches_and_separate_rate_limit(self):
+        with patch.object(GitHubApi, "GRAPHQL_BATCH_SIZE", 2):
+            snapshots = self.api.get_repos_snapshot(["org/two", "org/three", "org/two"])
+        self.assertEqual(len(snapshots), 2)
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(RateLimitScheduler.for_token("token", "graphql").remaining, 4990)
+        self.assertIsNone(RateLimitScheduler.for_token("token").remaining)
+
+
+class TestHuggingFaceShaCache(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.clear_process_state()
+
+    def tearDown(self):
+        Api.disable_cache()
+        self.clear_process_state()
+        self.server.close()
+        self.tmpdir.cleanup()
+
+    @staticmethod
+    def clear_process_state():
+        HuggingFaceApi._resolved_revisions.clear()
+        HuggingFaceApi._memory_cache.clear()
+
+    def fetch_all(self):
+        api = HuggingFaceApi("ns", "repo")
+        api.base_url = self.server.url
+        info = api.get_model_info()
+        files = api.get_model_files_info()
+        readme = api.download_file("model_file_download", "README.md", self.tmpdir.name)
+        return info, files, readme
+
+    def test_metadata_is_fetched_at_the_resolved_sha(self):
+        info, files, readme = self.fetch_all()
+        paths = [path for _, path, _ in self.server.requests]
+        self.assertEqual(paths, [
+            "/api/models/ns/repo/revision/main?blobs=true",
+            f"/api/models/ns/repo/tree/{SHA}/?recursive=True",
+            f"/ns/repo/resolve/{SHA}/README.md",
+        ])
+        self.assertEqual(info["tags"], ["license:mit"])
+        self.assertEqual(len(files), 2)
+        with open(readme, "rb") as f:
+            self.assertEqual(f.read(), b"# Stub\nbytes")
+
+        # Same process, revision still resolved: everything comes from the cache
+        self.assertEqual(self.fetch_all()[:2], (info, files))
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_readme_path_names_the_namespace_and_commit(self):
+        readme = self.fetch_all()[2]
+        self.assertEqual(os.path.basename(readme), f"ns_repo_{SHA[:12]}_README.md.txt")
+        # Same repo name under another namespace gets its own file
+        self.assertNotEqual(HuggingFaceApi("other", "repo")._local_name("README.md", SHA), f"ns_repo_{SHA[:12]}_README.md")
+
+    def test_same_model_downloaded_twice_at_once(self):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.fetch_all()[2])) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), 2)
+        for readme in results:
+            with open(readme, "rb") as f:
+                self.assertEqual(f.read(), b"# Stub\nbytes")
+
+    def test_only_the_revision_is_checked_on_a_later_run(self):
+        Api.enable_cache(os.path.join(self.tmpdir.name, "cache.sqlite"))
+        first = self.fetch_all()
+        self.clear_process_state()  # as if this were a new run
+
+        second = self.fetch_all()
+        self.assertEqual(first[:2], second[:2])
+        self.assertEqual([path for _, path, _ in self.server.requests[3:]], ["/api/models/ns/repo/revision/main?blobs=true"])
+
+    def test_model_snapshot_needs_no_tree_walk(self):
+        with patch.object(HuggingFaceApi, "BASE_URL", self.server.url):
+            snapshot = get_model_snapshot("ns", "repo", dest_dir=self.tmpdir.name)
+
+        self.assertEqual(snapshot.sha, SHA)
+        self.assertEqual(snapshot.size, 1012)
+        self.assertEqual(snapshot.license, "mit")
+        self.assertEqual(snapshot.files[1]["sha256"], "ab" * 32)
+        with open(snapshot.readme_path, "rb") as f:
+            self.assertEqual(f.read(), b"# Stub\nbytes")
+        self.assertEqual([path for _, path, _ in self.server.requests], [
+            "/api/models/ns/repo/revision/main?blobs=true",
+            f"/ns/repo/resolve/{SHA}/README.md",
+        ])
+
+    def test_unpinned_snapshot_still_asks_for_sizes(self):
+        with patch.object(HuggingFaceApi, "BASE_URL", self.server.url), patch.object(HuggingFaceApi, "PIN_REVISIONS", False):
+            snapshot = get_model_snapshot("ns", "repo", dest_dir=self.tmpdir.name)
+
+        self.assertEqual(snapshot.size, 1012)
+        self.assertEqual(self.server.requests[0][1], "/api/models/ns/repo?blobs=true")
+
+
+class TestStreamingDownload(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.blob = FILES["/blob.bin"]
+        self.dest = os.path.join(self.tmpdir.name, "blob.bin")
+        HuggingFaceApi._resolved_revisions.clear()
+        HuggingFaceApi._memory_cache.clear()
+
+    def tearDown(self):
+        self.server.close()
+        self.tmpdir.cleanup()
+
+    def test_binary_content_is_written_byte_for_byte_in_chunks(self):
+        progress = []
+        written = Api(self.server.url).download("/blob.bin", self.dest, chunk_size=4096,
+                                                expected_sha256=hashlib.sha256(self.blob).hexdigest(),
+                                                progress=lambda done, total: progress.append((done, total)))
+        self.assertEqual(written, len(self.blob))
+        with open(self.dest, "rb") as f:
+            self.assertEqual(f.read(), self.blob)
+        self.assertEqual(progress[-1], (len(self.blob), len(self.blob)))
+        self.assertEqual(self.server.requests[0][2]["Accept-Encoding"], "identity")
+        self.assertFalse(os.path.exists(self.dest + ".part"))
+
+    def test_partial_download_resumes_with_a_range_request(self):
+        with open(self.dest + ".part", "wb") as f:
+            f.write(self.blob[:5000])
+
+        Api(self.server.url).download("/blob.bin", self.dest, expected_size=len(self.blob),
+                                      expected_sha256=hashlib.sha256(self.blob).hexdigest())
+        self.assertEqual(self.server.requests[0][2]["Range"], "bytes=5000-")
+        with open(self.dest, "rb") as f:
+            self.assertEqual(f.read(), self.blob)
+
+    def test_complete_partial_file_is_accepted_on_416(self):
+        with open(self.dest + ".part", "wb") as f:
+            f.write(self.blob)
+
+        self.assertEqual(Api(self.server.url).download("/blob.bin", self.dest, expected_size=len(self.blob)), len(self.blob))
+        with open(self.dest, "rb") as f:
+            self.assertEqual(f.read(), self.blob)
+
+    def test_hash_mismatch_leaves_no_file(self):
+        api = HuggingFaceApi("ns", "repo")
+        api.base_url = self.server.url
+        with self.assertRaises(Exception):
+            api.download_file("model_file_download", "model.bin", self.tmpdir.name)
+        self.assertEqual(os.listdir(self.tmpdir.name), [])
+
+
+class SlowFileHandler(StubHandler):
+    """Serves FILES after a fixed delay so sequential and concurrent downloads take visibly different times."""
+
+    DELAY = 0.3
+
+    def do_GET(self):
+        if self.path.split("?")[0] in FILES:
+            time.sleep(self.DELAY)
+        super().do_GET()
+
+
+class TestParallelDownload(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer(SlowFileHandler)
+        self.tmpdir = tempfile.TemporaryDirectory()
+        HuggingFaceApi._resolved_revisions.clear()
+        HuggingFaceApi._memory_cache.clear()
+        self.api = HuggingFaceApi("ns", "repo")
+        self.api.base_url = self.server.url
+
+    def tearDown(self):
+        self.server.close()
+        self.tmpdir.cleanup()
+
+    def test_list_downloads_run_concurrently_and_keep_order(self):
+        # The dataset endpoint is not pinned, so both files come straight from the main branch
+        started = time.monotonic()
+        paths = self.api.download_file("dataset_file_download", ["README.md", "sub/config.json"], self.tmpdir.name)
+        elapsed = time.monotonic() - started
+
+        self.assertLess(elapsed, 2 * SlowFileHandler.DELAY)
+        self.assertEqual([os.path.basename(p) for p in paths], ["ns_repo_README.md", "ns_repo_sub_config.json"])
+        self.assertEqual(self.api.download_errors, {})
+
+    def test_failed_file_is_isolated_and_reported(self):
+        progress = []
+        paths = self.api.download_file("model_file_download", ["README.md", "model.bin"], self.tmpdir.name,
+                                       progress=lambda name, done, total: progress.append((name, done, total)))
+
+        self.assertEqual([os.path.basename(p) for p in paths], [f"ns_repo_{SHA[:12]}_README.md"])
+        self.assertIn("sha256", self.api.download_errors["model.bin"])
+        self.assertIn(("README.md", 12, 12), progress)
+        self.assertNotIn(f"ns_repo_{SHA[:12]}_model.bin", os.listdir(self.tmpdir.name))
+
+    def test_files_over_the_byte_budget_are_not_fetched(self):
+        paths = self.api.download_file("model_file_download", ["README.md", "model.bin"], self.tmpdir.name, max_total_bytes=100)
+
+        self.assertEqual(len(paths), 1)
+        self.assertIn("budget", self.api.download_errors["model.bin"])
+        self.assertNotIn(f"/ns/repo/resolve/{SHA}/model.bin", [path for _, path, _ in self.server.requests])
+
+
+class TestClientsAgainstStub(unittest.TestCase):
+    """Runs the sync clients and their async counterparts against the same stub server."""
+
+    def setUp(self):
+        self.server = StubServer()
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.server.close()
+        self.tmpdir.cleanup()
+
+    def _point_at_stub(self, api):
+        api.base_url = self.server.url
+        return api
+
+    def run_async(self, coro):
+        async def runner():
+            try:
+                return await coro
+            finally:
+                await AsyncApi.close_sessions()
+        return asyncio.run(runner())
+
+    def test_hugging_face_sync(self):
+        api = self._point_at_stub(HuggingFaceApi("ns", "repo"))
+        self.assertEqual(api.get_model_info()["tags"], ["license:mit"])
+        self.assertEqual([f["path"] for f in api.get_model_files_info()], ["README.md", "sub/config.json"])
+
+    def test_hugging_face_async(self):
+        api = self._point_at_stub(AsyncHuggingFaceApi("ns", "repo"))
+
+        async def scenario():
+            info = await api.get_model_info()
+            files = await api.get_model_files_info()
+            paths = await api.download_file("model_file_download", ["README.md", "sub/config.json"], self.tmpdir.name)
+            single = await api.download_file("model_file_download", "README.md", self.tmpdir.name)
+            return info, files, paths, single
+
+        info, files, paths, single = self.run_async(scenario())
+        self.assertEqual(info["tags"], ["license:mit"])
+        self.assertEqual(files, HuggingFaceApi.parse_files_info(ROUTES["/api/models/ns/repo/tree/main/?recursive=True"]))
+        with open(paths[0], "rb") as f:
+            self.assertEqual(f.read(), FILES["/ns/repo/resolve/main/README.md"])
+        self.assertTrue(paths[1].endswith("ns_repo_sub_config.json"))
+        self.assertTrue(single.endswith("ns_repo_README.md.txt"))
+
+    def test_github_sync_and_async(self):
+        sync_api = self._point_at_stub(GitHubApi("owner", "repo"))
+        async_api = self._point_at_stub(AsyncGitHubApi("owner", "repo"))
+        expected = ROUTES["/repos/owner/repo/pulls?state=all&per_page=100&page=1"]
+
+        self.assertEqual(sync_api.get_repo_pulls(), expected)
+        self.assertEqual(self.run_async(async_api.get_repo_pulls()), expected)
+
+    def test_github_pulls_follow_pages(self):
+        api = self._point_at_stub(GitHubApi("owner", "repo"))
+        self.assertEqual([pull["number"] for pull in api.get_repo_pulls(per_page=1)], [1, 2])
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_chat_sync_and_async(self):
+        sync_api = GenAiChatApi(self.server.url, "stub-model")
+        async_api = AsyncGenAiChatApi(self.server.url, "stub-model")
+        async_api.set_bearer_token("key")
+
+        self.assertEqual(sync_api.get_chat_completion("hi"), "echo: hi")
+        self.assertEqual(self.run_async(async_api.get_chat_completion("hi")), "echo: hi")
+        self.assertEqual(self.server.requests[-1][2]["Authorization"], "Bearer key")
+
+    def test_many_concurrent_requests_on_one_loop(self):
+        api = AsyncGenAiChatApi(self.server.url, "stub-model")
+
+        async def scenario():
+            return await asyncio.gather(*(api.get_chat_completion(str(i)) for i in range(200)))
+
+        replies = self.run_async(scenario())
+        self.assertEqual(replies, [f"echo: {i}" for i in range(200)])
+
+    def test_async_error_status_raises(self):
+        api = AsyncApi(self.server.url)
+
+        class NotFoundHandler(StubHandler):
+            def do_GET(self):
+                self._reply(status=404, body={"error": "missing"})
+
+        missing = StubServer(NotFoundHandler)
+        try:
+            api.base_url = missing.url
+            with self.assertRaises(Exception):
+                self.run_async(api.get("/nothing"))
+        finally:
+            missing.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
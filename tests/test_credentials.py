@@ -0,0 +1,141 @@
+import unittest
+import os
+import stat
+import tempfile
+import threading
+from unittest.mock import MagicMock, patch
+
+import run
+from classes.credential_cache import CredentialCache
+from classes.github_api import GitHubApi
+
+
+class TestCredentialCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "credentials.json")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_remembers_only_a_fingerprint(self):
+        cache = CredentialCache(self.path, ttl=60)
+        self.assertFalse(cache.is_valid("github", "ghp_secret"))
+        cache.remember("github", "ghp_secret")
+
+        self.assertTrue(cache.is_valid("github", "ghp_secret"))
+        self.assertFalse(cache.is_valid("github", "another"))
+        self.assertFalse(cache.is_valid("genai", "ghp_secret"))
+        with open(self.path) as f:
+            self.assertNotIn("ghp_secret", f.read())
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o600)
+
+    def test_entries_expire_and_can_be_forgotten(self):
+        CredentialCache(self.path, ttl=0).remember("github", "expired")
+        self.assertFalse(CredentialCache(self.path).is_valid("github", "expired"))
+
+        cache = CredentialCache(self.path, ttl=60)
+        cache.remember("github", "token")
+        cache.forget("github", "token")
+        self.assertFalse(cache.is_valid("github", "token"))
+
+    def test_unreadable_file_means_no_entries(self):
+        with open(self.path, "w") as f:
+            f.write("not json")
+        self.assertFalse(CredentialCache(self.path).is_valid("github", "token"))
+
+
+class TestCheckGithubToken(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = CredentialCache(os.path.join(self.tmpdir.name, "credentials.json"), ttl=60)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    @patch("run.validate_github_token", return_value=True)
+    @patch("run.GitHubApi.verify_token", return_value=["token"])
+    def test_second_check_is_served_from_the_cache(self, mock_verify, mock_validate):
+        self.assertTrue(run.check_github_token("token", self.cache))
+        self.assertTrue(run.check_github_token("token", self.cache))
+        mock_verify.assert_called_once_with("token")
+        mock_validate.assert_called_once_with("token")
+
+    @patch("run.validate_github_token", return_value=False)
+    @patch("run.GitHubApi.verify_token")
+    def test_rejected_token_is_not_cached(self, mock_verify, mock_validate):
+        self.assertFalse(run.check_github_token("token", self.cache))
+        self.assertFalse(self.cache.is_valid("github", "token"))
+        self.assertFalse(run.check_github_token(None, self.cache))
+
+    @patch("run.GitHubApi.verify_token", side_effect=SystemExit(1))
+    @patch("run.validate_github_token", return_value=True)
+    def test_verify_token_exit_still_stops_the_run(self, mock_validate, mock_verify):
+        with self.assertRaises(SystemExit):
+            run.check_github_token("token", self.cache)
+
+    @patch("run.validate_github_token", return_value=True)
+    @patch("run.GitHubApi.verify_token", return_value=["a", "b"])
+    def test_pool_tokens_are_remembered_one_by_one(self, mock_verify, mock_validate):
+        self.assertTrue(run.check_github_token("a,b", self.cache))
+        self.assertTrue(self.cache.is_valid("github", "a"))
+        self.assertTrue(self.cache.is_valid("github", "b"))
+
+        # Once one token of the pool is dropped, the whole pool is checked again
+        self.cache.forget("github", "b")
+        self.assertTrue(run.check_github_token("a,b", self.cache))
+        self.assertEqual(mock_verify.call_count, 2)
+
+    @patch("run.validate_github_token", return_value=True)
+    @patch("run.GitHubApi.verify_token", return_value=["good"])
+    def test_rejected_pool_token_is_not_cached(self, mock_verify, mock_validate):
+        self.cache.remember("github", "bad")
+        self.assertTrue(run.check_github_token("good,bad", self.cache))
+        self.assertTrue(self.cache.is_valid("github", "good"))
+        self.assertFalse(self.cache.is_valid("github", "bad"))
+
+        # The rejected token keeps the pool from being served from the cache
+        self.assertTrue(run.check_github_token("good,bad", self.cache))
+        self.assertEqual(mock_verify.call_count, 2)
+
+    def test_both_checks_run_at_once(self):
+        both_started = threading.Barrier(2, timeout=5)
+
+        def check(token):
+            both_started.wait()
+            return [token]
+
+        with patch("run.GitHubApi.verify_token", side_effect=check), patch("run.validate_github_token", side_effect=lambda token: bool(check(token))):
+            self.assertTrue(run.check_github_token("token", self.cache))
+
+
+class TestRejectedTokensAreForgotten(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache = CredentialCache(os.path.join(self.tmpdir.name, "credentials.json"), ttl=60)
+        self.cache.remember("github", "revoked")
+        GitHubApi.credential_cache = self.cache
+
+    def tearDown(self):
+        GitHubApi.credential_cache = None
+        self.tmpdir.cleanup()
+
+    def test_unauthorized_response_forgets_the_token(self):
+        api = GitHubApi("owner", "repo")
+        api.set_bearer_token("revoked")
+        with patch("classes.api.Api._send", return_value=MagicMock(status_code=401, headers={})):
+            api._send("GET", GitHubApi.BASE_URL + "/user")
+        self.assertFalse(self.cache.is_valid("github", "revoked"))
+
+    @patch("classes.github_api.GitHubApi.check_token", return_value=False)
+    def test_failed_verification_forgets_the_token(self, mock_check):
+        with self.assertRaises(SystemExit):
+            GitHubApi.verify_token("revoked")
+        self.assertFalse(self.cache.is_valid("github", "revoked"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+import json
+import os
+import tempfile
+
+from metrics.keyword_matcher import KeywordMatch, KeywordMatcher, matcher_for
+from metrics.bus_factor_metric import bus_factor_metric
+from metrics.dataset_and_code_present import dataset_and_code_present
+from readme_document import ReadmeDocument
+
+
+class NullQueue:
+    def put(self, message):
+        pass
+
+
+class TestKeywordMatcher(unittest.TestCase):
+
+    def test_finds_every_occurrence_with_positions(self):
+        matcher = KeywordMatcher({"words": ["he", "she", "hers", "his"]})
+        self.assertEqual(matcher.find_all("ushers"), [
+            KeywordMatch("words", "she", 1, 4),
+            KeywordMatch("words", "he", 2, 4),
+            KeywordMatch("words", "hers", 2, 6),
+        ])
+
+    def test_whole_words_only_for_groups_that_ask_for_it(self):
+        matcher = KeywordMatcher(
+            {"keywords": ["data", "training data"], "hosts": ["kaggle.com/datasets"]},
+            {"keywords": True},
+        )
+        text = "see the database at https://www.kaggle.com/datasets/x; training data: 1gb"
+        self.assertEqual(matcher.found(text), {"keywords": ["training data", "data"], "hosts": ["kaggle.com/datasets"]})
+        self.assertEqual(matcher.found("metadata_data"), {"keywords": [], "hosts": []})
+
+    def test_keywords_are_case_insensitive_and_deduplicated(self):
+        matcher = KeywordMatcher({"g": ["Team", "team", ""]})
+        self.assertEqual(matcher.groups, {"g": ["team"]})
+        self.assertEqual(len(matcher.find_all("team team")), 2)
+
+    def test_scales_to_many_keywords(self):
+        terms = [f"term{i}" for i in range(500)]
+        matcher = KeywordMatcher({"g": terms}, {"g": True})
+        found = matcher.found(" ".join(reversed(terms[::50])))
+        self.assertEqual(sorted(found["g"]), sorted(terms[::50]))
+
+    def test_matcher_is_built_from_the_keywords_file_once(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "keywords.json")
+            with open(path, "w") as f:
+                json.dump({"metric": {"g": {"whole_words": True, "terms": ["author"]}}}, f)
+            matcher = matcher_for("metric", path)
+            self.assertIs(matcher_for("metric", path), matcher)
+            self.assertEqual(matcher.found("authors and author"), {"g": ["author"]})
+
+
+class TestScoresMatchSubstringSearch(unittest.TestCase):
+    """The metrics must score exactly like the `keyword in text` checks they replaced."""
+
+    CONTRIBUTOR_KEYWORDS = ["contributor", "contributors", "author", "authors", "team", "maintainer", "maintained by", "developed by", "credits"]
+    DATASET_HOSTS = ["huggingface.co/datasets", "kaggle.com/datasets", "roboflow.com", "drive.google.com"]
+    DATASET_KEYWORDS = ["dataset", "datasets", "data", "training data", "download data"]
+
+    READMES = [
+        "# Model\nMaintainers: alice",
+        "Authored by the NLP teams. Credit to everyone.",
+        "A data-driven model. Weights on https://www.kaggle.com/datasets/x",
+        "Trained on metadata only.",
+        "# Tiny\nNothing to see here.",
+        "",
+    ]
+
+    def test_bus_factor_scores_are_unchanged(self):
+        for text in self.READMES:
+            expected = 1.0 if any(keyword in text.lower() for keyword in self.CONTRIBUTOR_KEYWORDS) else 0.0
+            with self.subTest(text=text):
+                self.assertEqual(bus_factor_metric(ReadmeDocument.from_text(text), 0, NullQueue())[0], expected)
+
+    def test_dataset_scores_are_unchanged(self):
+        for text in self.READMES:
+            lowered = text.lower()
+            expected = 1.0 if any(host in lowered for host in self.DATASET_HOSTS) or any(kw in lowered for kw in self.DATASET_KEYWORDS) else 0.0
+            with self.subTest(text=text):
+                self.assertEqual(dataset_and_code_present(ReadmeDocument.from_text(text), 0, NullQueue())[0], expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
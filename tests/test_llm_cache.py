@@ -0,0 +1,152 @@
+import unittest
+import asyncio
+import os
+import tempfile
+from unittest.mock import AsyncMock, patch
+
+from classes.disk_cache import DiskCache
+from metrics import ai_llm_generic_call as llm
+from readme_document import ReadmeDocument
+from metrics.rampup_time_metric import rampup_time_metric
+from metrics.performance_claims_metric import performance_claims_metric
+
+
+class TestLlmResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        llm.configure_response_cache(DiskCache(os.path.join(self.tmpdir.name, "llm_cache.sqlite")))
+        self.env = patch.dict(os.environ, {"GEN_AI_STUDIO_API_KEY": "key"})
+        self.env.start()
+        self.readme = ReadmeDocument.from_text("# Model\nA README.", "README.md")
+
+    def tearDown(self):
+        self.env.stop()
+        llm.configure_response_cache(None)
+        self.tmpdir.cleanup()
+
+    @patch("metrics.ai_llm_generic_call.GenAiChatApi.get_chat_completion", return_value="0.7")
+    def test_unchanged_readme_makes_no_second_call(self, mock_completion):
+        self.assertEqual(llm.process_file_and_get_response(self.readme, "Rate it:", "gemma3:1b"), "0.7")
+        self.assertEqual(llm.process_file_and_get_response(ReadmeDocument.from_text(self.readme.text), "Rate it:", "gemma3:1b"), "0.7")
+        self.assertEqual(mock_completion.call_count, 1)
+
+        # A different README, instruction or model is a different request
+        llm.process_file_and_get_response(ReadmeDocument.from_text(self.readme.text + "!"), "Rate it:", "gemma3:1b")
+        llm.process_file_and_get_response(self.readme, "Rate it again:", "gemma3:1b")
+        llm.process_file_and_get_response(self.readme, "Rate it:", "llama3.1:latest")
+        self.assertEqual(mock_completion.call_count, 4)
+
+    @patch("metrics.ai_llm_generic_call.GenAiChatApi.get_chat_completion", return_value=None)
+    def test_failed_calls_are_not_cached(self, mock_completion):
+        llm.process_file_and_get_response(self.readme, "Rate it:", "gemma3:1b")
+        llm.process_file_and_get_response(self.readme, "Rate it:", "gemma3:1b")
+        self.assertEqual(mock_completion.call_count, 2)
+
+    @patch("metrics.ai_llm_generic_call.GenAiChatApi.get_chat_completion", return_value="0.7")
+    def test_expired_entries_are_refetched(self, mock_completion):
+        with patch.dict(os.environ, {"LLM_CACHE_TTL": "0"}):
+            llm.process_file_and_get_response(self.readme, "Rate it:", "gemma3:1b")
+            llm.process_file_and_get_response(self.readme, "Rate it:", "gemma3:1b")
+        self.assertEqual(mock_completion.call_count, 2)
+
+    def test_async_path_shares_the_cache(self):
+        with patch("metrics.ai_llm_generic_call.GenAiChatApi.get_chat_completion", return_value="0.4") as sync_completion, \
+             patch("metrics.ai_llm_generic_call.AsyncGenAiChatApi.get_chat_completion", new_callable=AsyncMock, return_value="0.9") as async_completion:
+            self.assertEqual(llm.process_file_and_get_response(self.readme, "Rate it:", "gemma3:1b"), "0.4")
+            self.assertEqual(asyncio.run(llm.process_file_and_get_response_async(self.readme, "Rate it:", "gemma3:1b")), "0.4")
+            self.assertEqual(asyncio.run(llm.process_file_and_get_response_async(self.readme, "Other:", "gemma3:1b")), "0.9")
+        self.assertEqual(sync_completion.call_count, 1)
+        self.assertEqual(async_completion.await_count, 1)
+
+    def test_only_responses_that_parse_are_cached(self):
+        def score(responses):
+            async def completion(prompt):
+                return responses.pop(0)
+
+            with patch("metrics.ai_llm_generic_call.AsyncGenAiChatApi.get_chat_completion", new_callable=AsyncMock, side_effect=completion) as mock_completion:
+                scores = asyncio.run(llm.get_readme_scores_async(self.readme, "gemma3:1b", ("rampup_time",)))
+            return scores["rampup_time"], mock_completion.await_count
+
+        self.assertEqual(score(["Sure!", "high"]), (None, 2))
+        # The fallback now parses and is kept; the combined answer still does not and is asked again
+        self.assertEqual(score(["Sure!", "0.6"]), (0.6, 2))
+        self.assertEqual(score(["Sure!"]), (0.6, 1))
+        self.assertEqual(score(['{"rampup_time": 0.9}']), (0.9, 1))
+        self.assertEqual(score([]), (0.9, 0))
+
+    def test_cache_is_on_by_default(self):
+        env = {name: value for name, value in os.environ.items() if name not in ("LLM_CACHE_DIR", "HTTP_CACHE_DIR")}
+        default_dir = os.path.join(self.tmpdir.name, "default")
+        with patch.dict(os.environ, env, clear=True), patch.object(llm, "LLM_CACHE_DEFAULT_DIR", default_dir):
+            llm._response_cache_checked = False
+            self.assertEqual(llm.response_cache().path, os.path.join(default_dir, "llm_cache.sqlite"))
+            with patch.dict(os.environ, {"LLM_CACHE_DIR": "off"}):
+                llm._response_cache_checked = False
+                self.assertIsNone(llm.response_cache())
+
+
+class NullQueue:
+    def put(self, message):
+        pass
+
+
+class TestCombinedScores(unittest.TestCase):
+
+    def setUp(self):
+        llm.configure_response_cache(None)
+        self.env = patch.dict(os.environ, {"GEN_AI_STUDIO_API_KEY": "key"})
+        self.env.start()
+        self.readme = ReadmeDocument.from_text("# Model\nA README.", "README.md")
+
+    def tearDown(self):
+        self.env.stop()
+
+    def _run_both_metrics(self, responses):
+        async def completion(prompt):
+            await asyncio.sleep(0.01)
+            return responses.pop(0)
+
+        async def both():
+            return await asyncio.gather(
+                rampup_time_metric(self.readme, 0, NullQueue()),
+                performance_claims_metric(self.readme, 0, NullQueue()),
+            )
+
+        with patch("metrics.ai_llm_generic_call.AsyncGenAiChatApi.get_chat_completion", new_callable=AsyncMock, side_effect=completion) as mock_completion:
+            (rampup, _), (claims, _) = asyncio.run(both())
+        return rampup, claims, mock_completion
+
+    def test_parse_scores_is_strict(self):
+        fields = ("rampup_time", "performance_claims")
+        self.assertEqual(llm.parse_scores('```json\n{"rampup_time": 0.8, "performance_claims": 1}\n```', fields),
+                         {"rampup_time": 0.8, "performance_claims": 1.0})
+        self.assertEqual(llm.parse_scores('{"rampup_time": 1.5, "performance_claims": true}', fields),
+                         {"rampup_time": None, "performance_claims": None})
+        self.assertEqual(llm.parse_scores('Sure! {"rampup_time": 0.8}', fields),
+                         {"rampup_time": None, "performance_claims": None})
+        self.assertEqual(llm.parse_single_score(" 0.25\n"), 0.25)
+        self.assertIsNone(llm.parse_single_score("0.25 because"))
+
+    def test_metrics_share_one_request(self):
+        rampup, claims, mock_completion = self._run_both_metrics(['{"rampup_time": 0.8, "performance_claims": 0.3}'])
+        self.assertEqual((rampup, claims), (0.8, 0.3))
+        self.assertEqual(mock_completion.await_count, 1)
+        prompt = mock_completion.await_args.args[0]
+        self.assertIn("rampup_time", prompt)
+        self.assertTrue(prompt.endswith(self.readme.text))
+
+    def test_missing_field_falls_back_to_a_single_prompt(self):
+        rampup, claims, mock_completion = self._run_both_metrics(['{"rampup_time": 0.8, "performance_claims": "high"}', "0.6"])
+        self.assertEqual((rampup, claims), (0.8, 0.6))
+        self.assertEqual(mock_completion.await_count, 2)
+        self.assertTrue(mock_completion.await_args.args[0].startswith(llm.SINGLE_SCORE_INSTRUCTIONS["performance_claims"]))
+
+    def test_no_response_scores_zero_without_fallback(self):
+        rampup, claims, mock_completion = self._run_both_metrics([None])
+        self.assertEqual((rampup, claims), (0.0, 0.0))
+        self.assertEqual(mock_completion.await_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
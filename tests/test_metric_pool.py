@@ -0,0 +1,393 @@
+import unittest
+import tempfile
+import os
+import sys
+import time
+import json
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+import metric_caller as mc
+
+
+METRIC_SOURCE = (
+    "import os\n"
+    "def pool_metric(value, verbosity, log_queue):\n"
+    "    log_queue.put(f'pool_metric value={value}')\n"
+    "    return float(value), 0.01\n"
+)
+
+FAILING_SOURCE = (
+    "def failing_metric(value, verbosity, log_queue):\n"
+    "    raise ValueError('fail')\n"
+)
+
+PID_SOURCE = (
+    "import os\n"
+    "def pid_metric(value, verbosity, log_queue):\n"
+    "    return float(os.getpid()), 0.0\n"
+)
+
+PARAMS = ["value", "verbosity", "log_queue"]
+
+
+class MetricPackageTestCase(unittest.TestCase):
+    """Writes a stub metric package into a temporary working directory.
+
+    Subclasses set PACKAGE, MODULES (module name -> source), MANIFEST (or None
+    for no manifest.json) and TASKS (lines of tasks.txt).
+    """
+
+    PACKAGE = ""
+    MODULES = {}
+    MANIFEST = None
+    TASKS = []
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.old_cwd = os.getcwd()
+        os.chdir(self.tmpdir.name)
+        sys.path.insert(0, self.tmpdir.name)
+
+        os.makedirs(self.PACKAGE)
+        for name, source in self.MODULES.items():
+            with open(os.path.join(self.PACKAGE, f"{name}.py"), "w") as f:
+                f.write(source)
+        if self.MANIFEST is not None:
+            with open(os.path.join(self.PACKAGE, "manifest.json"), "w") as f:
+                json.dump(self.MANIFEST, f)
+
+        self.tasks_file = os.path.join(self.tmpdir.name, "tasks.txt")
+        with open(self.tasks_file, "w") as f:
+            f.writelines(f"{line}\n" for line in self.TASKS)
+        self.log_file = os.path.join(self.tmpdir.name, "log.txt")
+
+    def tearDown(self):
+        os.chdir(self.old_cwd)
+        sys.path.remove(self.tmpdir.name)
+        for name in [name for name in sys.modules if name == self.PACKAGE or name.startswith(self.PACKAGE + ".")]:
+            sys.modules.pop(name)
+        self.tmpdir.cleanup()
+
+
+class TestMetricWorkerPool(MetricPackageTestCase):
+
+    PACKAGE = "pool_metrics"
+    MODULES = {"pool_metric": METRIC_SOURCE, "failing_metric": FAILING_SOURCE, "pid_metric": PID_SOURCE}
+    TASKS = ["pool_metric(value, verbosity, log_queue) 3", "failing_metric(value, verbosity, log_queue) 1"]
+
+    def setUp(self):
+        super().setUp()
+        self.functions = mc.load_available_functions("pool_metrics")
+
+    def test_pool_matches_per_process_results(self):
+        args = {"value": 1.0, "verbosity": 0}
+        expected_scores, expected_times = mc.run_concurrently_from_file(self.tasks_file, dict(args), self.functions, self.log_file)
+
+        with mc.MetricWorkerPool("pool_metrics", processes=2) as pool:
+            scores, times = mc.run_concurrently_from_file(self.tasks_file, dict(args), self.functions, self.log_file, pool=pool)
+
+        self.assertEqual(scores, expected_scores)
+        self.assertEqual(scores["failing_metric"], 0.0)
+        self.assertEqual(scores["net_score"], 0.75)
+        self.assertEqual(set(times), set(expected_times))
+
+    def test_pool_is_reused_and_recycles_workers(self):
+        with open(self.tasks_file, "w") as f:
+            f.write("pid_metric(value, verbosity, log_queue) 1\n")
+
+        pids = set()
+        with mc.MetricWorkerPool("pool_metrics", processes=1, max_tasks_per_child=2) as pool:
+            for _ in range(4):
+                scores, _ = mc.run_concurrently_from_file(self.tasks_file, {"value": 0, "verbosity": 0}, self.functions, self.log_file, pool=pool)
+                pids.add(scores["pid_metric"])
+
+        # One worker, replaced after every second task
+        self.assertEqual(len(pids), 2)
+
+    def test_log_sink_is_shared_across_models(self):
+        with mc.LogSink(self.log_file) as sink:
+            with mc.MetricWorkerPool("pool_metrics", processes=2, log_queue=sink.queue) as pool:
+                for value in (1, 2):
+                    mc.run_concurrently_from_file(self.tasks_file, {"value": value, "verbosity": 1}, self.functions, self.log_file, pool=pool, log_sink=sink)
+
+        with open(self.log_file) as f:
+            content = f.read()
+        # The second model must not wipe the first model's log
+        self.assertIn("pool_metric value=1", content)
+        self.assertIn("pool_metric value=2", content)
+
+    def test_task_plan_is_compiled_once(self):
+        with open(self.tasks_file, "a") as f:
+            f.write("not a task line\n")
+            f.write("missing_metric(value) 1\n")
+            f.write("pool_metric(value) 1\n")
+            f.write("pool_metric(other, verbosity, log_queue) 1\n")
+
+        plan = mc.TaskPlan.compile(self.tasks_file, self.functions)
+        self.assertEqual([task.func_name for task in plan.tasks], ["pool_metric", "failing_metric", "pool_metric"])
+        self.assertEqual(len(plan.errors), 3)
+        self.assertEqual(plan.tasks[0].arg_keys, ["value", "verbosity", "log_queue"])
+        self.assertEqual(plan.tasks[0].weight, 3.0)
+
+        class ListQueue(list):
+            put = list.append
+
+        log = ListQueue()
+        for value in (1, 2):
+            bound = plan.bind({"value": value, "verbosity": 1, "log_queue": None}, log, 1)
+            self.assertEqual(len(bound), 2)
+            self.assertEqual(bound[0][1], (value, 1, None))
+        # The line with the unknown key is reported once, not once per model
+        self.assertEqual(len(log), 1)
+        self.assertIn("Missing required keys", log[0])
+
+        with mc.MetricWorkerPool("pool_metrics", processes=2) as pool:
+            scores, _ = mc.run_concurrently_from_file(plan, {"value": 1.0, "verbosity": 0}, self.functions, self.log_file, pool=pool)
+        self.assertEqual(scores["pool_metric"], 1.0)
+
+
+HEAVY_SOURCE = (
+    "open('heavy_imported', 'a').close()\n"
+    "def heavy_metric(value, verbosity, log_queue):\n"
+    "    return 0.5, 0.0\n"
+)
+
+
+class TestLazyRegistry(MetricPackageTestCase):
+
+    PACKAGE = "lazy_metrics"
+    MODULES = {"pool_metric": METRIC_SOURCE, "heavy_metric": HEAVY_SOURCE}
+    MANIFEST = {
+        "pool_metric": {"params": PARAMS},
+        "heavy_metric": {"module": "heavy_metric", "params": PARAMS, "github_requests": 2},
+    }
+    TASKS = ["pool_metric(value, verbosity, log_queue) 1", "pool_metric(value) 1"]
+
+    def test_plan_compiles_without_importing(self):
+        functions = mc.load_available_functions("lazy_metrics")
+        plan = mc.TaskPlan.compile(self.tasks_file, functions)
+
+        self.assertEqual([task.func_name for task in plan.tasks], ["pool_metric"])
+        self.assertEqual(len(plan.errors), 1)
+        self.assertIn("expects 3 args", plan.errors[0])
+        self.assertNotIn("lazy_metrics.pool_metric", sys.modules)
+
+        lazy = pickle.loads(pickle.dumps(functions["pool_metric"]))
+        self.assertEqual(lazy(2.0, 0, mc._NullLogQueue()), (2.0, 0.01))
+
+    def test_github_requests_come_from_the_manifest(self):
+        functions = mc.load_available_functions("lazy_metrics")
+        self.assertEqual(functions["heavy_metric"].github_requests, 2)
+        self.assertEqual(functions["pool_metric"].github_requests, 0)
+        self.assertEqual(pickle.loads(pickle.dumps(functions["heavy_metric"])).github_requests, 2)
+
+    def test_workers_import_only_planned_metrics(self):
+        functions = mc.load_available_functions("lazy_metrics")
+        plan = mc.TaskPlan.compile(self.tasks_file, functions)
+
+        with mc.MetricWorkerPool("lazy_metrics", processes=2, preload=[task.func_name for task in plan.tasks]) as pool:
+            scores, _ = mc.run_concurrently_from_file(plan, {"value": 1.0, "verbosity": 0}, functions, self.log_file, pool=pool)
+        scores_without_pool, _ = mc.run_concurrently_from_file(plan, {"value": 1.0, "verbosity": 0}, functions, self.log_file)
+
+        self.assertEqual(scores["pool_metric"], 1.0)
+        self.assertEqual(scores, scores_without_pool)
+        self.assertFalse(os.path.exists("heavy_imported"))
+        self.assertNotIn("lazy_metrics.pool_metric", sys.modules)
+
+    def test_profile_imports(self):
+        profile = mc.profile_imports("lazy_metrics", ["heavy_metric"])
+        self.assertEqual([module for module, _, _ in profile], ["heavy_metric"])
+        self.assertIsNone(profile[0][2])
+        self.assertGreaterEqual(profile[0][1], 0.0)
+
+    def test_shipped_manifest_lists_every_metric(self):
+        manifest = mc.load_manifest(os.path.join(self.old_cwd, "metrics"))
+        modules = {filename[:-3] for filename in os.listdir(os.path.join(self.old_cwd, "metrics"))
+                   if filename.endswith(".py") and not filename.startswith("__")}
+        # ai_llm_generic_call, keyword_matcher and readme_compactor are helpers, not metrics
+        self.assertEqual(set(manifest), modules - {"ai_llm_generic_call", "keyword_matcher", "readme_compactor"})
+
+
+WHERE_SOURCE = (
+    "import os, threading\n"
+    "def where_metric(value, verbosity, log_queue):\n"
+    "    # The latency reports whether the call ran on the shared metric thread pool\n"
+    "    return float(os.getpid()), float(threading.current_thread().name.startswith('metric'))\n"
+)
+
+
+class TestExecutorSelection(MetricPackageTestCase):
+
+    PACKAGE = "exec_metrics"
+    MODULES = {"where_metric": WHERE_SOURCE, "failing_metric": FAILING_SOURCE}
+    MANIFEST = {
+        "inline_metric": {"module": "where_metric", "function": "where_metric", "params": PARAMS, "executor": "inline"},
+        "thread_metric": {"module": "where_metric", "function": "where_metric", "params": PARAMS, "executor": "thread"},
+        "process_metric": {"module": "where_metric", "function": "where_metric", "params": PARAMS, "executor": "process"},
+        "failing_metric": {"params": PARAMS, "executor": "thread"},
+        "odd_metric": {"module": "where_metric", "function": "where_metric", "params": PARAMS, "executor": "gpu"},
+    }
+    TASKS = [f"{name}(value, verbosity, log_queue) 1" for name in MANIFEST]
+
+    def test_each_metric_runs_on_its_executor(self):
+        functions = mc.load_available_functions("exec_metrics")
+        plan = mc.TaskPlan.compile(self.tasks_file, functions)
+        self.assertEqual([task.executor for task in plan.tasks], ["inline", "thread", "process", "thread", "process"])
+        self.assertEqual(len(plan.errors), 1)
+        self.assertIn("unknown executor 'gpu'", plan.errors[0])
+
+        for pool in (None, mc.MetricWorkerPool("exec_metrics", processes=1, preload=["process_metric"])):
+            try:
+                scores, times = mc.run_concurrently_from_file(plan, {"value": 1, "verbosity": 0}, functions, self.log_file, pool=pool)
+            finally:
+                if pool is not None:
+                    pool.close()
+            self.assertEqual((scores["inline_metric"], times["inline_metric"]), (os.getpid(), 0))
+            self.assertEqual((scores["thread_metric"], times["thread_metric"]), (os.getpid(), 1000))
+            self.assertNotEqual(scores["process_metric"], os.getpid())
+            self.assertEqual(scores["failing_metric"], 0.0)
+
+
+class ListSink:
+    """Stands in for a LogSink; run_concurrently_from_file only uses its queue."""
+
+    def __init__(self):
+        self.queue = type("ListQueue", (list,), {"put": list.append})()
+
+
+ASYNC_SOURCE = (
+    "import asyncio, threading\n"
+    "async def sleepy_metric(value, verbosity, log_queue):\n"
+    "    await asyncio.sleep(value)\n"
+    "    log_queue.put(threading.current_thread().name)\n"
+    "    return 1.0, value\n"
+)
+
+
+class TestAsyncMetrics(MetricPackageTestCase):
+
+    PACKAGE = "async_metrics"
+    MODULES = {"sleepy_metric": ASYNC_SOURCE}
+    TASKS = ["sleepy_metric(value, verbosity, log_queue) 1"]
+
+    def tearDown(self):
+        mc.close_metric_event_loop()
+        super().tearDown()
+
+    def _plan(self, deadline=None):
+        with open(os.path.join("async_metrics", "manifest.json"), "w") as f:
+            json.dump({"sleepy_metric": {"params": PARAMS, "executor": "async", "deadline": deadline}}, f)
+        functions = mc.load_available_functions("async_metrics")
+        return mc.TaskPlan.compile(self.tasks_file, functions), functions
+
+    def test_models_in_flight_share_one_event_loop(self):
+        plan, functions = self._plan()
+        sink = ListSink()
+
+        with ThreadPoolExecutor(max_workers=20) as models:
+            start = time.perf_counter()
+            runs = [models.submit(mc.run_concurrently_from_file, plan, {"value": 0.3, "verbosity": 0}, functions, self.log_file, log_sink=sink)
+                    for _ in range(20)]
+            results = [run.result() for run in runs]
+            elapsed = time.perf_counter() - start
+
+        self.assertTrue(all(scores["sleepy_metric"] == 1.0 for scores, _ in results))
+        # Twenty 0.3s metrics overlapped instead of running one after another
+        self.assertLess(elapsed, 3.0)
+        self.assertEqual(set(sink.queue), {"metric-loop"})
+
+    def test_deadline_cancels_the_metric(self):
+        plan, functions = self._plan(deadline=0.1)
+        self.assertEqual(plan.tasks[0].executor, "async")
+        self.assertEqual(plan.tasks[0].deadline, 0.1)
+
+        start = time.perf_counter()
+        scores, _ = mc.run_concurrently_from_file(plan, {"value": 5, "verbosity": 0}, functions, self.log_file, log_sink=ListSink())
+        self.assertEqual(scores["sleepy_metric"], 0.0)
+        self.assertLess(time.perf_counter() - start, 2.0)
+
+    def test_async_metric_on_a_sync_executor_gets_its_own_loop(self):
+        plan, functions = self._plan()
+        self.assertEqual(mc.run_metric(functions["sleepy_metric"], 2, "sleepy_metric", 0.0, 0, mc._NullLogQueue()), (1.0, 0.0, 2.0, "sleepy_metric"))
+
+
+BATCH_SOURCE = (
+    "batch_sizes = []\n"
+    "def double_metric(value, verbosity, log_queue):\n"
+    "    return value * 2, 0.0\n"
+    "def double_metric_batch(values, verbosities, log_queues):\n"
+    "    batch_sizes.append(len(values))\n"
+    "    if any(value < 0 for value in values):\n"
+    "        raise ValueError('negative')\n"
+    "    return [(value * 2, 0.001) for value in values]\n"
+)
+
+
+class TestBatchCollector(MetricPackageTestCase):
+
+    PACKAGE = "batch_metrics"
+    MODULES = {"double_metric": BATCH_SOURCE}
+    MANIFEST = {"double_metric": {"params": PARAMS, "executor": "inline", "batch": True}}
+    TASKS = ["double_metric(value, verbosity, log_queue) 1"]
+
+    def setUp(self):
+        super().setUp()
+        self.functions = mc.load_available_functions("batch_metrics")
+        self.plan = mc.TaskPlan.compile(self.tasks_file, self.functions)
+
+    def _evaluate(self, values, batcher):
+        with ThreadPoolExecutor(max_workers=len(values)) as models:
+            runs = [models.submit(mc.run_concurrently_from_file, self.plan, {"value": value, "verbosity": 0}, self.functions, self.log_file, log_sink=ListSink(), batcher=batcher)
+                    for value in values]
+            return [run.result()[0]["double_metric"] for run in runs]
+
+    def test_models_in_flight_are_scored_in_one_call(self):
+        with mc.BatchCollector(max_size=10, max_wait=5) as batcher:
+            self.assertEqual(self._evaluate(list(range(10)), batcher), [value * 2 for value in range(10)])
+        self.assertEqual(sys.modules["batch_metrics.double_metric"].batch_sizes, [10])
+
+    def test_partial_batch_runs_after_max_wait(self):
+        with mc.BatchCollector(max_size=10, max_wait=0.05) as batcher:
+            self.assertEqual(self._evaluate([1, 2, 3], batcher), [2, 4, 6])
+        self.assertEqual(sum(sys.modules["batch_metrics.double_metric"].batch_sizes), 3)
+
+    def test_failed_batch_scores_every_model_zero(self):
+        with mc.BatchCollector(max_size=2, max_wait=5) as batcher:
+            self.assertEqual(self._evaluate([1, -1], batcher), [0.0, 0.0])
+
+    def test_dict_scored_metric_fails_to_an_empty_dict(self):
+        def broken(*columns):
+            raise RuntimeError("batch failed")
+
+        with mc.BatchCollector(max_size=1) as batcher:
+            self.assertEqual(batcher.submit("calculate_size_score", broken, 1.0, (1, 0, None)).result()[0], {})
+        self.assertEqual(mc.run_metric(broken, 1.0, "calculate_size_score", 1, 0, None)[0], {})
+        self.assertEqual(mc.run_metric(broken, 1.0, "calculate_license_score", 1, 0, None)[0], 0.0)
+
+    def test_without_a_collector_the_single_form_is_used(self):
+        scores, _ = mc.run_concurrently_from_file(self.plan, {"value": 4, "verbosity": 0}, self.functions, self.log_file, log_sink=ListSink())
+        self.assertEqual(scores["double_metric"], 8)
+        self.assertEqual(sys.modules["batch_metrics.double_metric"].batch_sizes, [])
+
+
+class TestLogSink(unittest.TestCase):
+
+    def test_time_based_flush(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            log_file = os.path.join(tmpdir, "log.txt")
+            sink = mc.LogSink(log_file, flush_bytes=1 << 20, flush_interval=0.05)
+            try:
+                sink.put("buffered message")
+                deadline = time.monotonic() + 5
+                content = ""
+                while "buffered message" not in content and time.monotonic() < deadline:
+                    time.sleep(0.05)
+                    with open(log_file) as f:
+                        content = f.read()
+                self.assertIn("buffered message", content)
+            finally:
+                sink.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
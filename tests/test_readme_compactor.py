@@ -0,0 +1,103 @@
+import unittest
+import asyncio
+import os
+from unittest.mock import AsyncMock, patch
+
+from metrics import ai_llm_generic_call as llm
+from metrics.keyword_matcher import KeywordMatcher
+from metrics.readme_compactor import compact_readme, estimate_tokens, MAX_CODE_LINES, MAX_TABLE_ROWS, MIN_SECTION_TOKENS
+from readme_document import ReadmeDocument
+
+
+class ListQueue:
+    def __init__(self):
+        self.messages = []
+
+    def put(self, message):
+        self.messages.append(message)
+
+
+class TestCompactReadme(unittest.TestCase):
+
+    def test_strips_low_signal_markup(self):
+        document = ReadmeDocument.from_text(
+            "[![Build](https://ci.example/badge.svg)](https://ci.example) ![logo](logo.png)\n"
+            "<div align=\"center\"><b>A small model</b></div> for [translation](https://example.com/docs).\n"
+            "<!-- template comment -->\n\n"
+            "## Limitations\n[More Information Needed]\n\n"
+            "## Citation\n```bibtex\n@article{x, title={X}}\n```\n"
+        )
+        text = compact_readme(document, 1000)
+        self.assertEqual(text, "A small model for translation.")
+
+    def test_trims_tables_and_code(self):
+        rows = "\n".join(f"| task{i} | 0.{i} |" for i in range(20))
+        code = "\n".join(f"print({i})" for i in range(40))
+        document = ReadmeDocument.from_text(f"# Results\n| task | score |\n|---|---|\n{rows}\n\n## Usage\n```python\n{code}\n```\n")
+        text = compact_readme(document, 1000)
+        self.assertIn(f"| ... {20 - MAX_TABLE_ROWS} more rows |", text)
+        self.assertIn(f"# ... {40 - MAX_CODE_LINES} more lines", text)
+        self.assertNotIn("task19", text)
+        self.assertTrue(text.endswith("```"))
+
+    def test_repeated_paragraphs_are_sent_once(self):
+        disclaimer = "This model is provided as is, without any warranty of any kind, express or implied."
+        document = ReadmeDocument.from_text(f"Intro.\n\n{disclaimer}\n\n## Usage\nRun it.\n\n{disclaimer}\n")
+        self.assertEqual(compact_readme(document, 1000).count(disclaimer), 1)
+
+    def test_budget_keeps_the_intro_and_the_relevant_sections(self):
+        filler = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 20
+        document = ReadmeDocument.from_text(
+            f"An intro.\n\n## Environmental impact\n{filler}\n\n## Evaluation\nIt scores 0.91 accuracy on the benchmark.\n\n"
+            f"## Training hyperparameters\n{filler}\n"
+        )
+        relevance = KeywordMatcher({"performance_claims": ["evaluation", "accuracy", "benchmark"]}, {"performance_claims": True})
+        text = compact_readme(document, 100, relevance)
+
+        self.assertLessEqual(estimate_tokens(text), 100)
+        self.assertTrue(text.startswith("An intro."))
+        self.assertIn("## Evaluation\nIt scores 0.91 accuracy on the benchmark.", text)
+        self.assertLess(estimate_tokens(text), estimate_tokens(document.text))
+
+    def test_small_budget_keeps_the_top_section_cut_to_fit(self):
+        intro = "This model translates English to French and was trained on a large parallel corpus. " * 3
+        document = ReadmeDocument.from_text(f"{intro}\n\n## Usage\nRun it.\n")
+        for budget in (1, 10, MIN_SECTION_TOKENS - 1):
+            text = compact_readme(document, budget)
+            self.assertTrue(text)
+            self.assertTrue(intro.startswith(text))
+            self.assertLessEqual(estimate_tokens(text), budget)
+
+    def test_zero_budget_sends_the_readme_unchanged(self):
+        document = ReadmeDocument.from_text("![badge](b.svg)\n# Model\n")
+        self.assertEqual(compact_readme(document, 0), document.text)
+
+
+class TestPromptCompaction(unittest.TestCase):
+
+    def setUp(self):
+        llm.configure_response_cache(None)
+        self.env = patch.dict(os.environ, {"GEN_AI_STUDIO_API_KEY": "key", "LLM_PROMPT_TOKEN_BUDGET": "50"})
+        self.env.start()
+
+    def tearDown(self):
+        self.env.stop()
+
+    def test_prompt_is_compacted_and_logged(self):
+        filler = "Lorem ipsum dolor sit amet. " * 40
+        readme = ReadmeDocument.from_text(f"Intro.\n\n## Background\n{filler}\n\n## Quick start\npip install model\n", "README.md")
+        queue = ListQueue()
+        with patch("metrics.ai_llm_generic_call.AsyncGenAiChatApi.get_chat_completion", new_callable=AsyncMock, return_value="0.8") as completion:
+            response = asyncio.run(llm.process_file_and_get_response_async(readme, "Rate it:\n", "gemma3:1b", ("rampup_time",), queue, 1))
+
+        self.assertEqual(response, "0.8")
+        prompt = completion.await_args.args[0]
+        self.assertIn("## Quick start\npip install model", prompt)
+        self.assertNotIn("Background", prompt)
+        self.assertEqual(len(queue.messages), 1)
+        sent = prompt[len("Rate it:\n"):]
+        self.assertIn(f"{estimate_tokens(readme.text)} -> {estimate_tokens(sent)} tokens (budget 50)", queue.messages[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+import os
+import pickle
+import tempfile
+
+from readme_document import ReadmeDocument
+from metrics.bus_factor_metric import bus_factor_metric
+from metrics.dataset_and_code_present import dataset_and_code_present
+
+
+MODEL_CARD = """---
+license: apache-2.0
+---
+Fine-tuned from https://huggingface.co/bert-base-uncased.
+
+# My Model
+
+Maintained by the NLP Team. See [the paper](https://arxiv.org/abs/1234 "Paper") or <https://example.org/docs>.
+
+## Usage
+
+```python
+# Not a heading
+from transformers import pipeline
+```
+
+## Training Data
+
+Trained on https://huggingface.co/datasets/imdb.
+
+### Limits
+
+# License
+"""
+
+
+class NullQueue:
+    def put(self, message):
+        pass
+
+
+class TestReadmeDocument(unittest.TestCase):
+
+    def test_parses_sections_code_and_links(self):
+        document = ReadmeDocument.from_text(MODEL_CARD)
+
+        self.assertEqual(document.front_matter, "license: apache-2.0")
+        self.assertEqual([(s.title, s.level) for s in document.sections],
+                         [("My Model", 1), ("Usage", 2), ("Training Data", 2), ("Limits", 3), ("License", 1)])
+        self.assertEqual([s.title for s in document.root.children], ["My Model", "License"])
+        self.assertEqual(document.find_section("training").children[0].title, "Limits")
+        self.assertIn("Fine-tuned from", document.root.text)
+
+        self.assertEqual(len(document.code_blocks), 1)
+        self.assertEqual(document.code_blocks[0].language, "python")
+        self.assertIn("# Not a heading", document.code_blocks[0].code)
+
+        self.assertEqual(document.links, [
+            "https://huggingface.co/bert-base-uncased",
+            "https://arxiv.org/abs/1234",
+            "https://example.org/docs",
+            "https://huggingface.co/datasets/imdb",
+        ])
+        self.assertEqual(document.text_lower, MODEL_CARD.lower())
+        self.assertEqual(document.sha256, ReadmeDocument.from_text(MODEL_CARD).sha256)
+        self.assertNotEqual(document.sha256, ReadmeDocument.from_text(MODEL_CARD + " ").sha256)
+
+    def test_missing_file_is_an_empty_document(self):
+        self.assertFalse(ReadmeDocument.from_file(""))
+        self.assertFalse(ReadmeDocument.from_file("/nonexistent/README.md"))
+
+    def test_round_trips_through_pickle(self):
+        document = ReadmeDocument.from_text(MODEL_CARD, "README.md")
+        self.assertEqual(pickle.loads(pickle.dumps(document)), document)
+
+
+class TestReadmeMetrics(unittest.TestCase):
+
+    def test_keyword_metrics_scan_the_content_not_the_path(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "README.md")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(MODEL_CARD)
+            document = ReadmeDocument.from_file(path)
+
+            for readme in (document, path):
+                self.assertEqual(bus_factor_metric(readme, 0, NullQueue())[0], 1.0)
+                self.assertEqual(dataset_and_code_present(readme, 0, NullQueue())[0], 1.0)
+
+        empty = ReadmeDocument.from_text("Nothing to see here.")
+        self.assertEqual(bus_factor_metric(empty, 0, NullQueue())[0], 0.0)
+        self.assertEqual(dataset_and_code_present(empty, 0, NullQueue())[0], 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
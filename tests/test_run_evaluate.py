@@ -0,0 +1,48 @@
+import unittest
+import time
+import threading
+import run
+
+
+class TestEvaluateProjectGroups(unittest.TestCase):
+
+    def setUp(self):
+        # Earlier groups finish last so completion order is the reverse of input order
+        self.delays = [0.15, 0.1, 0.05, 0.0]
+
+    def evaluate(self, index):
+        time.sleep(self.delays[index])
+        return f"model{index}", {"net_score": index}, {}
+
+    def test_sequential_when_single_job(self):
+        names = [name for name, _, _ in run.evaluate_project_groups(range(4), self.evaluate, jobs=1)]
+        self.assertEqual(names, ["model0", "model1", "model2", "model3"])
+
+    def test_input_order_is_preserved_with_jobs(self):
+        names = [name for name, _, _ in run.evaluate_project_groups(range(4), self.evaluate, jobs=4, ordered=True)]
+        self.assertEqual(names, ["model0", "model1", "model2", "model3"])
+
+    def test_completion_order(self):
+        names = [name for name, _, _ in run.evaluate_project_groups(range(4), self.evaluate, jobs=4, ordered=False)]
+        self.assertEqual(names, ["model3", "model2", "model1", "model0"])
+
+    def test_concurrency_is_bounded(self):
+        lock = threading.Lock()
+        state = {"active": 0, "peak": 0}
+
+        def evaluate(index):
+            with lock:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            time.sleep(0.02)
+            with lock:
+                state["active"] -= 1
+            return index
+
+        results = list(run.evaluate_project_groups(range(10), evaluate, jobs=3))
+        self.assertEqual(results, list(range(10)))
+        self.assertLessEqual(state["peak"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
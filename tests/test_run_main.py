@@ -18,6 +18,16 @@ import metric_caller as mc
 
 class TestRunMainClean(unittest.TestCase):
 
+    def setUp(self):
+        # Keep main() from writing the fake token into the machine-wide credential cache
+        self.credentials_dir = tempfile.TemporaryDirectory()
+        self.credentials_env = patch.dict("os.environ", {"CREDENTIAL_CACHE_FILE": os.path.join(self.credentials_dir.name, "credentials.json")})
+        self.credentials_env.start()
+
+    def tearDown(self):
+        self.credentials_env.stop()
+        self.credentials_dir.cleanup()
+
     @patch("url_class.parse_project_file")
     @patch("sys.argv", ["run.py", "fake_target.txt"])
     def test_main_runs_without_error(self, mock_parse):
@@ -307,6 +317,16 @@ import run
 
 class TestRunExtraBranches(unittest.TestCase):
 
+    def setUp(self):
+        # Keep main() from writing the fake token into the machine-wide credential cache
+        self.credentials_dir = tempfile.TemporaryDirectory()
+        self.credentials_env = patch.dict("os.environ", {"CREDENTIAL_CACHE_FILE": os.path.join(self.credentials_dir.name, "credentials.json")})
+        self.credentials_env.start()
+
+    def tearDown(self):
+        self.credentials_env.stop()
+        self.credentials_dir.cleanup()
+
     @patch("subprocess.check_call")
     @patch("sys.argv", ["run.py", "install"])
     def test_install_branch(self, mock_subproc):
@@ -320,16 +340,30 @@ class TestRunExtraBranches(unittest.TestCase):
         run.main()
         mock_print.assert_any_call("Running test suite...")
 
+    @patch("run.metric_caller.profile_imports", return_value=[("license_metric", 0.002, None)])
+    @patch("sys.argv", ["run.py", "--import-profile"])
+    @patch("builtins.print")
+    def test_import_profile_needs_no_target_or_environment(self, mock_print, mock_profile):
+        with patch.dict("os.environ", {}, clear=True):
+            self.assertEqual(run.main(), 0)
+        mock_print.assert_called_once_with("license_metric: 2.0 ms")
+
+    @patch("sys.argv", ["run.py"])
+    def test_target_is_required_without_import_profile(self):
+        with patch("sys.stderr", io.StringIO()), self.assertRaises(SystemExit) as raised:
+            run.main()
+        self.assertEqual(raised.exception.code, 2)
+
     @patch("run.url_class.parse_project_file")
-    @patch("run.get_model_size", return_value=1234)
-    @patch("run.get_model_README", return_value="README.md")
+    @patch("run.get_model_snapshot", return_value=MagicMock(size=1234, readme_path="README.md", license="mit"))
     @patch("run.metric_caller.run_concurrently_from_file", return_value=({}, {}))
     @patch("run.build_model_output")
     @patch("sys.argv", ["run.py", "dummy_urls.txt"])
     @patch.dict("os.environ", {"LOG_LEVEL": "1", "LOG_FILE": "/tmp/log.txt", "GITHUB_TOKEN": "fake", "GEN_AI_STUDIO_API_KEY": "fake"})
     @patch("run.validate_github_token", return_value=True)
     @patch("run.GitHubApi.verify_token")
-    def test_url_file_branch(self, mock_verify, mock_validate, mock_build, mock_run, mock_readme, mock_size, mock_parse):
+    @patch("run.GitHubApi.check_rate_limit")
+    def test_url_file_branch(self, mock_rate_limit, mock_verify, mock_validate, mock_build, mock_run, mock_snapshot, mock_parse):
         # Simulate one project group
         mock_parse.return_value = [MagicMock(
             model=MagicMock(namespace="ns", repo="repo", rev="rev"),
@@ -338,10 +372,11 @@ class TestRunExtraBranches(unittest.TestCase):
         )]
         run.main()
         mock_parse.assert_called_once_with("dummy_urls.txt")
-        mock_size.assert_called_once()
-        mock_readme.assert_called_once()
+        mock_snapshot.assert_called_once_with("ns", "repo", "rev")
         mock_run.assert_called_once()
         mock_build.assert_called_once()
+        # verify_token was mocked, so nothing seeded the token's quota; it is fetched for the forecast instead
+        mock_rate_limit.assert_called_once_with("fake")
 
 
 if __name__ == "__main__":